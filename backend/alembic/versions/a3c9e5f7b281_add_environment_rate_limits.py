@@ -0,0 +1,34 @@
+"""add environment rate limit columns
+
+Revision ID: a3c9e5f7b281
+Revises: f5a2d8c3b167
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c9e5f7b281'
+down_revision: Union[str, Sequence[str], None] = 'f5a2d8c3b167'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('environments', sa.Column('rate_limit_rps', sa.Float(), nullable=True))
+    op.add_column('environments', sa.Column('rate_limit_burst', sa.Integer(), nullable=True))
+    op.add_column('environments', sa.Column('max_concurrency', sa.Integer(), nullable=True))
+    op.add_column(
+        'environments',
+        sa.Column('limit_scope', sa.String(length=20), nullable=True, server_default='host'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('environments', 'limit_scope')
+    op.drop_column('environments', 'max_concurrency')
+    op.drop_column('environments', 'rate_limit_burst')
+    op.drop_column('environments', 'rate_limit_rps')
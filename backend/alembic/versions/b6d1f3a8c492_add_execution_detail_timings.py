@@ -0,0 +1,29 @@
+"""add execution_details.timings
+
+Revision ID: b6d1f3a8c492
+Revises: a3c9e5f7b281
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d1f3a8c492'
+down_revision: Union[str, Sequence[str], None] = 'a3c9e5f7b281'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'execution_details',
+        sa.Column('timings', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('execution_details', 'timings')
@@ -0,0 +1,29 @@
+"""add execution_details.attempts
+
+Revision ID: c4e1a7d2f901
+Revises: b10d0f34cc18
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e1a7d2f901'
+down_revision: Union[str, Sequence[str], None] = 'b10d0f34cc18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'execution_details',
+        sa.Column('attempts', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('execution_details', 'attempts')
@@ -0,0 +1,29 @@
+"""add execution_details.response_body_meta
+
+Revision ID: c8e4a2d6f713
+Revises: b6d1f3a8c492
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e4a2d6f713'
+down_revision: Union[str, Sequence[str], None] = 'b6d1f3a8c492'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'execution_details',
+        sa.Column('response_body_meta', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('execution_details', 'response_body_meta')
@@ -0,0 +1,47 @@
+"""add case_datasets and execution_details.dataset_results
+
+Revision ID: d2a7f4c9e318
+Revises: c8e4a2d6f713
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a7f4c9e318'
+down_revision: Union[str, Sequence[str], None] = 'c8e4a2d6f713'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'case_datasets',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('test_case_id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(length=200), nullable=False),
+        sa.Column('format', sa.String(length=10), nullable=False),
+        sa.Column('columns', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('raw_size', sa.Integer(), nullable=False),
+        sa.Column('concurrency', sa.Integer(), nullable=True, server_default='5'),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['test_case_id'], ['test_cases.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('test_case_id'),
+    )
+    op.add_column(
+        'execution_details',
+        sa.Column('dataset_results', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('execution_details', 'dataset_results')
+    op.drop_table('case_datasets')
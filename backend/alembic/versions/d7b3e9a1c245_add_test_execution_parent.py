@@ -0,0 +1,32 @@
+"""add test_executions.parent_execution_id
+
+Revision ID: d7b3e9a1c245
+Revises: c4e1a7d2f901
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7b3e9a1c245'
+down_revision: Union[str, Sequence[str], None] = 'c4e1a7d2f901'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('test_executions', sa.Column('parent_execution_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_test_executions_parent_execution_id',
+        'test_executions', 'test_executions',
+        ['parent_execution_id'], ['id'],
+        ondelete='SET NULL',
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_test_executions_parent_execution_id', 'test_executions', type_='foreignkey')
+    op.drop_column('test_executions', 'parent_execution_id')
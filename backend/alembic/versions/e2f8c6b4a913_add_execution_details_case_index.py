@@ -0,0 +1,26 @@
+"""add index on execution_details.test_case_id
+
+Revision ID: e2f8c6b4a913
+Revises: d7b3e9a1c245
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2f8c6b4a913'
+down_revision: Union[str, Sequence[str], None] = 'd7b3e9a1c245'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 分片执行按用例查询历史耗时
+    op.create_index('ix_execution_details_test_case_id', 'execution_details', ['test_case_id', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_execution_details_test_case_id', table_name='execution_details')
@@ -0,0 +1,34 @@
+"""add test_executions.mode and summary
+
+Revision ID: f5a2d8c3b167
+Revises: e2f8c6b4a913
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5a2d8c3b167'
+down_revision: Union[str, Sequence[str], None] = 'e2f8c6b4a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'test_executions',
+        sa.Column('mode', sa.String(length=20), nullable=True, server_default='functional'),
+    )
+    op.add_column(
+        'test_executions',
+        sa.Column('summary', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('test_executions', 'summary')
+    op.drop_column('test_executions', 'mode')
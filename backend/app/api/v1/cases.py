@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, UploadFile, File, Form
 
 from app.api.deps import DBSession
 from app.services import case_service
 from app.schemas import (
     TestCaseCreate, TestCaseUpdate, TestCaseResponse,
     TestCaseListResponse, TestCaseDetailResponse,
-    AssertionCreate, AssertionUpdate, AssertionResponse,
+    AssertionCreate, AssertionUpdate, AssertionResponse, SnapshotBaselineUpdate,
     ExtractorCreate, ExtractorUpdate, ExtractorResponse,
+    CaseDatasetUpdate, CaseDatasetResponse,
 )
+from app.engine.dataset import preview_rows
 from app.core.response import success, paginate
 
 router = APIRouter(tags=["用例管理"])
@@ -90,6 +92,17 @@ async def delete_assertion(db: DBSession, assertion_id: int):
     return success(message="删除成功")
 
 
+@router.post("/assertions/{assertion_id}/snapshot")
+async def update_snapshot_baseline(
+    db: DBSession, assertion_id: int, data: SnapshotBaselineUpdate | None = None
+):
+    """用执行结果的响应体更新快照基线"""
+    assertion = await case_service.update_snapshot_baseline(
+        db, assertion_id, data.execution_detail_id if data else None
+    )
+    return success(data=AssertionResponse.model_validate(assertion))
+
+
 # ============ Extractor ============
 
 @router.post("/cases/{case_id}/extractors")
@@ -111,3 +124,49 @@ async def delete_extractor(db: DBSession, extractor_id: int):
     """删除提取器"""
     await case_service.delete_extractor(db, extractor_id)
     return success(message="删除成功")
+
+
+# ============ Dataset ============
+
+def _dataset_response(dataset, with_preview: bool = True) -> CaseDatasetResponse:
+    response = CaseDatasetResponse.model_validate(dataset)
+    response.compressed_size = len(dataset.data)
+    if with_preview:
+        response.preview = preview_rows(dataset.data)
+    return response
+
+
+@router.get("/cases/{case_id}/dataset")
+async def get_dataset(db: DBSession, case_id: int):
+    """获取用例的数据集（含前 20 行预览），未配置时返回 null"""
+    dataset = await case_service.get_dataset(db, case_id)
+    return success(data=_dataset_response(dataset) if dataset else None)
+
+
+@router.post("/cases/{case_id}/dataset")
+async def upload_dataset(
+    db: DBSession,
+    case_id: int,
+    file: UploadFile = File(..., description="CSV（首行为表头）或 JSON 对象数组 / NDJSON 文件"),
+    concurrency: int | None = Form(None, ge=1, le=100, description="行并发数"),
+):
+    """上传数据驱动的数据集，每行的字段作为 {{变量}} 参与渲染"""
+    content = await file.read()
+    dataset = await case_service.upload_dataset(
+        db, case_id, file.filename or "dataset", content, concurrency
+    )
+    return success(data=_dataset_response(dataset))
+
+
+@router.put("/cases/{case_id}/dataset")
+async def update_dataset(db: DBSession, case_id: int, data: CaseDatasetUpdate):
+    """更新数据集的行并发数"""
+    dataset = await case_service.update_dataset(db, case_id, data)
+    return success(data=_dataset_response(dataset, with_preview=False))
+
+
+@router.delete("/cases/{case_id}/dataset")
+async def delete_dataset(db: DBSession, case_id: int):
+    """删除数据集"""
+    await case_service.delete_dataset(db, case_id)
+    return success(message="删除成功")
@@ -9,6 +9,8 @@ from app.core.exceptions import NotFoundError
 from app.schemas.execution import (
     ExecuteCaseRequest,
     ExecuteSuiteRequest,
+    RerunFailedRequest,
+    LoadTestRequest,
     DebugExecuteRequest,
     DebugResponse,
     ExecutionDetailResponse,
@@ -57,6 +59,10 @@ async def execute_case(
         "assertion_results": detail.assertion_results or [],
         "extractor_results": detail.extractor_results or {},
         "error_message": detail.error_message or "",
+        "attempts": detail.attempts or [],
+        "timings": detail.timings or {},
+        "response_body_meta": detail.response_body_meta,
+        "dataset_results": detail.dataset_results,
         "executed_at": detail.executed_at.isoformat() if detail.executed_at else None,
     }
 
@@ -123,6 +129,9 @@ async def debug_execute(
         assertion_results=result.assertion_results,
         extractor_results=result.extractor_results,
         error_message=result.error_message,
+        attempts=result.attempts,
+        timings=result.timings,
+        response_body_meta=result.response_body_meta,
     )
 
     return success(data=response_data.model_dump())
@@ -175,7 +184,11 @@ async def execute_suite(
 
     # 调用 Celery 任务
     from celery_app.tasks.execution import execute_suite_task
-    execute_suite_task.delay(execution.id)
+    execute_suite_task.delay(
+        execution.id,
+        shard_count=request.shard_count,
+        recording_mode=request.recording_mode,
+    )
 
     return success(data={
         "execution_id": execution.id,
@@ -187,12 +200,71 @@ async def execute_suite(
     })
 
 
+@router.post("/load", response_model=ResponseModel)
+async def execute_load(
+    request: LoadTestRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    压测执行
+
+    用测试集或单个用例驱动多个并发虚拟用户，调用 Celery 任务异步执行，
+    结果以聚合统计保存在执行记录的 summary 中
+    """
+    from app.models.test_case import TestCase
+
+    if request.suite_id is not None:
+        suite = await db.get(TestSuite, request.suite_id)
+        if not suite:
+            raise NotFoundError(f"测试集不存在: {request.suite_id}")
+    else:
+        test_case = await db.get(TestCase, request.test_case_id)
+        if not test_case:
+            raise NotFoundError(f"用例不存在: {request.test_case_id}")
+
+    environment = await db.get(Environment, request.environment_id)
+    if not environment:
+        raise NotFoundError(f"环境不存在: {request.environment_id}")
+
+    execution = TestExecution(
+        suite_id=request.suite_id,
+        test_case_id=request.test_case_id,
+        environment_id=request.environment_id,
+        trigger_type="manual",
+        mode="load",
+        status="pending",
+        total_count=0,
+        passed_count=0,
+        failed_count=0,
+        skipped_count=0,
+    )
+    db.add(execution)
+    await db.commit()
+    await db.refresh(execution)
+
+    profile = request.model_dump(exclude={"suite_id", "test_case_id", "environment_id"})
+
+    # 调用 Celery 任务
+    from celery_app.tasks.execution import execute_load_task
+    execute_load_task.delay(execution.id, profile)
+
+    return success(data={
+        "execution_id": execution.id,
+        "suite_id": request.suite_id,
+        "test_case_id": request.test_case_id,
+        "environment_id": request.environment_id,
+        "status": execution.status,
+        "message": "压测任务已提交",
+    })
+
+
 @router.get("/executions", response_model=PaginationResponse)
 async def list_executions(
     project_id: int = Query(None, description="项目ID"),
     suite_id: int = Query(None, description="测试集ID"),
     trigger_type: str = Query(None, description="触发类型: manual/schedule/api"),
     status: str = Query(None, description="状态: pending/running/passed/failed/error"),
+    mode: str = Query(None, description="执行模式: functional/load"),
     start_date: str = Query(None, description="开始日期 YYYY-MM-DD"),
     end_date: str = Query(None, description="结束日期 YYYY-MM-DD"),
     page: int = Query(1, ge=1),
@@ -237,6 +309,10 @@ async def list_executions(
         stmt = stmt.where(TestExecution.status == status)
         count_stmt = count_stmt.where(TestExecution.status == status)
 
+    if mode:
+        stmt = stmt.where(TestExecution.mode == mode)
+        count_stmt = count_stmt.where(TestExecution.mode == mode)
+
     if start_date:
         try:
             start_dt = datetime.strptime(start_date, "%Y-%m-%d")
@@ -269,7 +345,9 @@ async def list_executions(
             "test_case_id": e.test_case_id,
             "environment_id": e.environment_id,
             "environment_name": e.environment.name if e.environment else None,
+            "parent_execution_id": e.parent_execution_id,
             "trigger_type": e.trigger_type,
+            "mode": e.mode,
             "status": e.status,
             "total_count": e.total_count,
             "passed_count": e.passed_count,
@@ -313,7 +391,9 @@ async def get_execution(
         "test_case_id": execution.test_case_id,
         "environment_id": execution.environment_id,
         "environment_name": execution.environment.name if execution.environment else None,
+        "parent_execution_id": execution.parent_execution_id,
         "trigger_type": execution.trigger_type,
+        "mode": execution.mode,
         "status": execution.status,
         "total_count": execution.total_count,
         "passed_count": execution.passed_count,
@@ -323,6 +403,7 @@ async def get_execution(
         "duration_ms": execution.duration_ms,
         "started_at": execution.started_at,
         "finished_at": execution.finished_at,
+        "summary": execution.summary,
         "created_at": execution.created_at,
     })
 
@@ -348,28 +429,7 @@ async def get_execution_details(
     if not execution:
         raise NotFoundError(f"执行记录不存在: {execution_id}")
 
-    details = [
-        {
-            "id": d.id,
-            "execution_id": d.execution_id,
-            "test_case_id": d.test_case_id,
-            "test_case_name": d.test_case.name if d.test_case else None,
-            "status": d.status,
-            "request_url": d.request_url,
-            "request_method": d.request_method,
-            "request_headers": d.request_headers,
-            "request_body": d.request_body,
-            "response_status_code": d.response_status_code,
-            "response_headers": d.response_headers,
-            "response_body": d.response_body,
-            "duration_ms": d.duration_ms,
-            "assertion_results": d.assertion_results or [],
-            "extractor_results": d.extractor_results or {},
-            "error_message": d.error_message,
-            "executed_at": d.executed_at,
-        }
-        for d in sorted(execution.details, key=lambda x: x.id)
-    ]
+    details = [_detail_to_dict(d) for d in sorted(execution.details, key=lambda x: x.id)]
 
     return success(data={
         "execution_id": execution_id,
@@ -379,3 +439,74 @@ async def get_execution_details(
         "error_count": sum(1 for d in details if d["status"] == "error"),
         "details": details,
     })
+
+
+@router.post("/executions/{execution_id}/rerun-failed", response_model=ResponseModel)
+async def rerun_failed(
+    execution_id: int,
+    request: RerunFailedRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    重跑失败用例
+
+    只重新执行原执行中 failed/error 的用例，创建关联原执行的新执行记录，
+    可选使用原执行提取的变量作为初始上下文
+    """
+    execution, case_ids, seed_vars = await execution_service.create_rerun_execution(
+        db=db,
+        execution_id=execution_id,
+        reuse_variables=request.reuse_variables,
+    )
+
+    # 调用 Celery 任务
+    from celery_app.tasks.execution import execute_suite_task
+    execute_suite_task.delay(execution.id, case_ids=case_ids, seed_vars=seed_vars)
+
+    return success(data={
+        "execution_id": execution.id,
+        "parent_execution_id": execution_id,
+        "suite_id": execution.suite_id,
+        "environment_id": execution.environment_id,
+        "status": execution.status,
+        "total_count": execution.total_count,
+        "message": "失败用例重跑任务已提交",
+    })
+
+
+@router.get("/executions/{execution_id}/merged", response_model=ResponseModel)
+async def get_merged_details(
+    execution_id: int,
+    db: AsyncSession = Depends(get_db),
+):
+    """获取重跑链的合并结果（每个用例取最近一次执行的明细）"""
+    merged = await execution_service.get_merged_details(db=db, execution_id=execution_id)
+    merged["details"] = [_detail_to_dict(d) for d in merged["details"]]
+    return success(data=merged)
+
+
+def _detail_to_dict(d: ExecutionDetail) -> dict:
+    """执行明细序列化"""
+    return {
+        "id": d.id,
+        "execution_id": d.execution_id,
+        "test_case_id": d.test_case_id,
+        "test_case_name": d.test_case.name if d.test_case else None,
+        "status": d.status,
+        "request_url": d.request_url,
+        "request_method": d.request_method,
+        "request_headers": d.request_headers,
+        "request_body": d.request_body,
+        "response_status_code": d.response_status_code,
+        "response_headers": d.response_headers,
+        "response_body": d.response_body,
+        "duration_ms": d.duration_ms,
+        "assertion_results": d.assertion_results or [],
+        "extractor_results": d.extractor_results or {},
+        "error_message": d.error_message,
+        "attempts": d.attempts or [],
+        "timings": d.timings or {},
+        "response_body_meta": d.response_body_meta,
+        "dataset_results": d.dataset_results,
+        "executed_at": d.executed_at,
+    }
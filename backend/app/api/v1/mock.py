@@ -0,0 +1,52 @@
+from datetime import datetime
+
+from fastapi import APIRouter
+
+from app.api.deps import DBSession
+from app.services import mock_service
+from app.schemas import MockServerStart, MockRouteResponse, MockServerResponse
+from app.core.response import success
+
+router = APIRouter(prefix="/projects/{project_id}/mock", tags=["Mock 服务"])
+
+
+def _server_response(project_id: int, state: dict) -> MockServerResponse:
+    return MockServerResponse(
+        project_id=project_id,
+        url=state["url"],
+        host=state["host"],
+        port=state["port"],
+        requests=state["requests"],
+        started_at=datetime.fromtimestamp(state["started_at"]) if state.get("started_at") else None,
+        routes=[MockRouteResponse.model_validate(route) for route in state["routes"]],
+    )
+
+
+@router.post("")
+async def start_mock(db: DBSession, project_id: int, data: MockServerStart | None = None):
+    """
+    启动项目的 mock 服务
+
+    按项目的启用用例生成路由，响应取用例最近一次执行的响应（通过的优先），
+    没有执行记录时使用快照基线或由断言生成。已在运行时只重新生成路由。
+    mock 服务运行在独立的 python -m app.mock 进程中，由本接口通过 Redis 下发启动。
+    """
+    data = data or MockServerStart()
+    state = await mock_service.start_mock(db, project_id, data.host, data.port)
+    return success(data=_server_response(project_id, state))
+
+
+@router.get("")
+async def get_mock(project_id: int):
+    """获取 mock 服务状态和路由命中次数（mock 进程每秒刷新），未启动时返回 null"""
+    state = await mock_service.get_mock(project_id)
+    if state is None:
+        return success(data=None)
+    return success(data=_server_response(project_id, state))
+
+
+@router.delete("")
+async def stop_mock(project_id: int):
+    """停止 mock 服务"""
+    await mock_service.stop_mock(project_id)
+    return success(message="已停止")
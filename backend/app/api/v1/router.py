@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1 import projects, modules, environments, cases, executions, suites, schedules, stats, import_export
+from app.api.v1 import projects, modules, environments, cases, executions, suites, schedules, stats, import_export, mock
 
 api_router = APIRouter(prefix="/api/v1")
 
@@ -13,3 +13,4 @@ api_router.include_router(suites.router)
 api_router.include_router(schedules.router)
 api_router.include_router(stats.router)
 api_router.include_router(import_export.router)
+api_router.include_router(mock.router)
@@ -19,6 +19,69 @@ class Settings(BaseSettings):
     celery_broker_url: str = "redis://localhost:6379/0"
     celery_result_backend: str = "redis://localhost:6379/1"
 
+    # Retry
+    retry_backoff_base: float = 0.5
+    retry_backoff_max: float = 10.0
+    retry_on_status_codes: list[int] = [502, 503, 504]
+    retry_on_assertion_failure: bool = False
+    retry_budget_ratio: float = 0.2  # 单次测试集执行的重试总数不超过用例数 * ratio
+    retry_budget_min: int = 3
+
+    # Parallel execution
+    suite_parallelism: int = 10  # parallel 模式测试集同时执行的用例数上限，环境的限流配置在此之外另行限制
+
+    # Sharding
+    suite_shard_count: int = 4  # sharded 模式测试集的默认分片数
+    suite_shard_history_size: int = 20  # 估算用例耗时取最近 N 次执行
+
+    # Recording（aggregate 记录模式 / 压测）
+    recording_success_sample_rate: float = 0.01  # 成功请求保留完整详情的抽样比例
+    recording_max_success_details: int = 100
+    recording_max_failure_details: int = 1000
+    recording_error_samples: int = 50
+
+    # Rate limiting（按主机/环境限流，具体限额在 Environment 上配置）
+    limiter_backend: str = "redis"  # redis: 跨 worker 共享限额；local: 仅进程内限流
+
+    # Circuit breaker（按目标主机熔断，进程内）
+    circuit_breaker_enabled: bool = True
+    circuit_breaker_threshold: int = 5  # 连续 N 次连接失败/超时后打开
+    circuit_breaker_cooldown: float = 30  # 打开后多久进入半开探测（秒）
+
+    # Response capture
+    response_max_capture_bytes: int = 2 * 1024 * 1024  # 内存中保留的响应体上限
+    response_overflow_mode: str = "truncate"  # truncate: 截断；spill: 完整响应体写入临时文件
+    response_spill_dir: str = ""  # 溢出文件目录，为空时使用系统临时目录
+    jsonpath_streaming_threshold: int = 256 * 1024  # 响应体超过该大小时简单 JSONPath 流式查找
+    response_max_parse_bytes: int = 50 * 1024 * 1024  # 完整解析 JSON（Schema、快照、非简单路径、后置脚本）的响应体上限
+
+    # HTTP record/replay（离线回放测试集，见 app.engine.recording）
+    http_record_mode: str = "off"  # off / record: 录制 / replay: 只回放，不访问网络 / auto: 优先回放，缺失时录制
+    http_record_path: str = "recordings/http.sqlite3"
+    http_record_ignore_fields: list[str] = []  # 不参与请求指纹的 query 参数和 body 字段，如 ["timestamp", "nonce"]
+
+    # Data-driven datasets
+    dataset_max_upload_bytes: int = 20 * 1024 * 1024  # 上传文件大小上限
+    dataset_max_rows: int = 100000
+    dataset_default_concurrency: int = 5  # 数据集行的默认并发数
+
+    # Scripts（用例前置/后置脚本）
+    script_sandbox: str = "process"  # process: 常驻沙箱子进程池，限制 CPU 时间和内存；inline: 当前进程内执行（仅 AST 限制）
+    script_pool_size: int = 4  # 每个进程的沙箱子进程数
+    script_cpu_time_ms: int = 1000  # 单次脚本的 CPU 时间上限
+    script_memory_mb: int = 256  # 沙箱子进程的内存上限（RLIMIT_AS）
+    script_timeout_seconds: float = 5  # 单次脚本的墙钟超时，超时后重启该子进程
+
+    # SQL instrumentation（按请求统计 SQL 条数和数据库耗时，见 app.core.instrumentation）
+    sql_instrumentation_enabled: bool = True
+    sql_slow_query_ms: float = 200  # 单条语句超过该耗时记录慢查询日志，0 表示不记录
+    sql_n_plus_one_threshold: int = 10  # 同一请求中同一语句执行超过 N 次时警告疑似 N+1，0 表示不检测
+
+    # Mock（由 python -m app.mock 进程运行，API 通过 Redis 下发启停，见 app.mock.manager）
+    mock_host: str = "127.0.0.1"  # 未指定监听地址时使用
+    mock_allow_public_host: bool = False  # 是否允许通过接口指定非回环的监听地址
+    mock_ports: str = ""  # 允许监听的端口范围，如 18000-18009，为空时不限制
+
     # SMTP (optional)
     smtp_host: str = ""
     smtp_port: int = 465
@@ -2,6 +2,7 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sess
 from sqlalchemy.orm import DeclarativeBase
 
 from app.config import settings
+from app.core.instrumentation import instrument_engine
 
 
 engine = create_async_engine(
@@ -11,6 +12,8 @@ engine = create_async_engine(
     pool_size=10,
     max_overflow=20,
 )
+if settings.sql_instrumentation_enabled:
+    instrument_engine(engine)
 
 async_session_factory = async_sessionmaker(
     engine,
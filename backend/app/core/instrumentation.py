@@ -0,0 +1,228 @@
+"""
+SQL 查询统计
+
+在 engine 上挂 before/after_cursor_execute 事件，统计当前请求执行的 SQL 条数、数据库耗时和最慢的语句：
+    - 调试模式（app_debug）下通过响应头返回：X-DB-Query-Count、X-DB-Time-Ms、X-DB-Slowest-Ms，
+      以及浏览器开发者工具可以直接展示的 Server-Timing
+    - 按路由累计到进程内的 query_metrics，由 /api/metrics/sql 查看
+    - 单条语句耗时超过 sql_slow_query_ms 时记录警告日志
+    - 同一请求中同一条语句（参数不同）执行超过 sql_n_plus_one_threshold 次时记录疑似 N+1 的警告
+
+请求上下文通过 ContextVar 传递（SQLAlchemy 在 greenlet 中执行 SQL 时沿用调用方的上下文），
+不在请求内执行的 SQL（如 Celery 任务、脚本）只做慢查询检查；脚本也可以用 track_queries() 自行统计。
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_STATEMENT_PREVIEW = 500
+
+_current: ContextVar["QueryStats | None"] = ContextVar("query_stats", default=None)
+
+
+def _preview(statement: str) -> str:
+    statement = " ".join(statement.split())
+    if len(statement) > _STATEMENT_PREVIEW:
+        return statement[:_STATEMENT_PREVIEW] + "..."
+    return statement
+
+
+@dataclass
+class QueryStats:
+    """一次请求内的 SQL 统计"""
+    count: int = 0
+    duration: float = 0.0  # 秒
+    slowest: float = 0.0
+    slowest_statement: str = ""
+    slow_count: int = 0
+    statements: dict = field(default_factory=dict)  # 语句 -> 执行次数
+
+    def record(self, statement: str, elapsed: float, slow: bool):
+        self.count += 1
+        self.duration += elapsed
+        if slow:
+            self.slow_count += 1
+        if elapsed > self.slowest:
+            self.slowest = elapsed
+            self.slowest_statement = statement
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def merge(self, other: "QueryStats"):
+        self.count += other.count
+        self.duration += other.duration
+        self.slow_count += other.slow_count
+        if other.slowest > self.slowest:
+            self.slowest = other.slowest
+            self.slowest_statement = other.slowest_statement
+        for statement, count in other.statements.items():
+            self.statements[statement] = self.statements.get(statement, 0) + count
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """执行次数超过 threshold 的语句，按次数降序"""
+        if threshold <= 0 or self.count <= threshold:
+            return []
+        items = [(s, n) for s, n in self.statements.items() if n > threshold]
+        return sorted(items, key=lambda item: item[1], reverse=True)
+
+    def headers(self) -> list[tuple[bytes, bytes]]:
+        db_ms = self.duration * 1000
+        return [
+            (b"x-db-query-count", str(self.count).encode()),
+            (b"x-db-time-ms", f"{db_ms:.1f}".encode()),
+            (b"x-db-slowest-ms", f"{self.slowest * 1000:.1f}".encode()),
+            (b"server-timing", f'db;dur={db_ms:.1f};desc="{self.count} queries"'.encode()),
+        ]
+
+
+@contextmanager
+def track_queries():
+    """在代码块内统计 SQL（同一上下文中执行的语句）；嵌套时内层的统计在退出时并入外层"""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        outer = _current.get()
+        if outer is not None:
+            outer.merge(stats)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    slow = settings.sql_slow_query_ms > 0 and elapsed * 1000 >= settings.sql_slow_query_ms
+    if slow:
+        logger.warning(f"慢查询 {elapsed * 1000:.1f}ms: {_preview(statement)}")
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed, slow)
+
+
+def _handle_error(exception_context):
+    # 语句执行失败时不会触发 after_cursor_execute，丢弃对应的开始时间
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def instrument_engine(engine):
+    """在 engine 上注册统计事件（AsyncEngine 注册到对应的同步 Engine），重复调用无效"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+class QueryMetrics:
+    """按路由累计的 SQL 统计（进程内，多个 worker 进程各自统计）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, method: str, path: str, stats: QueryStats, n_plus_one: bool):
+        with self._lock:
+            entry = self._routes.get((method, path))
+            if entry is None:
+                entry = self._routes[(method, path)] = {
+                    "method": method,
+                    "path": path,
+                    "requests": 0,
+                    "queries": 0,
+                    "max_queries": 0,
+                    "db_ms": 0.0,
+                    "max_db_ms": 0.0,
+                    "slow_queries": 0,
+                    "n_plus_one": 0,
+                    "slowest_ms": 0.0,
+                    "slowest_statement": "",
+                }
+            db_ms = stats.duration * 1000
+            entry["requests"] += 1
+            entry["queries"] += stats.count
+            entry["max_queries"] = max(entry["max_queries"], stats.count)
+            entry["db_ms"] += db_ms
+            entry["max_db_ms"] = max(entry["max_db_ms"], db_ms)
+            entry["slow_queries"] += stats.slow_count
+            entry["n_plus_one"] += int(n_plus_one)
+            if stats.slowest * 1000 > entry["slowest_ms"]:
+                entry["slowest_ms"] = stats.slowest * 1000
+                entry["slowest_statement"] = _preview(stats.slowest_statement)
+
+    def snapshot(self) -> list[dict]:
+        """按累计 SQL 条数降序"""
+        with self._lock:
+            entries = [dict(entry) for entry in self._routes.values()]
+        for entry in entries:
+            entry["avg_queries"] = round(entry["queries"] / entry["requests"], 2)
+            entry["avg_db_ms"] = round(entry["db_ms"] / entry["requests"], 2)
+            entry["db_ms"] = round(entry["db_ms"], 2)
+            entry["max_db_ms"] = round(entry["max_db_ms"], 2)
+            entry["slowest_ms"] = round(entry["slowest_ms"], 2)
+        return sorted(entries, key=lambda entry: entry["queries"], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+query_metrics = QueryMetrics()
+
+
+class QueryStatsMiddleware:
+    """
+    按请求统计 SQL 的 ASGI 中间件
+
+    Args:
+        debug_headers: 是否在响应头中返回统计，默认取 app_debug
+    """
+
+    def __init__(self, app, debug_headers: bool = None):
+        self.app = app
+        self.debug_headers = settings.app_debug if debug_headers is None else debug_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            # 响应头只包含发出前执行的语句；之后的语句（如 get_db 清理时提交事务）只计入 query_metrics
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", ()), *stats.headers()]}
+            await send(message)
+
+        with track_queries() as stats:
+            try:
+                await self.app(scope, receive, send_with_headers if self.debug_headers else send)
+            finally:
+                self._finish(scope, stats)
+
+    @staticmethod
+    def _finish(scope: dict, stats: QueryStats):
+        # 路由匹配后 scope 中有 route，按路由模板而不是实际路径汇总
+        route = scope.get("route")
+        path = getattr(route, "path", None) or scope["path"]
+        method = scope["method"]
+
+        repeated = stats.repeated(settings.sql_n_plus_one_threshold)
+        for statement, count in repeated[:3]:
+            logger.warning(f"疑似 N+1 查询: {method} {path} 同一语句执行 {count} 次: {_preview(statement)}")
+        if stats.count or route is not None:
+            query_metrics.record(method, path, stats, bool(repeated))
@@ -3,6 +3,9 @@ from app.engine.http_client import HttpClient, HttpResponse
 from app.engine.extractor import ExtractorEngine, ExtractResult
 from app.engine.assertion import AssertionEngine, AssertionResult
 from app.engine.executor import TestExecutor, ExecutionResult
+from app.engine.retry import RetryPolicy, RetryBudget
+from app.engine.load import LoadProfile, LoadRunner
+from app.engine.aggregator import ResultAggregator, RecordingConfig
 
 __all__ = [
     "VariableEngine",
@@ -14,4 +17,10 @@ __all__ = [
     "AssertionResult",
     "TestExecutor",
     "ExecutionResult",
+    "RetryPolicy",
+    "RetryBudget",
+    "LoadProfile",
+    "LoadRunner",
+    "ResultAggregator",
+    "RecordingConfig",
 ]
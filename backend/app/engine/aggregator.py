@@ -0,0 +1,323 @@
+import math
+import random
+from dataclasses import dataclass
+
+from app.config import settings
+
+
+class LatencyHistogram:
+    """
+    对数分桶的延迟直方图
+
+    相对精度 precision（默认 1%），桶数只与取值范围有关，与样本数无关，
+    0.01ms ~ 1h 范围内最多约 2000 个桶。
+    """
+
+    MIN_VALUE = 0.01  # ms，小于该值的样本计入第 0 个桶
+
+    def __init__(self, precision: float = 0.01):
+        self.precision = precision
+        self._log_base = math.log1p(precision)
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def _index(self, value: float) -> int:
+        if value <= self.MIN_VALUE:
+            return 0
+        return int(math.log(value / self.MIN_VALUE) / self._log_base) + 1
+
+    def _value(self, index: int) -> float:
+        """桶的代表值（桶区间中点）"""
+        if index == 0:
+            return self.MIN_VALUE
+        lower = self.MIN_VALUE * math.exp((index - 1) * self._log_base)
+        return lower * (1 + self.precision / 2)
+
+    def record(self, value: float):
+        index = self._index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self._value(index), self.max)
+        return self.max
+
+    def merge(self, other: "LatencyHistogram"):
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def summary(self, percentiles=(50, 90, 95, 99)) -> dict:
+        return {
+            "min": round(self.min or 0, 2),
+            "max": round(self.max or 0, 2),
+            "mean": round(self.total / self.count, 2) if self.count else 0,
+            **{f"p{p}": round(self.percentile(p), 2) for p in percentiles},
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "precision": self.precision,
+            "buckets": {str(k): v for k, v in self.buckets.items()},
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        histogram = cls(precision=data.get("precision", 0.01))
+        histogram.buckets = {int(k): v for k, v in data.get("buckets", {}).items()}
+        histogram.count = data.get("count", 0)
+        histogram.total = data.get("total", 0.0)
+        histogram.min = data.get("min")
+        histogram.max = data.get("max")
+        return histogram
+
+
+class Reservoir:
+    """蓄水池抽样（Algorithm R），保留固定数量的均匀样本"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.samples = []
+        self.seen = 0
+
+    def add(self, item):
+        self.seen += 1
+        if len(self.samples) < self.capacity:
+            self.samples.append(item)
+        else:
+            index = random.randrange(self.seen)
+            if index < self.capacity:
+                self.samples[index] = item
+
+    def merge(self, other: "Reservoir"):
+        """合并两个蓄水池（按各自见过的样本数加权，近似均匀）"""
+        total = self.seen + other.seen
+        if not total:
+            return
+        merged = []
+        mine, theirs = list(self.samples), list(other.samples)
+        random.shuffle(mine)
+        random.shuffle(theirs)
+        while len(merged) < self.capacity and (mine or theirs):
+            pick_mine = mine and (not theirs or random.random() < self.seen / total)
+            merged.append(mine.pop() if pick_mine else theirs.pop())
+        self.samples = merged
+        self.seen = total
+
+
+@dataclass
+class RecordingConfig:
+    """结果记录配置"""
+    success_sample_rate: float = 0.01  # 成功请求保留完整详情的抽样比例
+    max_success_details: int = 100  # 成功请求最多保留的详情条数
+    max_failure_details: int = 1000  # 失败/错误请求最多保留的详情条数
+    error_samples: int = 50  # 错误信息蓄水池容量
+    histogram_precision: float = 0.01
+
+
+def failure_reason(result) -> str:
+    """获取执行结果的失败原因（错误信息或第一条失败断言）"""
+    if result.error_message:
+        return result.error_message
+    for assertion in result.assertion_results or []:
+        if not assertion.get("passed"):
+            return assertion.get("message", "")
+    return ""
+
+
+def default_recording_config() -> RecordingConfig:
+    """根据全局配置构建结果记录配置"""
+    return RecordingConfig(
+        success_sample_rate=settings.recording_success_sample_rate,
+        max_success_details=settings.recording_max_success_details,
+        max_failure_details=settings.recording_max_failure_details,
+        error_samples=settings.recording_error_samples,
+    )
+
+
+class ResultAggregator:
+    """
+    流式结果聚合器
+
+    按状态、状态码、用例累计计数与延迟直方图，错误信息蓄水池抽样；
+    完整详情只保留失败请求和少量抽样的成功请求，内存和数据库写入都有上限。
+    """
+
+    def __init__(self, config: RecordingConfig = None):
+        self.config = config or default_recording_config()
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = 0
+        self.status_codes = {}
+        self.latency = LatencyHistogram(self.config.histogram_precision)
+        self.error_samples = Reservoir(self.config.error_samples)
+        self.per_case = {}
+        self.kept_successes = 0
+        self.kept_failures = 0
+
+    def record(
+        self,
+        case_key: str,
+        latency_ms: float,
+        status: str,
+        status_code: int = 0,
+        error: str = "",
+    ) -> bool:
+        """
+        记录一次请求
+
+        Returns:
+            是否需要保留该请求的完整详情
+        """
+        self.total += 1
+        if status == "passed":
+            self.passed += 1
+        elif status == "failed":
+            self.failed += 1
+        else:
+            self.errors += 1
+        code = str(status_code or 0)
+        self.status_codes[code] = self.status_codes.get(code, 0) + 1
+        self.latency.record(latency_ms)
+        if error:
+            self.error_samples.add({"case": case_key, "error": error[:500]})
+
+        case = self.per_case.get(case_key)
+        if case is None:
+            case = self.per_case[case_key] = {
+                "total": 0,
+                "failed": 0,
+                "errors": 0,
+                "latency": LatencyHistogram(self.config.histogram_precision),
+            }
+        case["total"] += 1
+        if status == "failed":
+            case["failed"] += 1
+        elif status == "error":
+            case["errors"] += 1
+        case["latency"].record(latency_ms)
+
+        return self._keep_detail(status)
+
+    def _keep_detail(self, status: str) -> bool:
+        if status != "passed":
+            if self.kept_failures < self.config.max_failure_details:
+                self.kept_failures += 1
+                return True
+            return False
+        if (
+            self.kept_successes < self.config.max_success_details
+            and random.random() < self.config.success_sample_rate
+        ):
+            self.kept_successes += 1
+            return True
+        return False
+
+    def merge(self, other: "ResultAggregator"):
+        """合并另一个聚合器（分片执行汇总时使用）"""
+        self.total += other.total
+        self.passed += other.passed
+        self.failed += other.failed
+        self.errors += other.errors
+        for code, count in other.status_codes.items():
+            self.status_codes[code] = self.status_codes.get(code, 0) + count
+        self.latency.merge(other.latency)
+        self.error_samples.merge(other.error_samples)
+        for key, other_case in other.per_case.items():
+            case = self.per_case.get(key)
+            if case is None:
+                self.per_case[key] = other_case
+                continue
+            case["total"] += other_case["total"]
+            case["failed"] += other_case["failed"]
+            case["errors"] += other_case["errors"]
+            case["latency"].merge(other_case["latency"])
+        self.kept_successes += other.kept_successes
+        self.kept_failures += other.kept_failures
+
+    def summary(self, elapsed_seconds: float = None) -> dict:
+        """汇总统计结果"""
+        data = {
+            "total_requests": self.total,
+            "passed": self.passed,
+            "failed": self.failed,
+            "errors": self.errors,
+            "error_rate": round((self.failed + self.errors) / self.total, 4) if self.total else 0,
+            "latency_ms": self.latency.summary(),
+            "status_codes": dict(sorted(self.status_codes.items())),
+            "error_samples": self.error_samples.samples,
+            "error_samples_seen": self.error_samples.seen,
+            "kept_details": {"passed": self.kept_successes, "failed": self.kept_failures},
+            "cases": {
+                key: {
+                    "total": case["total"],
+                    "failed": case["failed"],
+                    "errors": case["errors"],
+                    "latency_ms": case["latency"].summary(),
+                }
+                for key, case in self.per_case.items()
+            },
+        }
+        if elapsed_seconds is not None:
+            data["elapsed_seconds"] = round(elapsed_seconds, 3)
+            data["throughput_rps"] = round(self.total / elapsed_seconds, 2) if elapsed_seconds > 0 else 0
+        return data
+
+    def to_dict(self) -> dict:
+        """序列化完整状态（可跨进程传递后 from_dict 合并）"""
+        return {
+            "total": self.total,
+            "passed": self.passed,
+            "failed": self.failed,
+            "errors": self.errors,
+            "status_codes": self.status_codes,
+            "latency": self.latency.to_dict(),
+            "error_samples": {"samples": self.error_samples.samples, "seen": self.error_samples.seen},
+            "per_case": {
+                key: {**case, "latency": case["latency"].to_dict()}
+                for key, case in self.per_case.items()
+            },
+            "kept_successes": self.kept_successes,
+            "kept_failures": self.kept_failures,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, config: RecordingConfig = None) -> "ResultAggregator":
+        aggregator = cls(config)
+        aggregator.total = data.get("total", 0)
+        aggregator.passed = data.get("passed", 0)
+        aggregator.failed = data.get("failed", 0)
+        aggregator.errors = data.get("errors", 0)
+        aggregator.status_codes = dict(data.get("status_codes", {}))
+        aggregator.latency = LatencyHistogram.from_dict(data.get("latency", {}))
+        aggregator.error_samples.samples = list(data.get("error_samples", {}).get("samples", []))
+        aggregator.error_samples.seen = data.get("error_samples", {}).get("seen", 0)
+        aggregator.per_case = {
+            key: {**case, "latency": LatencyHistogram.from_dict(case["latency"])}
+            for key, case in data.get("per_case", {}).items()
+        }
+        aggregator.kept_successes = data.get("kept_successes", 0)
+        aggregator.kept_failures = data.get("kept_failures", 0)
+        return aggregator
@@ -1,8 +1,11 @@
-import re
+import json
 from dataclasses import dataclass
-from jsonpath_ng import parse as jsonpath_parse
 
+from app.engine.expectation import STRING, Expectation, compile_expectation
 from app.engine.http_client import HttpResponse
+from app.engine.jsonpath import compile_path
+from app.engine.schema_validator import schema_validators, validate as validate_schema
+from app.engine import snapshot
 
 
 @dataclass
@@ -18,21 +21,7 @@ class AssertionResult:
 class AssertionEngine:
     """断言引擎"""
 
-    # 支持的操作符
-    OPERATORS = {
-        "eq": lambda a, e: str(a) == str(e),
-        "ne": lambda a, e: str(a) != str(e),
-        "gt": lambda a, e: float(a) > float(e),
-        "lt": lambda a, e: float(a) < float(e),
-        "gte": lambda a, e: float(a) >= float(e),
-        "lte": lambda a, e: float(a) <= float(e),
-        "contains": lambda a, e: str(e) in str(a),
-        "not_contains": lambda a, e: str(e) not in str(a),
-        "regex": lambda a, e: bool(re.search(str(e), str(a))),
-        "is_null": lambda a, e: a is None or str(a) == "",
-        "is_not_null": lambda a, e: a is not None and str(a) != "",
-    }
-
+    # 比较操作符的实现见 app.engine.expectation，期望值按操作符编译一次后缓存
     OPERATOR_NAMES = {
         "eq": "等于",
         "ne": "不等于",
@@ -45,6 +34,26 @@ class AssertionEngine:
         "regex": "匹配正则",
         "is_null": "为空",
         "is_not_null": "不为空",
+        "all": "全部满足",
+        "any": "任一满足",
+        "none": "全部不满足",
+        "count_eq": "数量等于",
+        "sorted_by": "有序",
+        "unique": "唯一",
+    }
+
+    # 量词操作符：对 JSONPath 的所有匹配值整体求值
+    # all/any/none 的期望值为 "操作符 期望值"，如 "gt 0"、"is_not_null"
+    # count_eq 的期望值为数量；sorted_by 为 "[字段] [asc|desc]"；unique 为可选的字段
+    QUANTIFIERS = {"all", "any", "none", "count_eq", "sorted_by", "unique"}
+
+    # 全部为数值时用 min/max 一次求出 all/any，不逐个调用比较函数
+    # 值为 (all 成立时取的端点, any 成立时取的端点)
+    _NUMERIC_BOUNDS = {
+        "gt": (min, max),
+        "gte": (min, max),
+        "lt": (max, min),
+        "lte": (max, min),
     }
 
     def assert_one(
@@ -55,6 +64,7 @@ class AssertionEngine:
         expression: str,
         operator: str,
         expected_value: str,
+        expectation: Expectation = None,
     ) -> AssertionResult:
         """
         执行单个断言
@@ -62,21 +72,49 @@ class AssertionEngine:
         Args:
             response: HTTP 响应对象
             name: 断言名称
-            assertion_type: 断言类型 (status_code/json_path/header/response_time/contains)
+            assertion_type: 断言类型 (status_code/json_path/header/response_time/contains/json_schema/snapshot)
             expression: 表达式
             operator: 操作符
             expected_value: 期望值
+            expectation: 已编译的期望值（见 compile），为空时按 operator 和 expected_value 编译
 
         Returns:
             AssertionResult 对象
         """
         try:
+            if assertion_type == "json_schema":
+                return self._assert_json_schema(response, name, expression, expected_value)
+            if assertion_type == "snapshot":
+                return self._assert_snapshot(response, name, expression, expected_value)
+            if operator in self.QUANTIFIERS:
+                return self._assert_quantifier(
+                    response, name, assertion_type, expression, operator, expected_value
+                )
+
             # 获取实际值
             actual_value = self._get_actual_value(response, assertion_type, expression)
+            if actual_value is None and assertion_type == "json_path" and response.json_error:
+                return AssertionResult(
+                    name=name,
+                    passed=False,
+                    actual_value="",
+                    expected_value=expected_value or "",
+                    message=f"断言失败: {response.json_error}",
+                )
 
             # 执行比较
-            op_func = self.OPERATORS.get(operator)
-            if not op_func:
+            if expectation is None:
+                try:
+                    expectation = compile_expectation(operator, expected_value)
+                except ValueError as e:
+                    return AssertionResult(
+                        name=name,
+                        passed=False,
+                        actual_value=str(actual_value),
+                        expected_value=expected_value,
+                        message=f"比较失败: {str(e)}",
+                    )
+            if expectation is None:
                 return AssertionResult(
                     name=name,
                     passed=False,
@@ -86,7 +124,7 @@ class AssertionEngine:
                 )
 
             try:
-                passed = op_func(actual_value, expected_value)
+                passed = expectation.test(actual_value)
             except (ValueError, TypeError) as e:
                 return AssertionResult(
                     name=name,
@@ -119,13 +157,336 @@ class AssertionEngine:
                 message=f"断言执行错误: {str(e)}",
             )
 
+    def _assert_json_schema(
+        self,
+        response: HttpResponse,
+        name: str,
+        expression: str,
+        schema_text: str,
+    ) -> AssertionResult:
+        """
+        JSON Schema 校验（忽略操作符）
+
+        Args:
+            expression: 可选的 JSONPath，只校验该节点；为空时校验整个响应体
+            schema_text: 保存在 expected_value 中的 Schema
+        """
+
+        def result(passed: bool, message: str, actual_value: str = "") -> AssertionResult:
+            return AssertionResult(
+                name=name,
+                passed=passed,
+                actual_value=actual_value,
+                expected_value="JSON Schema",
+                message=message,
+            )
+
+        if not schema_text:
+            return result(False, "断言执行错误: 未配置 JSON Schema")
+        try:
+            validator = schema_validators.get(schema_text)
+        except ImportError:
+            return result(False, "断言执行错误: 未安装 jsonschema")
+        except ValueError as e:
+            return result(False, f"断言执行错误: {str(e)}")
+
+        if expression and expression != "$":
+            found = response.find_json_paths([expression])
+            if expression not in found:
+                return result(False, f"断言失败: 未找到节点 {expression}")
+            instance = found[expression]
+        else:
+            instance = response.json
+            if instance is None and response.json_error:
+                return result(False, f"断言失败: {response.json_error}")
+            if instance is None and (response.body or "").strip() != "null":
+                return result(False, "断言失败: 响应体不是合法的 JSON")
+
+        error_count, errors = validate_schema(validator, instance, root=expression or "$")
+        if not error_count:
+            return result(True, "断言通过: 符合 JSON Schema")
+
+        more = f"; ...等 {error_count} 处" if error_count > len(errors) else ""
+        return result(
+            False,
+            f"断言失败: 不符合 JSON Schema: {'; '.join(errors)}{more}",
+            actual_value=f"{error_count} 处不符合",
+        )
+
+    def _assert_snapshot(
+        self,
+        response: HttpResponse,
+        name: str,
+        expression: str,
+        baseline_text: str,
+    ) -> AssertionResult:
+        """
+        快照比对（忽略操作符）
+
+        Args:
+            expression: 忽略路径，逗号或换行分隔，如 $.data.created_at, $..request_id
+            baseline_text: 保存在 expected_value 中的基线（规范化的紧凑 JSON）
+        """
+
+        def result(passed: bool, message: str, actual_value: str = "") -> AssertionResult:
+            return AssertionResult(
+                name=name,
+                passed=passed,
+                actual_value=actual_value,
+                expected_value=f"快照 {len(baseline_text or '')} 字节",
+                message=message,
+            )
+
+        if not baseline_text:
+            return result(False, "断言失败: 未设置基线，请先从执行结果更新基线")
+        try:
+            ignore = snapshot.parse_ignore_paths(expression)
+        except ValueError as e:
+            return result(False, f"断言执行错误: {str(e)}")
+
+        actual = response.json
+        if actual is None and response.json_error:
+            return result(False, f"断言失败: {response.json_error}")
+        if actual is None and (response.body or "").strip() != "null":
+            return result(False, "断言失败: 响应体不是合法的 JSON")
+
+        try:
+            diff_count, diffs = snapshot.compare(baseline_text, actual, ignore)
+        except ValueError as e:
+            return result(False, f"断言执行错误: {str(e)}")
+        if not diff_count:
+            return result(True, "断言通过: 与基线一致")
+
+        more = f"; ...等 {diff_count} 处" if diff_count > len(diffs) else ""
+        return result(
+            False,
+            f"断言失败: 与基线不一致: {'; '.join(map(snapshot.format_diff, diffs))}{more}",
+            actual_value=f"{diff_count} 处差异",
+        )
+
+    def _assert_quantifier(
+        self,
+        response: HttpResponse,
+        name: str,
+        assertion_type: str,
+        expression: str,
+        operator: str,
+        expected_value: str,
+    ) -> AssertionResult:
+        """
+        量词断言
+
+        json_path 断言取表达式的所有匹配值；只匹配到一个数组时对数组元素求值。
+        其他断言类型把实际值视为单元素列表。
+        """
+        if assertion_type == "json_path":
+            values = response.find_json_path_values(expression)
+            if not values and response.json_error:
+                return AssertionResult(
+                    name=name,
+                    passed=False,
+                    actual_value="",
+                    expected_value=expected_value or "",
+                    message=f"断言失败: {response.json_error}",
+                )
+        else:
+            actual = self._get_actual_value(response, assertion_type, expression)
+            values = [] if actual is None else [actual]
+        if len(values) == 1 and isinstance(values[0], list):
+            values = values[0]
+
+        expected_value = (expected_value or "").strip()
+        if operator == "count_eq":
+            passed, message = self._count_eq(values, expected_value)
+        elif operator == "sorted_by":
+            passed, message = self._sorted_by(values, expected_value)
+        elif operator == "unique":
+            passed, message = self._unique(values, expected_value)
+        else:
+            passed, message = self._quantify(operator, values, expected_value)
+
+        return AssertionResult(
+            name=name,
+            passed=passed,
+            actual_value=str(len(values)) if operator == "count_eq" else f"{len(values)} 个元素",
+            expected_value=expected_value,
+            message=message,
+        )
+
+    def _quantify(self, quantifier: str, values: list, condition: str) -> tuple[bool, str]:
+        """all/any/none"""
+        operator, _, expected = condition.partition(" ")
+        expected = expected.strip()
+        try:
+            expectation = compile_expectation(operator, expected)
+        except ValueError as e:
+            return False, f"比较失败: {str(e)}"
+        if expectation is None:
+            return False, f"不支持的条件: {condition}，应为 \"操作符 期望值\"，如 \"gt 0\""
+        condition_text = f"{self.OPERATOR_NAMES[operator]} {expected}".rstrip()
+
+        def holds(value) -> bool:
+            try:
+                return expectation.test(value)
+            except (ValueError, TypeError):
+                return False
+
+        bulk = self._bulk_quantify(expectation, values)
+        if bulk is not None:
+            all_hold, any_hold = bulk
+        elif quantifier == "all":
+            all_hold, any_hold = all(map(holds, values)), None
+        else:
+            all_hold, any_hold = None, any(map(holds, values))
+
+        total = len(values)
+        if quantifier == "all":
+            # 路径写错时匹配为空，不按空真处理；断言空数组请用 count_eq 0
+            if not total:
+                return False, "断言失败: 未匹配到任何元素"
+            if all_hold:
+                return True, f"断言通过: 全部 {total} 个元素{condition_text}"
+            failed = [i for i, value in enumerate(values) if not holds(value)]
+            first = failed[0]
+            return False, (
+                f"断言失败: {len(failed)}/{total} 个元素不满足{condition_text}，"
+                f"如 [{first}] = {self._format(values[first])}"
+            )
+
+        if quantifier == "any":
+            if any_hold:
+                return True, f"断言通过: {total} 个元素中存在{condition_text}"
+            return False, f"断言失败: {total} 个元素均不满足{condition_text}"
+
+        if not any_hold:
+            return True, f"断言通过: {total} 个元素均不满足{condition_text}"
+        matched = [i for i, value in enumerate(values) if holds(value)]
+        first = matched[0]
+        return False, (
+            f"断言失败: {len(matched)}/{total} 个元素满足{condition_text}，"
+            f"如 [{first}] = {self._format(values[first])}"
+        )
+
+    def _bulk_quantify(self, expectation, values: list):
+        """
+        同类型数组的整体比较，结果与逐个比较一致
+
+        Returns:
+            (是否全部满足, 是否存在满足)；不适用时返回 None
+        """
+        if not values:
+            return None
+        types = set(map(type, values))
+
+        operator = expectation.operator
+        bounds = self._NUMERIC_BOUNDS.get(operator)
+        if bounds is not None and types <= {int, float}:
+            all_bound, any_bound = bounds
+            return expectation.test(all_bound(values)), expectation.test(any_bound(values))
+
+        # 期望值为普通字符串时逐个比较就是字符串相等，可以直接在列表上计数
+        if operator in ("eq", "ne") and expectation.kind == STRING and types == {str}:
+            count = values.count(expectation.text)
+            if operator == "eq":
+                return count == len(values), count > 0
+            return count == 0, count < len(values)
+        return None
+
+    @staticmethod
+    def _count_eq(values: list, expected: str) -> tuple[bool, str]:
+        try:
+            expected_count = int(expected)
+        except ValueError:
+            return False, f"期望数量不是整数: {expected}"
+        if len(values) == expected_count:
+            return True, f"断言通过: 匹配数量 {len(values)} 等于 {expected_count}"
+        return False, f"断言失败: 匹配数量 [{len(values)}] 等于 期望值 [{expected_count}]"
+
+    def _sorted_by(self, values: list, expected: str) -> tuple[bool, str]:
+        """按元素本身或元素的字段（支持 a.b 形式）检查是否有序，相等视为有序"""
+        parts = expected.split()
+        descending = False
+        if parts and parts[-1].lower() in ("asc", "desc"):
+            descending = parts.pop().lower() == "desc"
+        field = parts[0] if parts else ""
+        order = "降序" if descending else "升序"
+        target = f"按 {field} " if field else ""
+
+        if field:
+            keys = []
+            for i, value in enumerate(values):
+                key = self._get_field(value, field)
+                if key is None:
+                    return False, f"断言失败: 元素 [{i}] 缺少字段 {field}"
+                keys.append(key)
+        else:
+            keys = values
+
+        try:
+            if keys == sorted(keys, reverse=descending):
+                return True, f"断言通过: {len(keys)} 个元素{target}{order}排列"
+        except TypeError:
+            return False, f"断言失败: 元素类型不一致，无法比较: {', '.join(sorted({type(k).__name__ for k in keys}))}"
+
+        for i in range(len(keys) - 1):
+            a, b = keys[i], keys[i + 1]
+            if (a < b) if descending else (a > b):
+                return False, (
+                    f"断言失败: 元素 [{i}] = {self._format(a)} 与 [{i + 1}] = {self._format(b)} "
+                    f"不满足{target}{order}"
+                )
+        return False, f"断言失败: 元素未{target}{order}排列"
+
+    def _unique(self, values: list, field: str) -> tuple[bool, str]:
+        """检查元素（或元素的字段）互不重复"""
+        seen = {}
+        for i, value in enumerate(values):
+            if field:
+                value = self._get_field(value, field)
+            # 容器按规范化 JSON 比较；布尔值与 1/0 区分开
+            if isinstance(value, (dict, list)):
+                key = json.dumps(value, sort_keys=True, ensure_ascii=False)
+            elif isinstance(value, bool):
+                key = (bool, value)
+            else:
+                key = value
+            if key in seen:
+                return False, f"断言失败: 元素 [{i}] 与 [{seen[key]}] 重复: {self._format(value)}"
+            seen[key] = i
+        target = f"的 {field} " if field else ""
+        return True, f"断言通过: {len(values)} 个元素{target}互不重复"
+
+    @staticmethod
+    def _get_field(value, field: str):
+        for part in field.split("."):
+            if not isinstance(value, dict):
+                return None
+            value = value.get(part)
+        return value
+
+    @staticmethod
+    def _format(value) -> str:
+        if isinstance(value, (dict, list)):
+            text = json.dumps(value, ensure_ascii=False)
+        else:
+            text = str(value)
+        return text if len(text) <= 100 else text[:100] + "..."
+
     def _get_actual_value(self, response: HttpResponse, assertion_type: str, expression: str):
         """获取断言的实际值"""
         if assertion_type == "status_code":
             return response.status_code
 
         elif assertion_type == "response_time":
-            return response.duration_ms
+            # 表达式可指定阶段：connect/tls/send/ttfb/download/queue/total，为空时取总耗时
+            phase = (expression or "").strip().lower()
+            if not phase:
+                return response.duration_ms
+            timings = response.timings or {}
+            key = phase if phase.endswith("_ms") else f"{phase}_ms"
+            if key not in timings:
+                raise ValueError(f"不支持的耗时阶段: {expression}")
+            return timings[key]
 
         elif assertion_type == "header":
             for key, value in response.headers.items():
@@ -134,18 +495,7 @@ class AssertionEngine:
             return None
 
         elif assertion_type == "json_path":
-            json_data = response.json
-            if json_data is None:
-                return None
-
-            try:
-                jsonpath_expr = jsonpath_parse(expression)
-                matches = jsonpath_expr.find(json_data)
-                if matches:
-                    return matches[0].value
-                return None
-            except Exception:
-                return None
+            return response.find_json_paths([expression]).get(expression)
 
         elif assertion_type == "contains":
             return response.body
@@ -153,6 +503,40 @@ class AssertionEngine:
         else:
             return None
 
+    def compile(self, assertion: dict) -> Expectation | None:
+        """
+        编译比较断言的期望值
+
+        Returns:
+            json_schema/snapshot/量词断言，以及期望值不合法时返回 None（由 assert_one 给出错误信息）
+        """
+        operator = assertion.get("operator", "eq")
+        if assertion.get("type") in ("json_schema", "snapshot") or operator in self.QUANTIFIERS:
+            return None
+        try:
+            return compile_expectation(operator, assertion.get("expected_value", ""))
+        except ValueError:
+            return None
+
+    def prefetch_paths(self, assertions: list) -> list[str]:
+        """
+        可以合并到一次批量查找中的 JSONPath
+
+        量词断言需要所有匹配值，非简单路径（通配符、过滤器等）的所有匹配值单独求值，
+        不参与只取第一个匹配值的批量查找，避免同一路径在文档上求值两次
+        """
+        paths = []
+        for assertion in assertions:
+            if assertion.get("type") != "json_path":
+                continue
+            expression = assertion.get("expression") or ""
+            if assertion.get("operator", "eq") in self.QUANTIFIERS:
+                compiled = compile_path(expression)
+                if compiled is None or not compiled.is_simple:
+                    continue
+            paths.append(expression)
+        return paths
+
     def assert_all(self, response: HttpResponse, assertions: list) -> list[AssertionResult]:
         """
         执行所有断言
@@ -164,6 +548,11 @@ class AssertionEngine:
         Returns:
             AssertionResult 列表
         """
+        # 一次查找所有 JSONPath（结果缓存在 response 上）
+        paths = self.prefetch_paths(assertions)
+        if paths:
+            response.find_json_paths(paths)
+
         results = []
         for assertion in assertions:
             result = self.assert_one(
@@ -173,6 +562,7 @@ class AssertionEngine:
                 expression=assertion.get("expression", ""),
                 operator=assertion.get("operator", "eq"),
                 expected_value=assertion.get("expected_value", ""),
+                expectation=self.compile(assertion),
             )
             results.append(result)
 
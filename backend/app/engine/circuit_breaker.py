@@ -0,0 +1,87 @@
+import time
+from urllib.parse import urlsplit
+
+from app.config import settings
+
+
+class CircuitBreaker:
+    """
+    单个主机的熔断器
+
+    closed: 正常放行，连续 failure_threshold 次连接失败/超时后打开
+    open: 直接拒绝请求，cooldown_seconds 后进入半开
+    half_open: 只放行一个探测请求，成功则关闭，失败则重新打开
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, cooldown_seconds: float = 30):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        """是否放行本次请求"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.cooldown_seconds:
+                return False
+            self.state = self.HALF_OPEN
+        # 半开状态同一时间只放行一个探测请求
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self):
+        """请求被取消时释放半开探测名额"""
+        self._probing = False
+
+    @property
+    def retry_after(self) -> float:
+        """距离下次探测的剩余秒数"""
+        if self.state != self.OPEN:
+            return 0
+        return max(0.0, self.cooldown_seconds - (time.monotonic() - self.opened_at))
+
+
+class CircuitBreakerRegistry:
+    """按目标主机维护熔断器（进程内）"""
+
+    def __init__(self, failure_threshold: int = 5, cooldown_seconds: float = 30):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._breakers = {}
+
+    def get(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc.lower()
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(
+                self.failure_threshold, self.cooldown_seconds
+            )
+        return breaker
+
+
+circuit_breakers = CircuitBreakerRegistry(
+    failure_threshold=settings.circuit_breaker_threshold,
+    cooldown_seconds=settings.circuit_breaker_cooldown,
+)
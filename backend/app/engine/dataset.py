@@ -0,0 +1,220 @@
+"""
+数据驱动测试的数据集
+
+上传的 CSV/JSON 统一转换为 NDJSON（每行一个 JSON 对象）后用 zlib 压缩保存，
+执行时边解压边逐行解析，不会把整份数据集展开到内存；每行的字段作为变量参与渲染。
+"""
+import codecs
+import csv
+import io
+import json
+import zlib
+from dataclasses import dataclass
+
+from app.engine.aggregator import LatencyHistogram, failure_reason
+
+# 解压时每次读取的压缩数据块大小
+_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class PackedDataset:
+    """压缩后的数据集"""
+    data: bytes
+    columns: list
+    row_count: int
+    raw_size: int  # 未压缩的 NDJSON 字节数
+
+
+def _csv_rows(content: bytes):
+    text = io.TextIOWrapper(io.BytesIO(content), encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    if not reader.fieldnames:
+        raise ValueError("CSV 缺少表头")
+    for line, row in enumerate(reader, start=2):
+        if None in row:
+            raise ValueError(f"CSV 第 {line} 行的列数多于表头")
+        yield row
+
+
+def _json_rows(content: bytes):
+    text = content.decode("utf-8-sig").strip()
+    if text.startswith("["):
+        rows = json.loads(text)
+    else:
+        # NDJSON：每行一个对象
+        rows = (json.loads(line) for line in text.splitlines() if line.strip())
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise ValueError(f"第 {index + 1} 行不是 JSON 对象")
+        yield row
+
+
+def pack_dataset(content: bytes, data_format: str, max_rows: int) -> PackedDataset:
+    """
+    解析上传的文件并压缩
+
+    Args:
+        data_format: csv/json（json 支持对象数组或 NDJSON）
+
+    Raises:
+        ValueError: 文件格式错误、为空或超出行数上限
+    """
+    if data_format == "csv":
+        rows = _csv_rows(content)
+    elif data_format == "json":
+        rows = _json_rows(content)
+    else:
+        raise ValueError(f"不支持的数据集格式: {data_format}")
+
+    compressor = zlib.compressobj(6)
+    chunks = []
+    columns = {}
+    row_count = 0
+    raw_size = 0
+    try:
+        for row in rows:
+            row_count += 1
+            if row_count > max_rows:
+                raise ValueError(f"数据集超过 {max_rows} 行")
+            for column in row:
+                columns.setdefault(column, None)
+            line = json.dumps(row, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+            raw_size += len(line)
+            chunks.append(compressor.compress(line))
+    except (UnicodeDecodeError, json.JSONDecodeError, csv.Error) as e:
+        raise ValueError(f"文件解析失败: {e}")
+    if not row_count:
+        raise ValueError("数据集为空")
+    chunks.append(compressor.flush())
+
+    return PackedDataset(
+        data=b"".join(chunks),
+        columns=list(columns),
+        row_count=row_count,
+        raw_size=raw_size,
+    )
+
+
+def dataset_config(dataset) -> dict | None:
+    """CaseDataset 转为执行器使用的数据集配置，未配置数据集时返回 None"""
+    if dataset is None:
+        return None
+    return {
+        "data": dataset.data,
+        "row_count": dataset.row_count,
+        "concurrency": dataset.concurrency or 1,
+    }
+
+
+def iter_rows(data: bytes):
+    """逐行解压数据集，生成 (行号, 行数据)，行号从 0 开始"""
+    decompressor = zlib.decompressobj()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    index = 0
+    for offset in range(0, len(data), _CHUNK_SIZE):
+        pending += decoder.decode(decompressor.decompress(data[offset:offset + _CHUNK_SIZE]))
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            if line:
+                yield index, json.loads(line)
+                index += 1
+    pending += decoder.decode(decompressor.flush(), final=True)
+    for line in pending.split("\n"):
+        if line:
+            yield index, json.loads(line)
+            index += 1
+
+
+def preview_rows(data: bytes, limit: int = 20) -> list[dict]:
+    """数据集的前 limit 行"""
+    rows = []
+    for _, row in iter_rows(data):
+        if len(rows) >= limit:
+            break
+        rows.append(row)
+    return rows
+
+
+class DatasetResult:
+    """
+    数据集执行结果聚合
+
+    每行的状态压缩为一个字符（p/f/e）拼成字符串，失败行保留少量明细；
+    完整的请求/响应只保留行号最小的失败行（全部通过时为第 0 行），作为执行详情展示。
+    """
+
+    STATUS_CODES = {"passed": "p", "failed": "f", "error": "e"}
+
+    def __init__(self, row_count: int, max_failures: int = 100):
+        self.row_count = row_count
+        self.max_failures = max_failures
+        self.statuses = bytearray(b"-" * row_count)
+        self.counts = {"passed": 0, "failed": 0, "error": 0}
+        self.status_codes = {}
+        self.latency = LatencyHistogram()
+        self.failures = []
+        self.representative = None
+        self._representative_row = None
+
+    def record(self, index: int, row: dict, result):
+        """记录一行的执行结果"""
+        status = result.status if result.status in self.counts else "error"
+        self.counts[status] += 1
+        if index >= len(self.statuses):
+            self.statuses.extend(b"-" * (index + 1 - len(self.statuses)))
+        self.statuses[index] = ord(self.STATUS_CODES[status])
+        code = str(result.response_status_code or 0)
+        self.status_codes[code] = self.status_codes.get(code, 0) + 1
+        self.latency.record(result.duration_ms)
+
+        if status != "passed":
+            self.failures.append({
+                "row": index,
+                "status": status,
+                "status_code": result.response_status_code,
+                "duration_ms": result.duration_ms,
+                "message": failure_reason(result)[:500],
+                "data": row,
+            })
+            # 并发执行时完成顺序不固定，保留行号最小的若干条
+            if len(self.failures) > self.max_failures:
+                self.failures.sort(key=lambda f: f["row"])
+                self.failures.pop()
+
+        if self._is_better_representative(index, status):
+            self.representative = result
+            self._representative_row = index
+
+    def _is_better_representative(self, index: int, status: str) -> bool:
+        if self.representative is None:
+            return True
+        current_passed = self.representative.status == "passed"
+        if status != "passed":
+            return current_passed or index < self._representative_row
+        return current_passed and index < self._representative_row
+
+    @property
+    def status(self) -> str:
+        """全部通过为 passed，全部出错为 error，否则为 failed"""
+        if self.counts["failed"] == 0 and self.counts["error"] == 0:
+            return "passed"
+        if self.counts["error"] == sum(self.counts.values()):
+            return "error"
+        return "failed"
+
+    def summary(self, elapsed_ms: int) -> dict:
+        total = sum(self.counts.values())
+        return {
+            "total": total,
+            "passed": self.counts["passed"],
+            "failed": self.counts["failed"],
+            "errors": self.counts["error"],
+            "representative_row": self._representative_row,
+            "elapsed_ms": elapsed_ms,
+            "latency_ms": self.latency.summary(),
+            "status_codes": dict(sorted(self.status_codes.items())),
+            "statuses": self.statuses.decode("ascii"),
+            "failures": sorted(self.failures, key=lambda f: f["row"]),
+        }
@@ -1,9 +1,20 @@
+import asyncio
+import copy
+import dataclasses
+import json
+import time
 from dataclasses import dataclass, field
 
+import httpx
+
 from app.engine.variable import VariableEngine
 from app.engine.http_client import HttpClient, HttpResponse
 from app.engine.extractor import ExtractorEngine
 from app.engine.assertion import AssertionEngine, AssertionResult
+from app.engine.retry import RetryPolicy, RetryBudget, default_retry_policy
+from app.engine.dataset import DatasetResult, iter_rows
+from app.engine.script import ScriptError, run_script
+from app.engine.recording import create_transport
 
 
 @dataclass
@@ -17,19 +28,25 @@ class ExecutionResult:
     response_status_code: int = 0
     response_headers: dict = field(default_factory=dict)
     response_body: str = ""
+    response_body_meta: dict = None  # 响应体超出采集上限时的长度、sha256 等信息
     duration_ms: int = 0
+    timings: dict = field(default_factory=dict)  # 分阶段耗时（ms）
     assertion_results: list = field(default_factory=list)
     extractor_results: dict = field(default_factory=dict)
     error_message: str = ""
+    error_type: str = ""  # 请求错误类型，见 HttpResponse.error_type；脚本错误为 script
+    attempts: list = field(default_factory=list)  # 每次尝试的记录（含重试）
+    dataset_results: dict = None  # 数据驱动执行时按行汇总的结果，见 DatasetResult
 
 
 class TestExecutor:
     """测试用例执行器"""
 
-    def __init__(self):
-        self.http_client = HttpClient()
+    def __init__(self, retry_policy: RetryPolicy = None, http_client: HttpClient = None):
+        self.http_client = http_client or HttpClient()
         self.extractor_engine = ExtractorEngine()
         self.assertion_engine = AssertionEngine()
+        self.retry_policy = retry_policy or default_retry_policy()
 
     async def execute(
         self,
@@ -37,23 +54,204 @@ class TestExecutor:
         test_case: dict,
         env_vars: dict = None,
         extracted_vars: dict = None,
+        retry_budget: RetryBudget = None,
     ) -> ExecutionResult:
         """
-        执行单个测试用例
+        执行单个测试用例（按 retry_count 重试）
 
         Args:
             base_url: 环境基础 URL
             test_case: 测试用例配置
             env_vars: 环境变量
             extracted_vars: 已提取的变量（用于用例间传递）
+            retry_budget: 测试集级别的重试预算，None 表示不限制
 
         Returns:
-            ExecutionResult 对象
+            ExecutionResult 对象，attempts 记录每次尝试的耗时和结果
         """
+        max_retries = max(0, test_case.get("retry_count") or 0)
+        attempts = []
+        backoff_ms = 0
+        attempt = 0
+
+        while True:
+            attempt += 1
+            started = time.perf_counter()
+            result = await self._execute_once(base_url, test_case, env_vars, extracted_vars)
+            attempts.append({
+                "attempt": attempt,
+                "status": result.status,
+                "response_status_code": result.response_status_code,
+                "duration_ms": result.duration_ms,
+                "elapsed_ms": int((time.perf_counter() - started) * 1000),
+                "backoff_ms": backoff_ms,
+                "error_message": result.error_message,
+                "error_type": result.error_type,
+            })
+
+            if attempt > max_retries or not self.retry_policy.should_retry(result):
+                break
+            if retry_budget is not None and not retry_budget.acquire():
+                attempts[-1]["note"] = "重试预算已耗尽"
+                break
+
+            delay = self.retry_policy.backoff(attempt)
+            backoff_ms = int(delay * 1000)
+            await asyncio.sleep(delay)
+
+        result.attempts = attempts
+        return result
+
+    async def run_case(
+        self,
+        base_url: str,
+        test_case: dict,
+        env_vars: dict = None,
+        extracted_vars: dict = None,
+        retry_budget: RetryBudget = None,
+    ) -> ExecutionResult:
+        """执行用例：配置了数据集时逐行执行，否则执行一次"""
+        dataset = test_case.get("dataset")
+        if dataset:
+            return await self.execute_dataset(
+                base_url, test_case, dataset, env_vars, extracted_vars, retry_budget
+            )
+        return await self.execute(base_url, test_case, env_vars, extracted_vars, retry_budget)
+
+    async def execute_dataset(
+        self,
+        base_url: str,
+        test_case: dict,
+        dataset: dict,
+        env_vars: dict = None,
+        extracted_vars: dict = None,
+        retry_budget: RetryBudget = None,
+    ) -> ExecutionResult:
+        """
+        按数据集逐行执行用例
+
+        数据集边解压边生成行，由 concurrency 个协程从同一个行迭代器取数据执行，
+        内存中只有正在执行的行；每行的字段覆盖同名的环境变量和已提取变量。
+
+        Args:
+            dataset: {"data": 压缩的 NDJSON, "row_count": 行数, "concurrency": 并发数}
+
+        Returns:
+            代表行（行号最小的失败行，全部通过时为第 0 行）的 ExecutionResult，
+            dataset_results 为按行汇总的结果
+        """
+        aggregate = DatasetResult(dataset.get("row_count") or 0)
+        rows = iter_rows(dataset["data"])
+        concurrency = max(1, dataset.get("concurrency") or 1)
+        started = time.perf_counter()
+
+        runner = self
+        client = None
+        if self.http_client.client is None:
+            # 各行共享一个连接池，避免每个请求都新建客户端（及 TLS 上下文）
+            limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+            client = httpx.AsyncClient(limits=limits, transport=create_transport(limits))
+            http_client = copy.copy(self.http_client)
+            http_client.client = client
+            runner = TestExecutor(retry_policy=self.retry_policy, http_client=http_client)
+
+        async def worker():
+            for index, row in rows:
+                result = await runner.execute(
+                    base_url,
+                    test_case,
+                    env_vars=env_vars,
+                    extracted_vars={**(extracted_vars or {}), **row},
+                    retry_budget=retry_budget,
+                )
+                aggregate.record(index, row, result)
+
+        try:
+            # 一个协程出错（如数据集行损坏）时取消其余协程，等它们退出后再关闭共享的客户端
+            async with asyncio.TaskGroup() as group:
+                for _ in range(concurrency):
+                    group.create_task(worker())
+        except ExceptionGroup as eg:
+            e = eg.exceptions[0]
+            return ExecutionResult(status="error", error_message=f"数据集读取失败: {str(e)}")
+        finally:
+            if client is not None:
+                await client.aclose()
+
+        result = aggregate.representative or ExecutionResult(status="error", error_message="数据集为空")
+        result.status = aggregate.status
+        result.dataset_results = aggregate.summary(int((time.perf_counter() - started) * 1000))
+        return result
+
+    @staticmethod
+    def _apply_response_changes(response: HttpResponse, changes: dict) -> HttpResponse:
+        """按后置脚本的修改生成新的响应（修改了 json 而没有修改 body 时重新序列化）"""
+        fields = {}
+        if "status_code" in changes:
+            fields["status_code"] = int(changes["status_code"])
+        if "headers" in changes:
+            fields["headers"] = dict(changes["headers"] or {})
+        if "body" in changes:
+            fields["body"] = "" if changes["body"] is None else str(changes["body"])
+        elif "json" in changes:
+            fields["body"] = json.dumps(changes["json"], ensure_ascii=False)
+        if not fields:
+            return response
+        if "body" in fields:
+            # 响应体已被替换，原有的溢出文件和截断信息不再适用
+            response.close()
+            fields.update(spill_path=None, body_meta=None)
+        return dataclasses.replace(response, **fields)
+
+    @staticmethod
+    def _render_expected(assertion: dict, var_engine: VariableEngine):
+        """期望值中的 {{变量}}（如数据集的列）按当前上下文替换，快照基线保持原样"""
+        expected = assertion.get("expected_value", "")
+        if assertion.get("type") == "snapshot" or not expected or "{{" not in expected:
+            return expected
+        return var_engine.render(expected)
+
+    async def _execute_once(
+        self,
+        base_url: str,
+        test_case: dict,
+        env_vars: dict = None,
+        extracted_vars: dict = None,
+    ) -> ExecutionResult:
+        """执行一次测试用例（不重试）"""
         # 初始化变量引擎
         var_engine = VariableEngine(env_vars=env_vars, extracted_vars=extracted_vars)
+        response = None
+        script_vars = {}  # 脚本设置的变量，与提取结果一起传递给后续用例
 
         try:
+            # 0. 前置脚本：渲染变量前修改变量和请求
+            pre_script = test_case.get("pre_script")
+            if pre_script and pre_script.strip():
+                try:
+                    changes = await run_script(pre_script, {
+                        "vars": var_engine.context,
+                        "request": {
+                            "method": test_case.get("method", "GET"),
+                            "path": test_case.get("path", ""),
+                            "headers": test_case.get("headers") or {},
+                            "params": test_case.get("params") or {},
+                            "body_type": test_case.get("body_type", "none"),
+                            "body_content": test_case.get("body_content") or "",
+                        },
+                    })
+                except ScriptError as e:
+                    return ExecutionResult(
+                        status="error",
+                        request_method=test_case.get("method", "GET"),
+                        error_message=f"前置脚本执行失败: {e}",
+                        error_type="script",
+                    )
+                script_vars.update(changes.get("vars", {}))
+                var_engine.update(changes.get("vars", {}))
+                if changes.get("request"):
+                    test_case = {**test_case, **changes["request"]}
+
             # 1. 变量替换
             url = self._build_url(base_url, test_case.get("path", ""), var_engine)
             method = test_case.get("method", "GET")
@@ -68,7 +266,6 @@ class TestExecutor:
                 body_content = var_engine.render(test_case.get("body_content", ""))
 
             # 2. 发送 HTTP 请求
-            self.http_client.timeout = test_case.get("timeout", 30)
             response = await self.http_client.request(
                 method=method,
                 url=url,
@@ -76,6 +273,7 @@ class TestExecutor:
                 params=params,
                 body_type=body_type,
                 body_content=body_content,
+                timeout=test_case.get("timeout", 30),
             )
 
             # 检查请求错误
@@ -87,9 +285,42 @@ class TestExecutor:
                     request_headers=headers,
                     request_body=body_content or "",
                     duration_ms=response.duration_ms,
+                    timings=response.timings or {},
                     error_message=response.error,
+                    error_type=response.error_type or "",
                 )
 
+            # 后置脚本：断言和提取前修改响应和变量
+            script_error = None
+            post_script = test_case.get("post_script")
+            if post_script and post_script.strip():
+                try:
+                    changes = await run_script(post_script, {
+                        "vars": var_engine.context,
+                        "response": {
+                            "status_code": response.status_code,
+                            "headers": response.headers,
+                            "body": response.body,
+                            "json": response.json,
+                        },
+                    })
+                except ScriptError as e:
+                    script_error = e
+                else:
+                    script_vars.update(changes.get("vars", {}))
+                    var_engine.update(changes.get("vars", {}))
+                    if changes.get("response"):
+                        response = self._apply_response_changes(response, changes["response"])
+
+            # 同一响应上的所有 JSONPath（提取器 + 断言）合并成一次查找，结果缓存在 response 上
+            json_paths = [
+                e.get("expression") or ""
+                for e in test_case.get("extractors", [])
+                if e.get("source", "body") == "body" and (e.get("expression") or "").startswith("$")
+            ] + self.assertion_engine.prefetch_paths(test_case.get("assertions", []))
+            if json_paths:
+                response.find_json_paths(json_paths)
+
             # 3. 执行提取器
             extractors = test_case.get("extractors", [])
             extractor_results = {}
@@ -104,6 +335,8 @@ class TestExecutor:
                     for e in extractors
                 ]
                 extractor_results = self.extractor_engine.extract_all(response, extractor_configs)
+            if script_vars:
+                extractor_results = {**script_vars, **extractor_results}
 
             # 4. 执行断言
             assertions = test_case.get("assertions", [])
@@ -115,15 +348,39 @@ class TestExecutor:
                         "type": a.get("type", ""),
                         "expression": a.get("expression", ""),
                         "operator": a.get("operator", "eq"),
-                        "expected_value": a.get("expected_value", ""),
+                        "expected_value": self._render_expected(a, var_engine),
                     }
                     for a in assertions
                 ]
                 assertion_results = self.assertion_engine.assert_all(response, assertion_configs)
 
+            assertion_results = [
+                {
+                    "name": r.name,
+                    "passed": r.passed,
+                    "actual_value": r.actual_value,
+                    "expected_value": r.expected_value,
+                    "message": r.message,
+                }
+                for r in assertion_results
+            ]
+            error_message = ""
+            if script_error is not None and script_error.error_type == "assertion":
+                assertion_results.append({
+                    "name": "后置脚本",
+                    "passed": False,
+                    "actual_value": None,
+                    "expected_value": None,
+                    "message": f"后置脚本断言失败: {script_error}",
+                })
+            elif script_error is not None:
+                error_message = f"后置脚本执行失败: {script_error}"
+
             # 5. 判断最终状态
-            all_passed = all(r.passed for r in assertion_results) if assertion_results else True
+            all_passed = all(r["passed"] for r in assertion_results) if assertion_results else True
             status = "passed" if all_passed else "failed"
+            if error_message:
+                status = "error"
 
             return ExecutionResult(
                 status=status,
@@ -134,18 +391,13 @@ class TestExecutor:
                 response_status_code=response.status_code,
                 response_headers=response.headers,
                 response_body=response.body,
+                response_body_meta=response.body_meta,
                 duration_ms=response.duration_ms,
-                assertion_results=[
-                    {
-                        "name": r.name,
-                        "passed": r.passed,
-                        "actual_value": r.actual_value,
-                        "expected_value": r.expected_value,
-                        "message": r.message,
-                    }
-                    for r in assertion_results
-                ],
+                timings=response.timings or {},
+                assertion_results=assertion_results,
                 extractor_results=extractor_results,
+                error_message=error_message,
+                error_type="script" if error_message else "",
             )
 
         except Exception as e:
@@ -154,6 +406,11 @@ class TestExecutor:
                 error_message=f"执行异常: {str(e)}",
             )
 
+        finally:
+            # 断言和提取完成后删除溢出文件
+            if response is not None:
+                response.close()
+
     def _build_url(self, base_url: str, path: str, var_engine: VariableEngine) -> str:
         """构建完整 URL"""
         # 替换路径中的变量
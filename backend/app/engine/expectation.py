@@ -0,0 +1,203 @@
+"""
+断言期望值编译
+
+期望值在第一次使用时按字面量解析为类型化的值（数字、布尔、null、字符串、JSON 对象/数组），
+与操作符一起编译为比较函数并缓存，之后每次执行只做一次比较，不再重复 str()/float() 转换。
+
+eq/ne 按类型比较：期望值为数字时 "1" 与 1.0 相等，为布尔/null 时匹配对应的 JSON 值；
+类型不相容时退回原有的字符串比较，用双引号包裹的期望值（如 "\"1\""）只按字符串比较。
+"""
+import json
+import re
+
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?P<frac>\.\d+)?(?P<exp>[eE][+-]?\d+)?")
+
+_NUMERIC = frozenset((int, float))
+
+NUMBER = "number"
+BOOL = "bool"
+NULL = "null"
+STRING = "string"
+QUOTED = "quoted"
+JSON = "json"
+
+
+def parse_number(text: str):
+    """JSON 数字字面量转为 int/float，不是数字时返回 None"""
+    m = _NUMBER.fullmatch(text)
+    if not m:
+        return None
+    if m.group("frac") or m.group("exp"):
+        return float(text)
+    return int(text)
+
+
+def parse_literal(text: str | None) -> tuple[str, object]:
+    """
+    解析期望值字面量
+
+    Returns:
+        (类型, 值)
+    """
+    if text is None:
+        return NULL, None
+    stripped = text.strip()
+    number = parse_number(stripped)
+    if number is not None:
+        return NUMBER, number
+    if stripped in ("true", "false"):
+        return BOOL, stripped == "true"
+    if stripped == "null":
+        return NULL, None
+    if len(stripped) >= 2 and stripped[0] == stripped[-1] == '"':
+        try:
+            return QUOTED, json.loads(stripped)
+        except json.JSONDecodeError:
+            pass
+    if stripped[:1] in ("{", "["):
+        try:
+            return JSON, json.loads(stripped)
+        except json.JSONDecodeError:
+            pass
+    return STRING, text
+
+
+def _compile_eq(text: str):
+    kind, value = parse_literal(text)
+    text = "" if text is None else text
+
+    if kind == NUMBER:
+        def test(actual) -> bool:
+            t = type(actual)
+            if t in _NUMERIC:
+                return actual == value
+            if t is str:
+                if actual == text:
+                    return True
+                try:
+                    return float(actual) == value
+                except ValueError:
+                    return False
+            return str(actual) == text
+
+    elif kind == BOOL:
+        lowered = text.strip().lower()
+
+        def test(actual) -> bool:
+            if type(actual) is bool:
+                return actual is value
+            if type(actual) is str:
+                return actual.strip().lower() == lowered
+            return str(actual) == text
+
+    elif kind == NULL:
+        def test(actual) -> bool:
+            return actual is None or str(actual) == text
+
+    elif kind == QUOTED:
+        def test(actual) -> bool:
+            return type(actual) is str and actual == value
+
+    elif kind == JSON:
+        def test(actual) -> bool:
+            if isinstance(actual, (dict, list)):
+                return actual == value
+            return str(actual) == text
+
+    else:
+        def test(actual) -> bool:
+            return (actual if type(actual) is str else str(actual)) == text
+
+    return kind, value, test
+
+
+def _compile_numeric(operator: str, text: str):
+    try:
+        value = float(text)
+    except (TypeError, ValueError):
+        raise ValueError(f"期望值不是数字: {text}")
+
+    # int/float 直接与 float 比较，结果与先转 float 一致；其他类型按原有语义转换
+    if operator == "gt":
+        test = lambda actual: (actual if type(actual) in _NUMERIC else float(actual)) > value
+    elif operator == "lt":
+        test = lambda actual: (actual if type(actual) in _NUMERIC else float(actual)) < value
+    elif operator == "gte":
+        test = lambda actual: (actual if type(actual) in _NUMERIC else float(actual)) >= value
+    else:
+        test = lambda actual: (actual if type(actual) in _NUMERIC else float(actual)) <= value
+    return NUMBER, value, test
+
+
+class Expectation:
+    """编译后的期望值，test(实际值) 返回是否满足"""
+
+    __slots__ = ("operator", "text", "kind", "value", "test")
+
+    def __init__(self, operator: str, text: str | None):
+        self.operator = operator
+        self.text = text
+
+        if operator in ("eq", "ne"):
+            kind, value, eq = _compile_eq(text)
+            test = eq if operator == "eq" else (lambda actual: not eq(actual))
+        elif operator in ("gt", "lt", "gte", "lte"):
+            kind, value, test = _compile_numeric(operator, text)
+        elif operator in ("contains", "not_contains"):
+            kind, value = STRING, str(text)
+            if operator == "contains":
+                test = lambda actual: value in (actual if type(actual) is str else str(actual))
+            else:
+                test = lambda actual: value not in (actual if type(actual) is str else str(actual))
+        elif operator == "regex":
+            try:
+                pattern = re.compile(str(text))
+            except re.error as e:
+                raise ValueError(f"正则表达式不合法: {e}")
+            kind, value = STRING, pattern
+            test = lambda actual: pattern.search(actual if type(actual) is str else str(actual)) is not None
+        elif operator == "is_null":
+            kind, value = NULL, None
+            test = lambda actual: actual is None or str(actual) == ""
+        elif operator == "is_not_null":
+            kind, value = NULL, None
+            test = lambda actual: actual is not None and str(actual) != ""
+        else:
+            raise ValueError(f"不支持的操作符: {operator}")
+
+        self.kind = kind
+        self.value = value
+        self.test = test
+
+
+OPERATORS = frozenset((
+    "eq", "ne", "gt", "lt", "gte", "lte",
+    "contains", "not_contains", "regex", "is_null", "is_not_null",
+))
+
+# 比较本身只有几百纳秒，用两级 dict（操作符 -> 期望值文本）缓存，查找开销比 lru_cache 小；
+# 超过上限时整体清空
+_CACHE_SIZE = 4096
+_cache = {operator: {} for operator in OPERATORS}
+
+
+def compile_expectation(operator: str, text: str | None) -> Expectation | None:
+    """
+    获取编译后的期望值（按操作符和期望值文本缓存）
+
+    Returns:
+        不支持的操作符返回 None
+
+    Raises:
+        ValueError: 期望值与操作符不匹配（如 gt 的期望值不是数字、正则不合法）
+    """
+    cache = _cache.get(operator)
+    if cache is None:
+        return None
+    expectation = cache.get(text)
+    if expectation is None:
+        expectation = Expectation(operator, text)
+        if len(cache) >= _CACHE_SIZE:
+            cache.clear()
+        cache[text] = expectation
+    return expectation
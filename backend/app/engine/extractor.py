@@ -1,6 +1,5 @@
 import re
 from dataclasses import dataclass
-from jsonpath_ng import parse as jsonpath_parse
 
 from app.engine.http_client import HttpResponse
 
@@ -78,19 +77,8 @@ class ExtractorEngine:
 
         # 尝试 JSONPath 提取
         if expression.startswith("$"):
-            json_data = response.json
-            if json_data is None:
-                return None
-
-            try:
-                jsonpath_expr = jsonpath_parse(expression)
-                matches = jsonpath_expr.find(json_data)
-                if matches:
-                    value = matches[0].value
-                    return str(value) if value is not None else None
-                return None
-            except Exception:
-                return None
+            value = response.find_json_paths([expression]).get(expression)
+            return str(value) if value is not None else None
 
         # 正则表达式提取
         if expression.startswith("/") and expression.endswith("/"):
@@ -136,6 +124,15 @@ class ExtractorEngine:
         Returns:
             提取结果字典 {variable_name: value}
         """
+        # 一次查找所有 JSONPath（结果缓存在 response 上）
+        paths = [
+            ext.get("expression", "")
+            for ext in extractors
+            if ext.get("source", "body") == "body" and ext.get("expression", "").startswith("$")
+        ]
+        if paths and response.body:
+            response.find_json_paths(paths)
+
         results = {}
         for ext in extractors:
             result = self.extract(
@@ -1,9 +1,22 @@
+import os
+import mmap
 import time
 import json
-from dataclasses import dataclass
+import hashlib
+import tempfile
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
 
 import httpx
 
+from app.config import settings
+from app.engine.circuit_breaker import CircuitBreakerRegistry, circuit_breakers
+from app.engine.jsonpath import StreamingJsonPath, parse_streamable_path, find_in_document, compile_path
+from app.engine.limiter import LimitConfig, limiter_registry
+from app.engine.recording import ReplayMissError, create_transport
+
+_NOT_FOUND = object()
+
 
 @dataclass
 class HttpResponse:
@@ -14,21 +27,287 @@ class HttpResponse:
     cookies: dict
     duration_ms: int
     error: str = None
+    error_type: str = None  # timeout/connect/request/unknown/circuit_open/replay_miss
+    timings: dict = None  # 分阶段耗时（ms），见 RequestTrace.timings
+    body_meta: dict = None  # 响应体超出采集上限时的元信息，见 BodyCapture.meta
+    spill_path: str = None  # 溢出到磁盘的完整响应体文件
+    json_error: str = field(default=None, init=False, repr=False, compare=False)  # 拒绝完整解析的原因
+    _jsonpath_cache: dict = field(default=None, init=False, repr=False, compare=False)
+    _jsonpath_values_cache: dict = field(default=None, init=False, repr=False, compare=False)
+    _json_value: object = field(default=_NOT_FOUND, init=False, repr=False, compare=False)
 
     @property
     def json(self):
-        """解析 JSON 响应"""
-        try:
-            return json.loads(self.body)
-        except (json.JSONDecodeError, TypeError):
+        """
+        解析 JSON 响应（响应体溢出到磁盘时从文件解析完整内容），只解析一次
+
+        响应体超过 response_max_parse_bytes 时不解析，返回 None 并在 json_error 中记录原因；
+        反序列化后的对象通常是原文的数倍大小
+        """
+        if self._json_value is _NOT_FOUND:
+            size = self._body_size()
+            if size > settings.response_max_parse_bytes:
+                self.json_error = (
+                    f"响应体过大（{size} 字节），超过完整解析上限 {settings.response_max_parse_bytes} 字节"
+                )
+                self._json_value = None
+                return None
+            try:
+                if self.spill_path:
+                    with open(self.spill_path, "rb") as f:
+                        self._json_value = json.load(f)
+                else:
+                    self._json_value = json.loads(self.body)
+            except (json.JSONDecodeError, UnicodeDecodeError, OSError, TypeError):
+                self._json_value = None
+        return self._json_value
+
+    def _body_size(self) -> int:
+        if self.spill_path:
+            try:
+                return os.path.getsize(self.spill_path)
+            except OSError:
+                return 0
+        return len(self.body or "")
+
+    def find_json_paths(self, expressions: list[str]) -> dict:
+        """
+        批量查找 JSONPath，结果按表达式缓存
+
+        Returns:
+            {表达式: 第一个匹配值}，未匹配的表达式不包含在结果中
+        """
+        if self._jsonpath_cache is None:
+            self._jsonpath_cache = {}
+        pending = [e for e in dict.fromkeys(expressions) if e not in self._jsonpath_cache]
+        if pending:
+            found = self._find_json_paths(pending)
+            for expression in pending:
+                self._jsonpath_cache[expression] = found.get(expression, _NOT_FOUND)
+        return {
+            e: self._jsonpath_cache[e]
+            for e in expressions
+            if self._jsonpath_cache[e] is not _NOT_FOUND
+        }
+
+    def find_json_path_values(self, expression: str) -> list:
+        """查找 JSONPath 的所有匹配值，非简单路径的结果按表达式缓存（同一路径上的多个量词断言只求值一次）"""
+        compiled = compile_path(expression)
+        if compiled is None:
+            return []
+        if compiled.is_simple:
+            found = self.find_json_paths([expression])
+            return [found[expression]] if expression in found else []
+        if self._jsonpath_values_cache is None:
+            self._jsonpath_values_cache = {}
+        values = self._jsonpath_values_cache.get(expression)
+        if values is None:
+            json_data = self.json
+            values = [] if json_data is None else compiled.find_all(json_data)
+            self._jsonpath_values_cache[expression] = values
+        return values
+
+    def _find_json_paths(self, expressions: list[str]) -> dict:
+        found = {}
+        rest = expressions
+
+        # 响应体较大或已溢出到磁盘时，简单路径流式查找，不反序列化整个文档
+        if self.spill_path or len(self.body or "") >= settings.jsonpath_streaming_threshold:
+            simple = {}
+            for expression in expressions:
+                segments = parse_streamable_path(expression)
+                if segments is not None:
+                    simple[expression] = segments
+            if simple:
+                try:
+                    found = self._stream_find(StreamingJsonPath(simple))
+                    rest = [e for e in expressions if e not in simple]
+                except (ValueError, OSError):
+                    found = {}
+
+        if rest:
+            json_data = self.json
+            if json_data is not None:
+                found.update(find_in_document(json_data, rest))
+        return found
+
+    def _stream_find(self, evaluator: StreamingJsonPath) -> dict:
+        if not self.spill_path:
+            return evaluator.find((self.body or "").encode("utf-8"))
+        with open(self.spill_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError("响应体为空")
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                return evaluator.find(buf)
+            finally:
+                try:
+                    buf.close()
+                except BufferError:
+                    pass  # 异常回溯仍引用着 buf，交给垃圾回收
+
+    def close(self):
+        """删除溢出文件"""
+        if self.spill_path:
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass
+            self.spill_path = None
+
+
+class BodyCapture:
+    """
+    流式读取响应体
+
+    内存中最多保留 max_bytes 字节，超出时记录完整长度和 sha256：
+    truncate 模式丢弃超出部分，spill 模式把完整响应体写入临时文件。
+    """
+
+    def __init__(self, max_bytes: int, overflow: str = "truncate", spill_dir: str = None):
+        self.max_bytes = max_bytes
+        self.overflow = overflow
+        self.spill_dir = spill_dir or None
+        self.buffer = bytearray()
+        self.size = 0
+        self.hasher = hashlib.sha256()
+        self.overflowed = False
+        self.file = None
+        self.spill_path = None
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        self.hasher.update(chunk)
+        if self.file is not None:
+            self.file.write(chunk)
+            return
+
+        room = self.max_bytes - len(self.buffer)
+        if len(chunk) <= room:
+            self.buffer += chunk
+            return
+
+        self.buffer += chunk[:room]
+        self.overflowed = True
+        if self.overflow == "spill":
+            self.file = tempfile.NamedTemporaryFile(
+                prefix="apipilot-resp-", dir=self.spill_dir, delete=False
+            )
+            self.spill_path = self.file.name
+            self.file.write(self.buffer)
+            self.file.write(chunk[room:])
+
+    def finish(self):
+        if self.file is not None:
+            self.file.close()
+
+    def discard(self):
+        """读取中断时清理临时文件"""
+        self.finish()
+        if self.spill_path:
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass
+            self.spill_path = None
+
+    def text(self, encoding: str) -> str:
+        # 截断位置可能落在多字节字符中间
+        return self.buffer.decode(encoding or "utf-8", errors="replace")
+
+    def meta(self) -> dict | None:
+        if not self.overflowed:
             return None
+        return {
+            "size": self.size,
+            "sha256": self.hasher.hexdigest(),
+            "captured_bytes": len(self.buffer),
+            "truncated": True,
+            "spilled": self.spill_path is not None,
+        }
+
+
+class RequestTrace:
+    """
+    请求分阶段计时
+
+    通过 httpcore 的 trace 扩展记录各阶段事件的时间点（perf_counter）。
+    DNS 解析在 httpcore 建立 TCP 连接时完成，没有单独的事件，计入 connect_ms；
+    复用连接池中的连接时 connect_ms/tls_ms 为 0。
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.events = {}
+
+    def restart(self):
+        """重新开始计时（排除客户端构建等准备工作）"""
+        self.started = time.perf_counter()
+        self.events.clear()
+
+    async def __call__(self, event_name: str, info: dict):
+        # connection.connect_tcp.started / http11.send_request_headers.started / http2.xxx
+        prefix, _, name = event_name.partition(".")
+        if prefix in ("http11", "http2"):
+            event_name = name
+        self.events[event_name] = time.perf_counter()
+
+    def _span(self, start: str, end: str) -> float:
+        if start in self.events and end in self.events:
+            return round((self.events[end] - self.events[start]) * 1000, 2)
+        return 0.0
+
+    def elapsed_ms(self) -> int:
+        self.finished = time.perf_counter()
+        return int((self.finished - self.started) * 1000)
+
+    def timings(self) -> dict:
+        finished = self.finished or time.perf_counter()
+        first = min(
+            [self.events[name] for name in ("connection.connect_tcp.started", "send_request_headers.started")
+             if name in self.events] or [finished]
+        )
+        return {
+            "queue_ms": round((first - self.started) * 1000, 2),  # 等待连接池
+            "connect_ms": self._span("connection.connect_tcp.started", "connection.connect_tcp.complete"),
+            "tls_ms": self._span("connection.start_tls.started", "connection.start_tls.complete"),
+            "send_ms": self._span("send_request_headers.started", "send_request_body.complete"),
+            "ttfb_ms": self._span("send_request_body.complete", "receive_response_headers.complete"),
+            "download_ms": self._span("receive_response_body.started", "receive_response_body.complete"),
+            "total_ms": round((finished - self.started) * 1000, 2),
+        }
 
 
 class HttpClient:
     """异步 HTTP 客户端"""
 
-    def __init__(self, timeout: int = 30):
+    def __init__(
+        self,
+        timeout: int = 30,
+        client: httpx.AsyncClient = None,
+        limits: LimitConfig = None,
+        breakers: CircuitBreakerRegistry = None,
+        max_capture_bytes: int = None,
+        overflow_mode: str = None,
+    ):
+        """
+        Args:
+            timeout: 默认超时时间（秒）
+            client: 共享的 httpx.AsyncClient（复用连接池），None 时每次请求新建客户端
+            limits: 限流配置，None 表示不限流
+            breakers: 熔断器注册表，默认使用进程级的按主机熔断器
+            max_capture_bytes: 内存中保留的响应体上限，默认取全局配置
+            overflow_mode: 超出上限时的处理方式 truncate/spill，默认取全局配置
+        """
         self.timeout = timeout
+        self.client = client
+        self.max_capture_bytes = max_capture_bytes or settings.response_max_capture_bytes
+        self.overflow_mode = overflow_mode or settings.response_overflow_mode
+        self.limits = limits if limits is not None and limits.enabled else None
+        if breakers is None and settings.circuit_breaker_enabled:
+            breakers = circuit_breakers
+        self.breakers = breakers
 
     async def request(
         self,
@@ -38,6 +317,7 @@ class HttpClient:
         params: dict = None,
         body_type: str = "none",
         body_content: str = None,
+        timeout: int = None,
     ) -> HttpResponse:
         """
         发送 HTTP 请求
@@ -49,91 +329,189 @@ class HttpClient:
             params: Query 参数
             body_type: Body 类型 (none/json/form/form-data/raw)
             body_content: Body 内容
+            timeout: 本次请求超时时间（秒），默认使用 self.timeout
 
         Returns:
             HttpResponse 对象
         """
-        start_time = time.time()
+        timeout = timeout or self.timeout
+        breaker = self.breakers.get(url) if self.breakers is not None else None
+        if breaker is not None and not breaker.allow():
+            # 熔断打开：不发送请求，直接失败
+            return HttpResponse(
+                status_code=0,
+                headers={},
+                body="",
+                cookies={},
+                duration_ms=0,
+                error=(
+                    f"熔断中: {urlsplit(url).netloc} 连续 {breaker.failures} 次连接失败或超时，"
+                    f"请求未发送（{breaker.retry_after:.0f}s 后探测）"
+                ),
+                error_type="circuit_open",
+            )
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                # 构建请求参数
-                request_kwargs = {
-                    "method": method.upper(),
-                    "url": url,
-                    "headers": headers or {},
-                    "params": params or {},
-                }
-
-                # 处理不同的 Body 类型
-                if body_type == "json" and body_content:
-                    request_kwargs["content"] = body_content
-                    if "Content-Type" not in request_kwargs["headers"]:
-                        request_kwargs["headers"]["Content-Type"] = "application/json"
-
-                elif body_type == "form" and body_content:
-                    # URL 编码的表单数据
-                    try:
-                        form_data = json.loads(body_content)
-                        request_kwargs["data"] = form_data
-                    except json.JSONDecodeError:
-                        request_kwargs["content"] = body_content
-
-                elif body_type == "form-data" and body_content:
-                    # multipart/form-data
-                    try:
-                        form_data = json.loads(body_content)
-                        request_kwargs["files"] = {
-                            k: (None, str(v)) for k, v in form_data.items()
-                        }
-                    except json.JSONDecodeError:
-                        request_kwargs["content"] = body_content
-
-                elif body_type == "raw" and body_content:
+            if self.limits is None:
+                response = await self._send(method, url, headers, params, body_type, body_content, timeout)
+            else:
+                # 等待限额的时间不计入响应耗时
+                async with limiter_registry.limit(url, self.limits, timeout):
+                    response = await self._send(method, url, headers, params, body_type, body_content, timeout)
+        except BaseException:
+            if breaker is not None:
+                breaker.release()
+            raise
+
+        if breaker is not None:
+            if response.error_type in ("timeout", "connect"):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        return response
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        headers: dict,
+        params: dict,
+        body_type: str,
+        body_content: str,
+        timeout: int,
+    ) -> HttpResponse:
+        """发送单个请求"""
+        trace = RequestTrace()
+
+        try:
+            # 构建请求参数
+            request_kwargs = {
+                "method": method.upper(),
+                # httpx 传入 params 时会整体替换 URL 中已有的 query，这里合并
+                "url": httpx.URL(url).copy_merge_params(params) if params else url,
+                "headers": headers or {},
+                "timeout": timeout,
+                "extensions": {"trace": trace},
+            }
+
+            # 处理不同的 Body 类型
+            if body_type == "json" and body_content:
+                request_kwargs["content"] = body_content
+                if "Content-Type" not in request_kwargs["headers"]:
+                    request_kwargs["headers"]["Content-Type"] = "application/json"
+
+            elif body_type == "form" and body_content:
+                # URL 编码的表单数据
+                try:
+                    form_data = json.loads(body_content)
+                    request_kwargs["data"] = form_data
+                except json.JSONDecodeError:
                     request_kwargs["content"] = body_content
 
-                # 发送请求
-                response = await client.request(**request_kwargs)
+            elif body_type == "form-data" and body_content:
+                # multipart/form-data
+                try:
+                    form_data = json.loads(body_content)
+                    request_kwargs["files"] = {
+                        k: (None, str(v)) for k, v in form_data.items()
+                    }
+                except json.JSONDecodeError:
+                    request_kwargs["content"] = body_content
 
-                duration_ms = int((time.time() - start_time) * 1000)
+            elif body_type == "raw" and body_content:
+                request_kwargs["content"] = body_content
 
-                return HttpResponse(
-                    status_code=response.status_code,
-                    headers=dict(response.headers),
-                    body=response.text,
-                    cookies=dict(response.cookies),
-                    duration_ms=duration_ms,
-                )
+            # 发送请求
+            if self.client is not None:
+                return await self._fetch(self.client, request_kwargs, trace)
+            async with httpx.AsyncClient(timeout=timeout, transport=create_transport()) as client:
+                return await self._fetch(client, request_kwargs, trace)
 
         except httpx.TimeoutException:
-            duration_ms = int((time.time() - start_time) * 1000)
+            duration_ms = trace.elapsed_ms()
             return HttpResponse(
                 status_code=0,
                 headers={},
                 body="",
                 cookies={},
                 duration_ms=duration_ms,
-                error=f"请求超时 (>{self.timeout}s)",
+                timings=trace.timings(),
+                error=f"请求超时 (>{timeout}s)",
+                error_type="timeout",
+            )
+
+        except httpx.ConnectError as e:
+            duration_ms = trace.elapsed_ms()
+            return HttpResponse(
+                status_code=0,
+                headers={},
+                body="",
+                cookies={},
+                duration_ms=duration_ms,
+                timings=trace.timings(),
+                error=f"连接失败: {str(e)}",
+                error_type="connect",
+            )
+
+        except ReplayMissError as e:
+            duration_ms = trace.elapsed_ms()
+            return HttpResponse(
+                status_code=0,
+                headers={},
+                body="",
+                cookies={},
+                duration_ms=duration_ms,
+                timings=trace.timings(),
+                error=str(e),
+                error_type="replay_miss",
             )
 
         except httpx.RequestError as e:
-            duration_ms = int((time.time() - start_time) * 1000)
+            duration_ms = trace.elapsed_ms()
             return HttpResponse(
                 status_code=0,
                 headers={},
                 body="",
                 cookies={},
                 duration_ms=duration_ms,
+                timings=trace.timings(),
                 error=f"请求失败: {str(e)}",
+                error_type="request",
             )
 
         except Exception as e:
-            duration_ms = int((time.time() - start_time) * 1000)
+            duration_ms = trace.elapsed_ms()
             return HttpResponse(
                 status_code=0,
                 headers={},
                 body="",
                 cookies={},
                 duration_ms=duration_ms,
+                timings=trace.timings(),
                 error=f"未知错误: {str(e)}",
+                error_type="unknown",
+            )
+
+    async def _fetch(self, client: httpx.AsyncClient, request_kwargs: dict, trace: RequestTrace) -> HttpResponse:
+        """流式发送请求并读取响应体"""
+        trace.restart()
+        async with client.stream(**request_kwargs) as response:
+            capture = BodyCapture(self.max_capture_bytes, self.overflow_mode, settings.response_spill_dir)
+            try:
+                async for chunk in response.aiter_bytes():
+                    capture.write(chunk)
+            except BaseException:
+                capture.discard()
+                raise
+            capture.finish()
+
+            return HttpResponse(
+                status_code=response.status_code,
+                headers=dict(response.headers),
+                body=capture.text(response.encoding),
+                cookies=dict(response.cookies),
+                duration_ms=trace.elapsed_ms(),
+                timings=trace.timings(),
+                body_meta=capture.meta(),
+                spill_path=capture.spill_path,
             )
@@ -0,0 +1,472 @@
+"""
+JSONPath 查找
+
+简单路径（只包含字段名和下标，如 $.data.items[0].id）编译为直接的取值链（compile_path），
+不经过 jsonpath_ng 的解析器和匹配对象；其中不含负下标的还支持流式查找：
+直接在 JSON 字节串（bytes / mmap）上扫描，不相关的子树用正则跳过，
+只反序列化命中的值，所有路径都找到后立即停止。
+已解析的文档上，同一响应的所有表达式合并成前缀树一次遍历（JsonPathBatch），
+简单前缀用原生 dict/list 下标，之后的通配符、过滤器、切片、递归下降等交给 jsonpath_ng。
+"""
+import json
+import re
+from functools import lru_cache
+
+from jsonpath_ng import parse as jsonpath_parse
+
+# 与 jsonpath_ng 词法中的 ID 保持一致（不含 @，含 @ 的名字走 jsonpath_ng）
+_ID = r"[A-Za-z_\u4E00-\u9FA5\U0001F600-\U0001F64F][A-Za-z0-9_\-\u4E00-\u9FA5\U0001F600-\U0001F64F]*"
+_SEGMENT = re.compile(
+    rf"\.(?P<name>{_ID})"
+    r"|\[(?P<index>-?\d+)\]"
+    r"|\['(?P<single>[^'\\,*`]*)'\]"
+    r'|\["(?P<double>[^"\\,*`]*)"\]'
+)
+_RESERVED = {"where", "wherenot"}
+
+MISSING = object()  # 未匹配
+
+
+def split_simple_prefix(expression: str) -> tuple[list, str] | None:
+    """
+    拆分出表达式开头的简单路径
+
+    Returns:
+        (路径段列表, 剩余部分)，字段名为 str，下标为 int；不以 $ 开头时返回 None
+    """
+    if not expression or not expression.startswith("$"):
+        return None
+    segments = []
+    pos = 1
+    while pos < len(expression):
+        m = _SEGMENT.match(expression, pos)
+        if m is None or m.group("name") in _RESERVED:
+            break
+        if m.group("name") is not None:
+            segments.append(m.group("name"))
+        elif m.group("index") is not None:
+            segments.append(int(m.group("index")))
+        else:
+            segments.append(m.group("single") if m.group("single") is not None else m.group("double"))
+        pos = m.end()
+    return segments, expression[pos:]
+
+
+def parse_simple_path(expression: str) -> list | None:
+    """
+    解析简单路径
+
+    Returns:
+        路径段列表（字段名为 str，下标为 int），不是简单路径时返回 None
+    """
+    split = split_simple_prefix(expression)
+    if split is None or split[1]:
+        return None
+    return split[0]
+
+
+def parse_streamable_path(expression: str) -> list | None:
+    """解析可流式查找的简单路径（流式扫描时不知道数组长度，不支持负下标）"""
+    segments = parse_simple_path(expression)
+    if segments is None or any(isinstance(s, int) and s < 0 for s in segments):
+        return None
+    return segments
+
+
+@lru_cache(maxsize=1024)
+def _parse_jsonpath(expression: str):
+    return jsonpath_parse(expression)
+
+
+class CompiledPath:
+    """
+    编译后的 JSONPath
+
+    前缀中的简单路径段编译为下标取值链，剩余部分（通配符、过滤器、递归下降等）
+    才交给 jsonpath_ng 求值；取值语义与 jsonpath_ng 一致：
+    字段只作用于 dict，下标作用于 list/str（支持负下标），不满足时视为未匹配。
+    """
+
+    __slots__ = ("expression", "segments", "subpath")
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        split = split_simple_prefix(expression)
+        if split is None or (split[1] and not _is_separable(split[1])):
+            # 不以 $ 开头或无法拆分，整条表达式从根开始求值
+            self.segments = ()
+            self.subpath = _parse_jsonpath(expression)
+        else:
+            self.segments = tuple(split[0])
+            self.subpath = _parse_jsonpath("$" + split[1]) if split[1] else None
+
+    @property
+    def is_simple(self) -> bool:
+        return self.subpath is None
+
+    def find_first(self, json_data):
+        """
+        Returns:
+            第一个匹配值，未匹配时返回 MISSING
+        """
+        value = json_data
+        try:
+            for segment in self.segments:
+                # JSON 对象的键都是 str：dict[int] 抛 KeyError，list[str] 抛 TypeError，都视为未匹配
+                value = value[segment]
+        except (KeyError, IndexError, TypeError):
+            return MISSING
+        if self.subpath is None:
+            return value
+        return _first_match(self.subpath, value)
+
+    def find_all(self, json_data) -> list:
+        """
+        Returns:
+            所有匹配值（按 jsonpath_ng 的匹配顺序），未匹配时返回空列表
+        """
+        value = json_data
+        try:
+            for segment in self.segments:
+                value = value[segment]
+        except (KeyError, IndexError, TypeError):
+            return []
+        if self.subpath is None:
+            return [value]
+        try:
+            return [match.value for match in self.subpath.find(value)]
+        except Exception:
+            return []
+
+
+def _first_match(path, value):
+    try:
+        matches = path.find(value)
+    except Exception:
+        return MISSING
+    return matches[0].value if matches else MISSING
+
+
+@lru_cache(maxsize=1024)
+def compile_path(expression: str) -> CompiledPath | None:
+    """编译 JSONPath（按表达式缓存），表达式不合法时返回 None"""
+    try:
+        return CompiledPath(expression)
+    except Exception:
+        return None
+
+
+def _is_separable(remainder: str) -> bool:
+    """
+    剩余部分能否单独作用在前缀命中的子文档上
+
+    以 . 或 [ 开头的子路径（通配符、切片、过滤器、递归下降）可以；
+    含 | & where 等低优先级运算符或 `parent` 之类上下文引用的不行，整条表达式从根开始求值
+    """
+    if not remainder or remainder[0] not in ".[":
+        return False
+    return not any(token in remainder for token in ("|", "&", "`", "where"))
+
+
+def get_segment(value, segment):
+    """按 jsonpath_ng 的语义取一个路径段：字段只作用于 dict，下标作用于 list/str"""
+    if value is MISSING:
+        return MISSING
+    if isinstance(segment, str):
+        if isinstance(value, dict):
+            return value.get(segment, MISSING)
+        return MISSING
+    if isinstance(value, (list, str)) and value and -len(value) <= segment < len(value):
+        return value[segment]
+    return MISSING
+
+
+# ============ 流式查找 ============
+
+_STR = rb'"[^"\\]*+(?:\\.[^"\\]*+)*+"'
+# 最多两层嵌套的容器整体由正则跳过，更深的容器逐层计数
+_FLAT = rb'[\[{](?>[^"\[\]{}]++|' + _STR + rb')*+[\]}]'
+_NESTED = rb'[\[{](?>[^"\[\]{}]++|' + _STR + rb'|' + _FLAT + rb')*+[\]}]'
+
+_WS = re.compile(rb"[ \t\n\r]*")
+_STRING = re.compile(_STR, re.DOTALL)
+_SKIP = re.compile(rb'(?>[^"\[\]{}]++|' + _STR + rb'|' + _NESTED + rb')*+', re.DOTALL)
+_SCALAR = re.compile(rb"[^ \t\n\r,\]}]+")
+
+_QUOTE, _COLON, _COMMA = ord('"'), ord(":"), ord(",")
+_LBRACE, _RBRACE, _LBRACK, _RBRACK = ord("{"), ord("}"), ord("["), ord("]")
+
+
+class _Complete(Exception):
+    """所有路径都已确定"""
+
+
+class _Node:
+    __slots__ = ("parent", "children", "expressions", "pending", "has_fields", "has_indices")
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.children = {}
+        self.expressions = []
+        self.pending = 0
+        self.has_fields = False
+        self.has_indices = False
+
+
+class StreamingJsonPath:
+    """
+    在 JSON 字节串上流式查找多个简单路径
+
+    所有路径合并为一棵前缀树，一次扫描完成。与完整解析相比有两点差异：
+    对象中存在重复键时取第一个（json.loads 取最后一个）；找到全部路径后不再校验剩余内容。
+    """
+
+    def __init__(self, paths: dict[str, list]):
+        """
+        Args:
+            paths: {表达式: parse_streamable_path 的结果}
+        """
+        self.root = _Node()
+        for expression, segments in paths.items():
+            node = self.root
+            node.pending += 1
+            for segment in segments:
+                if isinstance(segment, str):
+                    node.has_fields = True
+                else:
+                    node.has_indices = True
+                child = node.children.get(segment)
+                if child is None:
+                    child = node.children[segment] = _Node(node)
+                node = child
+                node.pending += 1
+            node.expressions.append(expression)
+        self.buf = None
+        self.results = {}
+
+    def find(self, buf) -> dict:
+        """
+        Args:
+            buf: JSON 文档的 UTF-8 字节串（bytes 或 mmap）
+
+        Returns:
+            {表达式: 值}，未找到的表达式不包含在结果中
+
+        Raises:
+            ValueError: 文档不是合法 JSON
+        """
+        self.buf = buf
+        self.results = {}
+        if self.root.pending:
+            try:
+                self._value(self._ws(0), self.root)
+            except _Complete:
+                pass
+            except IndexError:
+                raise ValueError("JSON 不完整")
+        return self.results
+
+    def _ws(self, pos: int) -> int:
+        return _WS.match(self.buf, pos).end()
+
+    def _settle(self, node: _Node, count: int):
+        while node is not None:
+            node.pending -= count
+            node = node.parent
+        if self.root.pending == 0:
+            raise _Complete
+
+    def _resolve(self, node: _Node, value):
+        """用已反序列化的值确定 node 及其子树上的所有路径"""
+        if not node.pending:
+            return
+        if node.expressions:
+            if value is not MISSING:
+                for expression in node.expressions:
+                    self.results[expression] = value
+            self._settle(node, len(node.expressions))
+        for segment, child in node.children.items():
+            self._resolve(child, get_segment(value, segment))
+
+    def _value(self, pos: int, node: _Node) -> int:
+        c = self.buf[pos]
+        walk_object = c == _LBRACE and node.has_fields
+        walk_array = c == _LBRACK and node.has_indices
+        if node.expressions or not (walk_object or walk_array):
+            end = self._skip(pos)
+            if node.expressions or c not in (_LBRACE, _LBRACK):
+                self._resolve(node, json.loads(self.buf[pos:end]))
+            else:
+                self._resolve(node, MISSING)
+            return end
+        if walk_object:
+            return self._object(pos, node)
+        return self._array(pos, node)
+
+    def _object(self, pos: int, node: _Node) -> int:
+        buf = self.buf
+        pos = self._ws(pos + 1)
+        if buf[pos] == _RBRACE:
+            self._resolve_rest(node)
+            return pos + 1
+        while True:
+            m = _STRING.match(buf, pos)
+            if m is None:
+                raise ValueError(f"位置 {pos} 处应为字符串键")
+            raw = m.group()
+            key = raw[1:-1].decode("utf-8") if b"\\" not in raw else json.loads(raw)
+            pos = self._ws(m.end())
+            if buf[pos] != _COLON:
+                raise ValueError(f"位置 {pos} 处应为 ':'")
+            pos = self._ws(pos + 1)
+
+            child = node.children.get(key)
+            if child is not None and child.pending:
+                pos = self._value(pos, child)
+            else:
+                pos = self._skip(pos)
+            if not node.pending:
+                return self._skip_rest(pos, 1)
+
+            pos = self._ws(pos)
+            c = buf[pos]
+            if c == _COMMA:
+                pos = self._ws(pos + 1)
+            elif c == _RBRACE:
+                self._resolve_rest(node)
+                return pos + 1
+            else:
+                raise ValueError(f"位置 {pos} 处应为 ',' 或 '}}'")
+
+    def _array(self, pos: int, node: _Node) -> int:
+        buf = self.buf
+        pos = self._ws(pos + 1)
+        if buf[pos] == _RBRACK:
+            self._resolve_rest(node)
+            return pos + 1
+        index = 0
+        while True:
+            child = node.children.get(index)
+            if child is not None and child.pending:
+                pos = self._value(pos, child)
+            else:
+                pos = self._skip(pos)
+            if not node.pending:
+                return self._skip_rest(pos, 1)
+            index += 1
+
+            pos = self._ws(pos)
+            c = buf[pos]
+            if c == _COMMA:
+                pos = self._ws(pos + 1)
+            elif c == _RBRACK:
+                self._resolve_rest(node)
+                return pos + 1
+            else:
+                raise ValueError(f"位置 {pos} 处应为 ',' 或 ']'")
+
+    def _resolve_rest(self, node: _Node):
+        """容器已结束，未命中的子路径都不存在"""
+        for child in node.children.values():
+            self._resolve(child, MISSING)
+
+    def _skip(self, pos: int) -> int:
+        """跳过一个值，返回结束位置"""
+        c = self.buf[pos]
+        if c == _QUOTE:
+            m = _STRING.match(self.buf, pos)
+            if m is None:
+                raise ValueError(f"位置 {pos} 处字符串未结束")
+            return m.end()
+        if c in (_LBRACE, _LBRACK):
+            return self._skip_rest(pos + 1, 1)
+        m = _SCALAR.match(self.buf, pos)
+        if m is None:
+            raise ValueError(f"位置 {pos} 处应为值")
+        return m.end()
+
+    def _skip_rest(self, pos: int, depth: int) -> int:
+        """跳过容器剩余部分（只匹配括号和字符串，不构建对象）"""
+        buf = self.buf
+        while depth:
+            pos = _SKIP.match(buf, pos).end()
+            c = buf[pos]
+            if c in (_LBRACE, _LBRACK):
+                depth += 1
+            elif c in (_RBRACE, _RBRACK):
+                depth -= 1
+            else:
+                raise ValueError(f"位置 {pos} 处字符串未结束")
+            pos += 1
+        return pos
+
+
+# ============ 已解析文档上的批量查找 ============
+
+class _BatchNode:
+    __slots__ = ("children", "expressions", "subpaths")
+
+    def __init__(self):
+        self.children = {}
+        self.expressions = []  # 在该节点结束的简单路径
+        self.subpaths = []  # [(表达式, 作用在该节点值上的 jsonpath_ng 路径), ...]
+
+
+class JsonPathBatch:
+    """
+    在已解析的文档上批量查找多个 JSONPath
+
+    所有表达式按简单前缀合并为前缀树，一次遍历用原生 dict/list 下标解析，
+    共享前缀只走一遍；前缀之后的复杂部分在前缀命中的子文档上交给 jsonpath_ng。
+    """
+
+    def __init__(self, expressions: list[str]):
+        self.root = _BatchNode()
+        for expression in dict.fromkeys(expressions):
+            compiled = compile_path(expression)
+            if compiled is None:
+                continue  # 表达式不合法，视为未匹配
+
+            node = self.root
+            for segment in compiled.segments:
+                child = node.children.get(segment)
+                if child is None:
+                    child = node.children[segment] = _BatchNode()
+                node = child
+
+            if compiled.is_simple:
+                node.expressions.append(expression)
+            else:
+                node.subpaths.append((expression, compiled.subpath))
+
+    def find(self, json_data) -> dict:
+        """
+        Returns:
+            {表达式: 第一个匹配值}，未匹配的表达式不包含在结果中
+        """
+        results = {}
+        stack = [(self.root, json_data)]
+        while stack:
+            node, value = stack.pop()
+            for expression in node.expressions:
+                results[expression] = value
+            for expression, path in node.subpaths:
+                match = _first_match(path, value)
+                if match is not MISSING:
+                    results[expression] = match
+            for segment, child in node.children.items():
+                child_value = get_segment(value, segment)
+                if child_value is not MISSING:
+                    stack.append((child, child_value))
+        return results
+
+
+def find_in_document(json_data, expressions: list[str]) -> dict:
+    """
+    在已解析的文档中查找，返回 {表达式: 第一个匹配值}（未匹配的不包含）
+    """
+    if len(expressions) == 1:
+        compiled = compile_path(expressions[0])
+        value = compiled.find_first(json_data) if compiled is not None else MISSING
+        return {} if value is MISSING else {expressions[0]: value}
+    return JsonPathBatch(expressions).find(json_data)
@@ -0,0 +1,295 @@
+import asyncio
+import logging
+import random
+import time
+import uuid
+import weakref
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LimitConfig:
+    """请求限流配置（来自 Environment）"""
+    rate_limit_rps: float | None = None  # 令牌桶速率，None 表示不限速
+    rate_limit_burst: int | None = None  # 令牌桶容量，默认等于 max(1, rate)
+    max_concurrency: int | None = None  # 并发上限，None 表示不限制
+    scope: str = "host"  # host: 按目标主机限流；environment: 按环境限流
+    environment_id: int | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rate_limit_rps or self.max_concurrency)
+
+    @property
+    def burst(self) -> int:
+        return self.rate_limit_burst or max(1, int(self.rate_limit_rps or 1))
+
+    def key_for(self, url: str) -> str:
+        """限流键：同一个键的请求共享限额"""
+        if self.scope == "environment" and self.environment_id is not None:
+            return f"env:{self.environment_id}"
+        return f"host:{urlsplit(url).netloc.lower()}"
+
+    @classmethod
+    def from_environment(cls, environment) -> "LimitConfig":
+        return cls(
+            rate_limit_rps=environment.rate_limit_rps,
+            rate_limit_burst=environment.rate_limit_burst,
+            max_concurrency=environment.max_concurrency,
+            scope=environment.limit_scope or "host",
+            environment_id=environment.id,
+        )
+
+
+# ============ 本地限流（单进程） ============
+
+class _LoopBound:
+    """asyncio 原语绑定事件循环，Celery 中每次 run_async 都会新建循环，需按循环重建"""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instances = weakref.WeakKeyDictionary()
+
+    def get(self):
+        loop = asyncio.get_running_loop()
+        instance = self._instances.get(loop)
+        if instance is None:
+            instance = self._instances[loop] = self._factory()
+        return instance
+
+
+class TokenBucket:
+    """令牌桶"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self._lock = _LoopBound(asyncio.Lock)
+
+    async def acquire(self):
+        async with self._lock.get():
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ConcurrencyLimiter:
+    """并发限制"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = _LoopBound(lambda: asyncio.Semaphore(limit))
+
+    @asynccontextmanager
+    async def slot(self):
+        async with self._semaphore.get():
+            yield
+
+
+# ============ 分布式限流（Redis，跨 worker） ============
+
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or burst
+local ts = tonumber(data[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+CONCURRENCY_ACQUIRE_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local lease = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) < limit then
+    redis.call('ZADD', KEYS[1], now + lease, ARGV[2])
+    redis.call('EXPIRE', KEYS[1], math.ceil(lease) + 1)
+    return 1
+end
+return 0
+"""
+
+
+class RedisTokenBucket:
+    """基于 Redis 的令牌桶，多个 worker 共享同一个桶"""
+
+    def __init__(self, redis, key: str, rate: float, burst: int):
+        self.redis = redis
+        self.key = f"apipilot:ratelimit:{key}"
+        self.rate = rate
+        self.burst = burst
+
+    async def acquire(self):
+        while True:
+            wait = float(await self.redis.eval(TOKEN_BUCKET_SCRIPT, 1, self.key, self.rate, self.burst))
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+
+class RedisConcurrencyLimiter:
+    """
+    基于 Redis 的并发限制
+
+    每个进行中的请求在有序集合中持有一个租约，租约到期自动释放，
+    避免 worker 异常退出后名额永久泄漏
+    """
+
+    POLL_INTERVAL = 0.02
+
+    def __init__(self, redis, key: str, limit: int, lease_seconds: float):
+        self.redis = redis
+        self.key = f"apipilot:concurrency:{key}"
+        self.limit = limit
+        self.lease_seconds = lease_seconds
+
+    @asynccontextmanager
+    async def slot(self):
+        token = uuid.uuid4().hex
+        while not await self.redis.eval(
+            CONCURRENCY_ACQUIRE_SCRIPT, 1, self.key, self.limit, token, self.lease_seconds
+        ):
+            await asyncio.sleep(self.POLL_INTERVAL * (1 + random.random()))
+        try:
+            yield
+        finally:
+            try:
+                await self.redis.zrem(self.key, token)
+            except RedisError:
+                pass  # 租约到期后自动释放
+
+
+# ============ 限流器注册表 ============
+
+class LimiterRegistry:
+    """按限流键缓存限流器，优先使用 Redis，Redis 不可用时退化为进程内限流"""
+
+    RETRY_REDIS_AFTER = 30  # Redis 不可用后多久再尝试（秒）
+
+    def __init__(self, backend: str = "redis", redis_url: str = None):
+        self.backend = backend
+        self.redis_url = redis_url
+        self._local = {}
+        self._redis_clients = weakref.WeakKeyDictionary()
+        self._redis_down_until = 0.0
+
+    def _use_redis(self) -> bool:
+        return (
+            self.backend == "redis"
+            and bool(self.redis_url)
+            and time.monotonic() >= self._redis_down_until
+        )
+
+    def _redis_failed(self, e: Exception):
+        if time.monotonic() >= self._redis_down_until:
+            logger.warning(f"Redis 限流不可用，{self.RETRY_REDIS_AFTER}s 内退化为进程内限流: {e}")
+        self._redis_down_until = time.monotonic() + self.RETRY_REDIS_AFTER
+
+    def _redis(self):
+        loop = asyncio.get_running_loop()
+        client = self._redis_clients.get(loop)
+        if client is None:
+            client = self._redis_clients[loop] = aioredis.from_url(self.redis_url)
+        return client
+
+    async def close(self):
+        """关闭当前事件循环的 Redis 连接（Celery 中每个 run_async 的循环结束前调用）"""
+        client = self._redis_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            try:
+                await client.aclose()
+            except (RedisError, OSError):
+                pass
+
+    def _local_limiters(self, key: str, config: LimitConfig):
+        cache_key = (key, config.rate_limit_rps, config.burst, config.max_concurrency)
+        limiters = self._local.get(cache_key)
+        if limiters is None:
+            bucket = TokenBucket(config.rate_limit_rps, config.burst) if config.rate_limit_rps else None
+            concurrency = ConcurrencyLimiter(config.max_concurrency) if config.max_concurrency else None
+            limiters = self._local[cache_key] = (bucket, concurrency)
+        return limiters
+
+    @asynccontextmanager
+    async def limit(self, url: str, config: LimitConfig, timeout: float = 30):
+        """
+        在限额内执行请求
+
+        Args:
+            url: 请求 URL（按主机限流时用于计算限流键）
+            config: 限流配置
+            timeout: 请求超时时间，用作分布式并发租约时长的依据
+        """
+        key = config.key_for(url)
+        bucket, concurrency = self._local_limiters(key, config)
+
+        if self._use_redis():
+            try:
+                redis = self._redis()
+                if config.rate_limit_rps:
+                    bucket = RedisTokenBucket(redis, key, config.rate_limit_rps, config.burst)
+                if config.max_concurrency:
+                    concurrency = RedisConcurrencyLimiter(
+                        redis, key, config.max_concurrency, lease_seconds=timeout + 5
+                    )
+                if bucket is not None:
+                    await bucket.acquire()
+            except (RedisError, OSError) as e:
+                self._redis_failed(e)
+                bucket, concurrency = self._local_limiters(key, config)
+                if bucket is not None:
+                    await bucket.acquire()
+        elif bucket is not None:
+            await bucket.acquire()
+
+        if concurrency is None:
+            yield
+            return
+
+        try:
+            slot = concurrency.slot()
+            await slot.__aenter__()
+        except (RedisError, OSError) as e:
+            self._redis_failed(e)
+            _, concurrency = self._local_limiters(key, config)
+            slot = concurrency.slot()
+            await slot.__aenter__()
+        try:
+            yield
+        finally:
+            await slot.__aexit__(None, None, None)
+
+
+limiter_registry = LimiterRegistry(
+    backend=settings.limiter_backend,
+    redis_url=settings.redis_url,
+)
@@ -0,0 +1,275 @@
+import asyncio
+import time
+from dataclasses import dataclass
+
+import httpx
+
+from app.engine.http_client import HttpClient
+from app.engine.limiter import LimitConfig
+from app.engine.recording import create_transport
+from app.engine.executor import TestExecutor
+from app.engine.retry import RetryPolicy
+from app.engine.aggregator import ResultAggregator, RecordingConfig, failure_reason
+
+
+@dataclass
+class LoadProfile:
+    """压测配置"""
+    virtual_users: int = 10
+    duration_seconds: float | None = 60  # 持续时间，与 iterations 任一达到即停止
+    iterations: int | None = None  # 每个虚拟用户的迭代次数（每次迭代执行全部用例），开环模式下总数为 iterations × virtual_users
+    ramp_up_seconds: float = 0  # 所有虚拟用户启动完成所需时间
+    ramp_profile: str = "linear"  # linear/step/instant
+    ramp_steps: int = 5  # step 模式下分几批启动
+    target_rps: float | None = None  # 全局目标 RPS，None 表示不限速
+    think_time_ms: int = 0  # 每次请求后的等待时间
+    # 开环模式：设置 arrival_rate 后按固定到达速率发起迭代，不受响应快慢影响
+    arrival_rate: float | None = None  # 每秒发起的迭代数
+    max_in_flight: int = 100  # 同时进行中的迭代上限，超出的到达直接丢弃
+    late_threshold_ms: float = 10  # 实际发出时间晚于计划时间超过该值记为迟发
+
+
+class LoadRunner:
+    """
+    压测执行器
+
+    用现有用例配置驱动 N 个并发虚拟用户，每个虚拟用户按顺序循环执行全部用例
+    （用例间提取变量在虚拟用户内部传递），所有虚拟用户共享一个连接池。
+    设置 arrival_rate 时改为开环调度：按固定到达速率发起迭代，延迟从计划发送时间算起，
+    并限制同时进行中的迭代数，超出的到达计为丢弃。
+    结果流式聚合，只保留失败请求和抽样的成功请求的完整详情（self.details）。
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        cases: list[tuple[int, dict]],
+        profile: LoadProfile,
+        env_vars: dict = None,
+        recording: RecordingConfig = None,
+        limits: LimitConfig = None,
+    ):
+        """
+        Args:
+            base_url: 环境基础 URL
+            cases: [(用例 ID, 用例配置), ...]，按执行顺序排列
+            profile: 压测配置
+            env_vars: 环境变量
+            recording: 结果记录配置
+            limits: 环境限流配置，压测流量同样受目标主机的限额约束
+        """
+        self.base_url = base_url
+        self.cases = cases
+        self.profile = profile
+        self.env_vars = env_vars or {}
+        self.limits = limits
+        self.aggregator = ResultAggregator(recording)
+        self.details = []  # [(用例 ID, ExecutionResult), ...]
+        self._deadline = None
+        self._next_slot = 0.0
+
+    def _start_delay(self, index: int) -> float:
+        """计算第 index 个虚拟用户的启动延迟（秒）"""
+        profile = self.profile
+        if profile.ramp_profile == "instant" or profile.ramp_up_seconds <= 0 or profile.virtual_users <= 1:
+            return 0.0
+        if profile.ramp_profile == "step":
+            steps = max(1, min(profile.ramp_steps, profile.virtual_users))
+            batch = index * steps // profile.virtual_users
+            return profile.ramp_up_seconds * batch / steps
+        return profile.ramp_up_seconds * index / profile.virtual_users
+
+    async def _pace(self):
+        """按目标 RPS 为每个请求分配发送时间"""
+        if not self.profile.target_rps:
+            return
+        now = time.perf_counter()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + 1.0 / self.profile.target_rps
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def _expired(self) -> bool:
+        return self._deadline is not None and time.perf_counter() >= self._deadline
+
+    async def _virtual_user(self, index: int, executor: TestExecutor):
+        """单个虚拟用户的执行循环"""
+        await asyncio.sleep(self._start_delay(index))
+
+        iteration = 0
+        while not self._expired():
+            if self.profile.iterations is not None and iteration >= self.profile.iterations:
+                break
+            iteration += 1
+
+            extracted_vars = {}
+            for case_id, case_config in self.cases:
+                if self._expired():
+                    return
+                await self._pace()
+
+                started = time.perf_counter()
+                result = await executor.execute(
+                    base_url=self.base_url,
+                    test_case=case_config,
+                    env_vars=self.env_vars,
+                    extracted_vars=extracted_vars,
+                )
+                latency_ms = (time.perf_counter() - started) * 1000
+
+                keep = self.aggregator.record(
+                    str(case_id),
+                    latency_ms,
+                    result.status,
+                    result.response_status_code,
+                    failure_reason(result),
+                )
+                if keep:
+                    self.details.append((case_id, result))
+                if result.extractor_results:
+                    extracted_vars.update(result.extractor_results)
+
+                if self.profile.think_time_ms:
+                    await asyncio.sleep(self.profile.think_time_ms / 1000)
+
+    async def _run_iteration(self, executor: TestExecutor, intended_at: float):
+        """
+        执行一次迭代（全部用例按顺序执行一遍）
+
+        Args:
+            intended_at: 计划开始时间，首个请求的延迟从该时间开始计算，
+                调度延迟也计入，避免协调遗漏（coordinated omission）
+        """
+        extracted_vars = {}
+        started = intended_at
+        for case_id, case_config in self.cases:
+            result = await executor.execute(
+                base_url=self.base_url,
+                test_case=case_config,
+                env_vars=self.env_vars,
+                extracted_vars=extracted_vars,
+            )
+            finished = time.perf_counter()
+
+            keep = self.aggregator.record(
+                str(case_id),
+                (finished - started) * 1000,
+                result.status,
+                result.response_status_code,
+                failure_reason(result),
+            )
+            if keep:
+                self.details.append((case_id, result))
+            if result.extractor_results:
+                extracted_vars.update(result.extractor_results)
+            started = finished
+
+    def _scheduled_iterations(self) -> int:
+        """
+        开环模式计划发起的迭代总数
+
+        iterations 与闭环模式含义相同（每个虚拟用户的迭代次数），总数为 iterations × virtual_users；
+        同时设置 duration_seconds 时取两者中先达到的一个
+        """
+        profile = self.profile
+        limits = []
+        if profile.iterations is not None:
+            limits.append(profile.iterations * profile.virtual_users)
+        if profile.duration_seconds:
+            limits.append(int(profile.duration_seconds * profile.arrival_rate))
+        return min(limits)
+
+    async def _run_open_loop(self, executor: TestExecutor, started: float) -> dict:
+        """
+        开环调度：第 i 次迭代的计划时间固定为 started + i / arrival_rate，
+        与之前请求是否完成无关
+        """
+        profile = self.profile
+        interval = 1.0 / profile.arrival_rate
+        scheduled = self._scheduled_iterations()
+        late_threshold = profile.late_threshold_ms / 1000
+
+        in_flight = set()
+        dropped = 0
+        late = 0
+        max_lag = 0.0
+        peak_in_flight = 0
+
+        for i in range(scheduled):
+            intended_at = started + i * interval
+            now = time.perf_counter()
+            if intended_at > now:
+                await asyncio.sleep(intended_at - now)
+                now = time.perf_counter()
+
+            if len(in_flight) >= profile.max_in_flight:
+                dropped += 1
+                continue
+
+            lag = now - intended_at
+            max_lag = max(max_lag, lag)
+            if lag > late_threshold:
+                late += 1
+
+            task = asyncio.create_task(self._run_iteration(executor, intended_at))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            peak_in_flight = max(peak_in_flight, len(in_flight))
+
+        if in_flight:
+            await asyncio.gather(*in_flight)
+
+        return {
+            "scheduled": scheduled,
+            "issued": scheduled - dropped,
+            "dropped": dropped,
+            "late": late,
+            "max_schedule_lag_ms": round(max_lag * 1000, 2),
+            "peak_in_flight": peak_in_flight,
+        }
+
+    async def run(self) -> dict:
+        """执行压测，返回汇总统计"""
+        profile = self.profile
+        # 压测时不重试，避免放大流量、扭曲统计
+        self.cases = [(case_id, {**config, "retry_count": 0}) for case_id, config in self.cases]
+
+        pool_size = profile.max_in_flight if profile.arrival_rate else profile.virtual_users
+        limits = httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+        )
+        async with httpx.AsyncClient(limits=limits, transport=create_transport(limits)) as client:
+            executor = TestExecutor(
+                retry_policy=RetryPolicy(),
+                http_client=HttpClient(client=client, limits=self.limits),
+            )
+
+            started = time.perf_counter()
+            open_loop = None
+            if profile.arrival_rate:
+                open_loop = await self._run_open_loop(executor, started)
+            else:
+                if profile.duration_seconds:
+                    self._deadline = started + profile.ramp_up_seconds + profile.duration_seconds
+                self._next_slot = started
+
+                await asyncio.gather(*(
+                    self._virtual_user(i, executor) for i in range(profile.virtual_users)
+                ))
+            elapsed = time.perf_counter() - started
+
+        summary = self.aggregator.summary(elapsed)
+        if open_loop is not None:
+            summary["open_loop"] = open_loop
+        summary["profile"] = {
+            "virtual_users": profile.virtual_users,
+            "duration_seconds": profile.duration_seconds,
+            "iterations": profile.iterations,
+            "ramp_up_seconds": profile.ramp_up_seconds,
+            "ramp_profile": profile.ramp_profile,
+            "target_rps": profile.target_rps,
+            "arrival_rate": profile.arrival_rate,
+            "max_in_flight": profile.max_in_flight,
+        }
+        return summary
@@ -0,0 +1,252 @@
+"""
+HTTP 录制与回放
+
+record 模式下请求照常发往目标服务，响应按请求指纹保存到本地 SQLite（响应体 zlib 压缩）；
+replay 模式下由自定义 httpx 传输层直接返回录制的响应，不访问网络；
+auto 模式优先回放，未录制过的请求发往目标服务并录制。
+
+请求指纹由方法、规范化的 URL（主机小写、去掉默认端口、query 参数排序）和规范化的请求体
+（JSON 键排序、表单参数排序、multipart 去掉随机 boundary）计算，不包含请求头。
+http_record_ignore_fields 中的 query 参数和 JSON/表单字段（如 timestamp、nonce、sign）不参与指纹，
+使每次取值不同的请求也能命中同一条录制。
+
+录制时完整读取响应体（不受 response_max_capture_bytes 限制），同一指纹只保留最近一次录制。
+SQLite 的读写（及压缩/解压）在线程池中执行，不阻塞事件循环；回放命中内存缓存时直接返回。
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode
+
+import httpx
+
+from app.config import settings
+
+# 响应体已由 httpx 解码，回放时不能再带这些头
+_DROP_HEADERS = frozenset(("content-encoding", "content-length", "transfer-encoding"))
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+class ReplayMissError(httpx.RequestError):
+    """回放模式下没有匹配的录制"""
+
+
+def _strip_fields(value, ignore: frozenset):
+    if isinstance(value, dict):
+        return {k: _strip_fields(v, ignore) for k, v in value.items() if k not in ignore}
+    if isinstance(value, list):
+        return [_strip_fields(v, ignore) for v in value]
+    return value
+
+
+def normalize_url(url: httpx.URL, ignore: frozenset = frozenset()) -> str:
+    port = url.port if url.port not in (None, _DEFAULT_PORTS.get(url.scheme)) else None
+    netloc = url.host.lower() + (f":{port}" if port else "")
+    query = sorted((k, v) for k, v in parse_qsl(url.query.decode("ascii"), keep_blank_values=True) if k not in ignore)
+    return f"{url.scheme}://{netloc}{url.path}" + (f"?{urlencode(query)}" if query else "")
+
+
+def normalize_body(content: bytes, content_type: str, ignore: frozenset = frozenset()) -> bytes:
+    if not content:
+        return b""
+    content_type = (content_type or "").lower()
+    if "multipart/form-data" in content_type and "boundary=" in content_type:
+        boundary = content_type.split("boundary=", 1)[1].split(";", 1)[0].strip().strip('"')
+        return content.replace(boundary.encode("latin-1"), b"")
+    if "application/x-www-form-urlencoded" in content_type:
+        pairs = parse_qsl(content.decode("utf-8", errors="replace"), keep_blank_values=True)
+        return urlencode(sorted((k, v) for k, v in pairs if k not in ignore)).encode("utf-8")
+    if content[:1] in (b"{", b"[") or "json" in content_type:
+        try:
+            data = json.loads(content)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return content
+        return json.dumps(_strip_fields(data, ignore), sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return content
+
+
+def fingerprint(request: httpx.Request, ignore: frozenset = frozenset()) -> tuple[str, str]:
+    """
+    Returns:
+        (指纹, 规范化的 URL)
+    """
+    url = normalize_url(request.url, ignore)
+    body = normalize_body(request.content, request.headers.get("content-type"), ignore)
+    h = hashlib.sha256()
+    h.update(request.method.upper().encode("ascii") + b"\n" + url.encode("utf-8") + b"\n")
+    h.update(body)
+    return h.hexdigest()[:32], url
+
+
+class RecordingStore:
+    """
+    录制存储（SQLite，WAL 模式，多个 worker 进程可同时读写）
+
+    回放时解压后的响应按指纹缓存在内存中。get/put 是阻塞调用，在事件循环中通过 asyncio.to_thread 调用。
+    """
+
+    CACHE_SIZE = 1024
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS recordings (
+                fingerprint TEXT PRIMARY KEY,
+                method TEXT NOT NULL,
+                url TEXT NOT NULL,
+                status_code INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                recorded_at REAL NOT NULL
+            )
+            """
+        )
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def cached(self, key: str) -> tuple[int, list, bytes] | None:
+        """只查内存缓存，不访问数据库"""
+        return self._cache.get(key)
+
+    def get(self, key: str) -> tuple[int, list, bytes] | None:
+        """
+        Returns:
+            (状态码, [(头, 值)], 响应体)，没有录制时返回 None
+        """
+        entry = self._cache.get(key)
+        if entry is not None:
+            return entry
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status_code, headers, body FROM recordings WHERE fingerprint = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        entry = (row[0], json.loads(row[1]), zlib.decompress(row[2]))
+        if len(self._cache) >= self.CACHE_SIZE:
+            self._cache.clear()
+        self._cache[key] = entry
+        return entry
+
+    def put(self, key: str, method: str, url: str, status_code: int, headers: list, body: bytes):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO recordings VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key, method, url, status_code,
+                    json.dumps(headers, ensure_ascii=False),
+                    zlib.compress(body, 6),
+                    time.time(),
+                ),
+            )
+        self._cache.pop(key, None)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM recordings").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """
+    录制/回放传输层
+
+    Args:
+        store: 录制存储
+        transport: 实际发送请求的传输层，None 表示只回放
+        replay_first: 先查录制，命中时直接返回（auto 模式）
+        ignore: 不参与指纹的字段
+    """
+
+    def __init__(
+        self,
+        store: RecordingStore,
+        transport: httpx.AsyncBaseTransport = None,
+        replay_first: bool = True,
+        ignore: frozenset = frozenset(),
+    ):
+        self.store = store
+        self.transport = transport
+        self.replay_first = replay_first
+        self.ignore = ignore
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        key, url = fingerprint(request, self.ignore)
+
+        if self.replay_first or self.transport is None:
+            entry = self.store.cached(key)
+            if entry is None:
+                entry = await asyncio.to_thread(self.store.get, key)
+            if entry is not None:
+                status_code, headers, body = entry
+                return httpx.Response(status_code, headers=headers, content=body, request=request)
+            if self.transport is None:
+                raise ReplayMissError(f"回放记录不存在: {request.method} {url}", request=request)
+
+        response = await self.transport.handle_async_request(request)
+        try:
+            body = await response.aread()
+        finally:
+            await response.aclose()
+        headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in _DROP_HEADERS]
+        await asyncio.to_thread(self.store.put, key, request.method, url, response.status_code, headers, body)
+        return httpx.Response(
+            response.status_code,
+            headers=headers,
+            content=body,
+            request=request,
+            extensions={k: v for k, v in response.extensions.items() if k == "http_version"},
+        )
+
+    async def aclose(self):
+        if self.transport is not None:
+            await self.transport.aclose()
+
+
+_store: RecordingStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> RecordingStore:
+    """进程级录制存储（按配置的路径打开）"""
+    global _store
+    if _store is None or _store.path != settings.http_record_path:
+        with _store_lock:
+            if _store is None or _store.path != settings.http_record_path:
+                _store = RecordingStore(settings.http_record_path)
+    return _store
+
+
+def create_transport(limits: httpx.Limits = None) -> httpx.AsyncBaseTransport | None:
+    """
+    按 http_record_mode 创建传输层，off 时返回 None（使用 httpx 默认传输层）
+
+    Args:
+        limits: 连接池限制（自定义传输层时 AsyncClient 的 limits 参数不再生效，需要传给实际的传输层）
+    """
+    mode = settings.http_record_mode
+    if mode == "off":
+        return None
+    ignore = frozenset(settings.http_record_ignore_fields)
+    if mode == "replay":
+        return RecordingTransport(get_store(), ignore=ignore)
+    if mode not in ("record", "auto"):
+        raise ValueError(f"不支持的录制模式: {mode}")
+    transport = httpx.AsyncHTTPTransport(limits=limits) if limits else httpx.AsyncHTTPTransport()
+    return RecordingTransport(get_store(), transport, replay_first=mode == "auto", ignore=ignore)
@@ -0,0 +1,116 @@
+import random
+from dataclasses import dataclass, field
+
+from app.config import settings
+
+
+@dataclass
+class RetryPolicy:
+    """重试策略（重试次数由用例的 retry_count 决定）"""
+    backoff_base: float = 0.5  # 首次重试等待秒数
+    backoff_max: float = 10.0  # 单次等待上限
+    jitter: bool = True  # 是否使用 full jitter
+    retry_on_status: tuple = (502, 503, 504)
+    retry_on_assertion_failure: bool = False
+
+    def should_retry(self, result) -> bool:
+        """根据单次执行结果判断是否需要重试"""
+        if result.error_type in ("circuit_open", "replay_miss"):
+            # 熔断期间重试只会再次被拒绝，回放缺失的录制重试也不会出现，白白消耗重试预算
+            return False
+        if result.error_type == "script":
+            # 脚本错误与网络无关，重试结果相同
+            return False
+        if result.status == "error":
+            return True
+        if result.response_status_code in self.retry_on_status:
+            return True
+        if result.status == "failed" and self.retry_on_assertion_failure:
+            return True
+        return False
+
+    def backoff(self, attempt: int) -> float:
+        """
+        计算第 attempt 次重试前的等待时间（指数退避）
+
+        Args:
+            attempt: 重试序号，从 1 开始
+
+        Returns:
+            等待秒数
+        """
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+
+@dataclass
+class RetryBudget:
+    """
+    单次测试集执行的重试预算
+
+    所有用例共享，重试总次数不超过 max(min_retries, 用例数 * ratio)，
+    避免目标服务故障时重试放大流量。分片执行时各分片使用 max_retries
+    指定的份额（见 split_retry_limit），总数仍不超过整个测试集的预算。
+    """
+    total_cases: int = 0
+    ratio: float = 0.2
+    min_retries: int = 3
+    max_retries: int | None = None  # 指定时直接作为上限
+    used: int = field(default=0, init=False)
+
+    @property
+    def limit(self) -> int:
+        if self.max_retries is not None:
+            return self.max_retries
+        return max(self.min_retries, int(self.total_cases * self.ratio))
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.limit - self.used)
+
+    def acquire(self) -> bool:
+        """申请一次重试，预算耗尽时返回 False"""
+        if self.used >= self.limit:
+            return False
+        self.used += 1
+        return True
+
+
+def default_retry_policy() -> RetryPolicy:
+    """根据全局配置构建重试策略"""
+    return RetryPolicy(
+        backoff_base=settings.retry_backoff_base,
+        backoff_max=settings.retry_backoff_max,
+        retry_on_status=tuple(settings.retry_on_status_codes),
+        retry_on_assertion_failure=settings.retry_on_assertion_failure,
+    )
+
+
+def default_retry_budget(total_cases: int) -> RetryBudget:
+    """根据全局配置构建测试集执行的重试预算"""
+    return RetryBudget(
+        total_cases=total_cases,
+        ratio=settings.retry_budget_ratio,
+        min_retries=settings.retry_budget_min,
+    )
+
+
+def split_retry_limit(limit: int, sizes: list[int]) -> list[int]:
+    """
+    按各分片的用例数把测试集的重试预算拆分为各分片的份额（最大余数法），份额之和等于 limit
+
+    Args:
+        limit: 整个测试集的重试上限
+        sizes: 各分片的用例数
+    """
+    total = sum(sizes)
+    if total <= 0:
+        return [0] * len(sizes)
+    exact = [limit * size / total for size in sizes]
+    shares = [int(value) for value in exact]
+    order = sorted(range(len(sizes)), key=lambda i: exact[i] - shares[i], reverse=True)
+    for i in order[:limit - sum(shares)]:
+        shares[i] += 1
+    return shares
@@ -0,0 +1,84 @@
+import hashlib
+import json
+from collections import OrderedDict
+
+
+class SchemaValidatorCache:
+    """
+    JSON Schema 校验器缓存
+
+    按 Schema 文本的 sha256 缓存编译好的校验器（LRU），同一个用例的 Schema
+    只在第一次执行时编译。jsonschema 按需导入，未安装时只影响 json_schema 断言。
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._validators = OrderedDict()
+
+    def get(self, schema_text: str):
+        """
+        获取校验器
+
+        Raises:
+            ValueError: Schema 不是合法的 JSON 或不是合法的 JSON Schema
+            ImportError: 未安装 jsonschema
+        """
+        key = hashlib.sha256(schema_text.encode("utf-8")).hexdigest()
+        validator = self._validators.get(key)
+        if validator is not None:
+            self._validators.move_to_end(key)
+            return validator
+
+        validator = self._compile(schema_text)
+        self._validators[key] = validator
+        if len(self._validators) > self.max_size:
+            self._validators.popitem(last=False)
+        return validator
+
+    @staticmethod
+    def _compile(schema_text: str):
+        from jsonschema import validators
+        from jsonschema.exceptions import SchemaError
+
+        try:
+            schema = json.loads(schema_text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Schema 不是合法的 JSON: {e}")
+
+        cls = validators.validator_for(schema)
+        try:
+            cls.check_schema(schema)
+        except SchemaError as e:
+            raise ValueError(f"Schema 不合法: {e.message}")
+        return cls(schema, format_checker=cls.FORMAT_CHECKER)
+
+
+def format_error_path(path, root: str = "$") -> str:
+    """把 jsonschema 错误的 absolute_path 转为 JSONPath 形式，如 $.items[3].id"""
+    parts = [root]
+    for item in path:
+        parts.append(f"[{item}]" if isinstance(item, int) else f".{item}")
+    return "".join(parts)
+
+
+def validate(validator, instance, max_errors: int = 10, root: str = "$") -> tuple[int, list[str]]:
+    """
+    校验实例
+
+    Args:
+        root: 实例在响应中的位置，错误路径以它为前缀
+
+    Returns:
+        (错误总数, 前 max_errors 条紧凑格式的错误 "路径: 原因")
+    """
+    errors = sorted(validator.iter_errors(instance), key=lambda e: list(map(str, e.absolute_path)))
+    messages = []
+    for error in errors[:max_errors]:
+        message = error.message
+        if len(message) > 200:
+            message = message[:200] + "..."
+        messages.append(f"{format_error_path(error.absolute_path, root)}: {message}")
+    return len(errors), messages
+
+
+schema_validators = SchemaValidatorCache()
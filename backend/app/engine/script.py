@@ -0,0 +1,342 @@
+"""
+前置/后置脚本沙箱
+
+脚本是受限的 Python 子集，保存时和第一次执行时做 AST 校验：禁止 import、global、class、
+async/yield 和 finally 中的 return/break/continue，禁止访问以 _ 开头的名称和属性以及栈帧相关属性，只提供白名单内置函数和
+json/re/math/random/hashlib/hmac/base64/uuid/time/datetime 的部分函数。
+
+校验和编译结果按脚本内容的 sha256 缓存，用例修改脚本后自然换用新的缓存项。
+
+脚本在常驻的沙箱子进程池中执行（每个子进程用 RLIMIT_AS 限制内存，按次用 ITIMER_PROF 限制 CPU 时间、
+RLIMIT_CPU 兜底，墙钟超时后重启该子进程），不为每个用例新建进程；子进程不依赖 multiprocessing，
+在 Celery prefork worker 中同样可用。script_sandbox=inline 或非 POSIX 系统下在当前进程的线程中执行，
+只有 AST 限制，用于本地调试。
+
+脚本中可用的变量：
+    vars      当前变量（环境变量 + 已提取变量），修改或新增的变量参与本用例渲染并传递给后续用例
+    request   前置脚本：{"method", "path", "headers", "params", "body_type", "body_content"}，渲染变量前修改
+    response  后置脚本：{"status_code", "headers", "body", "json"}，断言和提取前修改
+    log()/print()  输出日志，脚本失败时附在错误信息中
+后置脚本中 assert 失败记为断言失败，其他异常记为执行错误。
+"""
+import ast
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import selectors
+import signal
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+from app.config import settings
+from app.engine import script_runtime
+
+_RUNTIME_PATH = os.path.abspath(script_runtime.__file__)
+
+_FORBIDDEN_NODES = (
+    ast.Import, ast.ImportFrom, ast.Global, ast.Nonlocal, ast.ClassDef,
+    ast.AsyncFunctionDef, ast.Await, ast.AsyncFor, ast.AsyncWith, ast.Yield, ast.YieldFrom,
+)
+
+# 不以 _ 开头但能拿到栈帧、全局变量或格式化访问属性的名称
+_FORBIDDEN_ATTRS = frozenset((
+    "format", "format_map", "mro",
+    "gi_frame", "gi_code", "cr_frame", "cr_code", "ag_frame", "ag_code",
+    "f_back", "f_globals", "f_locals", "f_builtins", "f_code", "tb_frame", "tb_next",
+))
+
+_CACHE_SIZE = 1024
+
+# 子进程编译过的脚本超过该数量时回收重建，避免缓存无限增长
+_WORKER_MAX_SCRIPTS = 512
+
+
+class ScriptError(Exception):
+    """脚本校验或执行失败"""
+
+    def __init__(self, message: str, error_type: str = "error", logs: list = None):
+        self.error_type = error_type  # syntax/timeout/memory/assertion/error
+        self.logs = logs or []
+        super().__init__(message)
+
+    def __str__(self):
+        message = super().__str__()
+        if self.logs:
+            message += "\n日志:\n" + "\n".join(self.logs[-10:])
+        return message
+
+
+@dataclass(frozen=True)
+class CompiledScript:
+    key: str  # 脚本内容的 sha256
+    source: str
+    code: object
+
+
+def _validate(source: str) -> ast.Module:
+    try:
+        tree = ast.parse(source, filename=script_runtime.SCRIPT_FILENAME)
+    except SyntaxError as e:
+        raise ScriptError(f"第 {e.lineno} 行: 语法错误 {e.msg}", "syntax")
+
+    for node in ast.walk(tree):
+        reason = None
+        if isinstance(node, _FORBIDDEN_NODES):
+            reason = f"不支持 {type(node).__name__}"
+        elif isinstance(node, ast.Name) and node.id.startswith("_"):
+            reason = f"不允许使用名称 {node.id}"
+        elif isinstance(node, ast.Attribute) and (node.attr.startswith("_") or node.attr in _FORBIDDEN_ATTRS):
+            reason = f"不允许访问属性 {node.attr}"
+        elif isinstance(node, (ast.FunctionDef, ast.Lambda)):
+            args = node.args
+            names = [a.arg for a in args.posonlyargs + args.args + args.kwonlyargs]
+            names += [a.arg for a in (args.vararg, args.kwarg) if a is not None]
+            if isinstance(node, ast.FunctionDef):
+                names.append(node.name)
+            bad = next((name for name in names if name.startswith("_")), None)
+            if bad:
+                reason = f"不允许使用名称 {bad}"
+        elif isinstance(node, ast.ExceptHandler) and node.name and node.name.startswith("_"):
+            reason = f"不允许使用名称 {node.name}"
+        elif isinstance(node, ast.MatchClass):
+            # case ValueError(__class__=c) 按属性名取值，等同于访问属性
+            bad = next((a for a in node.kwd_attrs if a.startswith("_") or a in _FORBIDDEN_ATTRS), None)
+            if bad:
+                reason = f"不允许访问属性 {bad}"
+        elif isinstance(node, (ast.MatchAs, ast.MatchStar)) and node.name and node.name.startswith("_"):
+            reason = f"不允许使用名称 {node.name}"
+        elif isinstance(node, ast.MatchMapping) and node.rest and node.rest.startswith("_"):
+            reason = f"不允许使用名称 {node.rest}"
+        elif isinstance(node, (ast.Try, ast.TryStar)) and node.finalbody:
+            # finally 中的 return/break/continue 会吞掉正在抛出的超时异常
+            for child in (n for stmt in node.finalbody for n in ast.walk(stmt)):
+                if isinstance(child, (ast.Return, ast.Break, ast.Continue)):
+                    node = child
+                    reason = f"finally 块中不允许使用 {type(child).__name__.lower()}"
+                    break
+        if reason:
+            raise ScriptError(f"第 {getattr(node, 'lineno', '?')} 行: {reason}", "syntax")
+    return tree
+
+
+_compiled: dict[str, CompiledScript] = {}
+_compiled_lock = threading.Lock()
+
+
+def compile_script(source: str) -> CompiledScript:
+    """
+    校验并编译脚本（按内容缓存）
+
+    Raises:
+        ScriptError: 语法错误或使用了不允许的语法
+    """
+    key = hashlib.sha256(source.encode("utf-8")).hexdigest()
+    script = _compiled.get(key)
+    if script is None:
+        tree = _validate(source)
+        script = CompiledScript(key, source, script_runtime.compile_tree(tree))
+        with _compiled_lock:
+            if len(_compiled) >= _CACHE_SIZE:
+                _compiled.clear()
+            _compiled[key] = script
+    return script
+
+
+def _normalize(value):
+    """转为 JSON 兼容的值（同时复制，脚本修改不影响调用方的对象）"""
+    return json.loads(json.dumps(value, ensure_ascii=False, default=str))
+
+
+class _Worker:
+    """常驻的沙箱子进程"""
+
+    def __init__(self, memory_mb: int):
+        self.process = subprocess.Popen(
+            [sys.executable, "-I", _RUNTIME_PATH, str(memory_mb)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            start_new_session=True,  # 不接收终端的 Ctrl+C
+        )
+        self.known = set()  # 子进程已编译的脚本
+        self._buffer = b""
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.process.stdout, selectors.EVENT_READ)
+
+    def call(self, script: CompiledScript, context: dict, cpu_time_ms: int, timeout: float) -> dict:
+        message = {"key": script.key, "context": context, "cpu_time_ms": cpu_time_ms}
+        if script.key not in self.known:
+            message["source"] = script.source
+        try:
+            self.process.stdin.write(script_runtime.encode(message).encode("utf-8") + b"\n")
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            raise ScriptError("脚本进程异常退出")
+        self.known.add(script.key)
+        return json.loads(self._readline(timeout))
+
+    def _readline(self, timeout: float) -> bytes:
+        deadline = time.monotonic() + timeout
+        fd = self.process.stdout.fileno()
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._selector.select(remaining):
+                raise ScriptError(f"脚本执行超时 (>{timeout}s)", "timeout")
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                try:
+                    returncode = self.process.wait(timeout=1)
+                except subprocess.TimeoutExpired:
+                    returncode = None
+                if returncode == -signal.SIGXCPU:
+                    raise ScriptError("脚本 CPU 时间超过上限，进程已被终止", "timeout")
+                raise ScriptError("脚本进程异常退出（可能超出内存上限）", "memory")
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return line
+
+    def close(self):
+        self._selector.close()
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+    def kill(self):
+        self._selector.close()
+        self.process.kill()
+        self.process.wait()
+
+
+class ScriptPool:
+    """
+    沙箱子进程池
+
+    子进程按需启动、用完归还；执行超时或异常退出的子进程直接杀掉，下次使用时重新启动。
+    """
+
+    def __init__(self, size: int, memory_mb: int, cpu_time_ms: int, timeout: float):
+        self.size = max(1, size)
+        self.memory_mb = memory_mb
+        self.cpu_time_ms = cpu_time_ms
+        self.timeout = timeout
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._idle = []
+
+    def run(self, script: CompiledScript, context: dict) -> dict:
+        """执行脚本，返回协议中的响应消息"""
+        if self._pid != os.getpid():
+            # fork 出的子进程不能与父进程共用沙箱进程
+            self._reset()
+
+        with self._slots:
+            with self._lock:
+                worker = self._idle.pop() if self._idle else None
+            if worker is None or worker.process.poll() is not None:
+                worker = _Worker(self.memory_mb)
+
+            try:
+                response = worker.call(script, context, self.cpu_time_ms, self.timeout)
+            except BaseException:
+                worker.kill()
+                raise
+
+            if len(worker.known) > _WORKER_MAX_SCRIPTS:
+                worker.close()
+            else:
+                with self._lock:
+                    self._idle.append(worker)
+            return response
+
+    def close(self):
+        if self._pid != os.getpid():
+            return
+        with self._lock:
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.close()
+
+
+_pool: ScriptPool | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ScriptPool | None:
+    """进程级沙箱进程池，inline 模式或不支持的平台返回 None"""
+    global _pool
+    if settings.script_sandbox != "process" or os.name != "posix":
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ScriptPool(
+                    size=settings.script_pool_size,
+                    memory_mb=settings.script_memory_mb,
+                    cpu_time_ms=settings.script_cpu_time_ms,
+                    timeout=settings.script_timeout_seconds,
+                )
+                atexit.register(_pool.close)
+    return _pool
+
+
+def _run_sync(script: CompiledScript, context: dict) -> dict:
+    pool = _get_pool()
+    if pool is not None:
+        response = pool.run(script, context)
+    else:
+        response = json.loads(script_runtime.encode(
+            script_runtime.run(script.code, context, settings.script_cpu_time_ms)
+        ))
+    if not response.get("ok"):
+        raise ScriptError(
+            response.get("error") or "脚本执行失败",
+            response.get("error_type") or "error",
+            response.get("logs"),
+        )
+    return response["context"]
+
+
+def _changes(before: dict, after: dict) -> dict:
+    changes = {}
+    for name, original in before.items():
+        value = after.get(name)
+        if not isinstance(value, dict):
+            raise ScriptError(f"{name} 必须是对象")
+        changed = {k: v for k, v in value.items() if k not in original or original[k] != v}
+        if changed:
+            changes[name] = changed
+    return changes
+
+
+async def run_script(source: str, context: dict) -> dict:
+    """
+    执行脚本
+
+    Args:
+        context: 脚本可见的对象 {"vars": {...}, "request"/"response": {...}}，会先复制为 JSON 兼容的值
+
+    Returns:
+        脚本修改或新增的字段 {对象名: {字段: 新值}}，未修改的对象不包含在结果中
+
+    Raises:
+        ScriptError: 校验失败、超时、超出内存或脚本抛出异常
+    """
+    script = compile_script(source)
+    context = _normalize(context)
+    # 子进程池的调用是阻塞的，放到线程中执行，避免阻塞事件循环；脚本在副本上修改
+    after = await asyncio.to_thread(_run_sync, script, _normalize(context))
+    return _changes(context, after)
@@ -0,0 +1,251 @@
+"""
+脚本运行时
+
+执行已通过 AST 校验（见 app.engine.script）的前置/后置脚本。本模块只依赖标准库：
+沙箱进程直接以文件路径启动（python -I script_runtime.py 内存上限MB），不加载 app 包。
+
+CPU 时间由 ITIMER_PROF 限制：超时后信号按间隔重复触发，脚本在 finally 中继续循环时同样被打断；
+沙箱进程另按次设置 RLIMIT_CPU 作为兜底，超出时由内核终止进程。ScriptTimeout 继承 BaseException，
+编译时在每个 except 块开头插入检查，MemoryError 和 ScriptTimeout 不会被脚本的 except 吞掉。
+
+进程协议：stdin/stdout 上每行一个 JSON 消息
+    请求 {"key": 缓存键, "source": 脚本（进程已编译过该键时省略）, "context": {...}, "cpu_time_ms": 1000}
+    响应 {"ok": true, "context": {...}, "logs": [...]}
+         {"ok": false, "error_type": timeout/memory/assertion/error, "error": 错误信息, "logs": [...]}
+"""
+import ast
+import base64
+import builtins
+import datetime
+import hashlib
+import hmac
+import json
+import math
+import random
+import re
+import signal
+import sys
+import threading
+import time
+import traceback
+import uuid
+from types import SimpleNamespace
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SCRIPT_FILENAME = "<script>"
+
+# 超时后信号的重复间隔（秒）
+TIMEOUT_REPEAT_INTERVAL = 0.05
+
+# RLIMIT_CPU 在本次脚本的 CPU 时间上限之外留出的余量（秒）
+CPU_RLIMIT_GRACE = 2
+
+# 插入到每个 except 块开头的检查函数名（脚本不能使用 _ 开头的名称）
+_GUARD = "__sandbox_reraise__"
+
+MAX_LOG_LINES = 100
+MAX_LOG_LENGTH = 1000
+
+SAFE_BUILTINS = {
+    name: getattr(builtins, name)
+    for name in (
+        "abs", "all", "any", "bool", "bytes", "chr", "dict", "divmod", "enumerate", "filter",
+        "float", "hex", "int", "isinstance", "len", "list", "map", "max", "min", "ord", "pow",
+        "range", "repr", "reversed", "round", "set", "sorted", "str", "sum", "tuple", "zip",
+        "Exception", "ValueError", "TypeError", "KeyError", "IndexError", "AssertionError",
+    )
+}
+
+# 只暴露需要的函数，不直接暴露模块（模块属性可以拿到 os、codecs 等）
+MODULES = {
+    "json": SimpleNamespace(loads=json.loads, dumps=json.dumps),
+    "re": SimpleNamespace(
+        search=re.search, match=re.match, fullmatch=re.fullmatch, findall=re.findall,
+        sub=re.sub, split=re.split, escape=re.escape,
+    ),
+    "math": math,
+    "random": SimpleNamespace(
+        random=random.random, randint=random.randint, uniform=random.uniform,
+        choice=random.choice, sample=random.sample, shuffle=random.shuffle,
+    ),
+    "hashlib": SimpleNamespace(
+        md5=hashlib.md5, sha1=hashlib.sha1, sha256=hashlib.sha256, sha512=hashlib.sha512,
+    ),
+    "hmac": SimpleNamespace(new=hmac.new, compare_digest=hmac.compare_digest),
+    "base64": SimpleNamespace(
+        b64encode=base64.b64encode, b64decode=base64.b64decode,
+        urlsafe_b64encode=base64.urlsafe_b64encode, urlsafe_b64decode=base64.urlsafe_b64decode,
+    ),
+    "uuid": SimpleNamespace(uuid4=uuid.uuid4),
+    "time": SimpleNamespace(time=time.time, strftime=time.strftime, localtime=time.localtime),
+    "datetime": SimpleNamespace(
+        datetime=datetime.datetime, date=datetime.date,
+        timedelta=datetime.timedelta, timezone=datetime.timezone,
+    ),
+}
+
+
+class ScriptTimeout(BaseException):
+    """脚本 CPU 时间超过上限（不继承 Exception，脚本的 except Exception 捕获不到）"""
+
+
+_timer_armed = False
+
+
+def _on_cpu_timeout(signum, frame):
+    if _timer_armed:
+        raise ScriptTimeout()
+
+
+def _arm_timer(cpu_time_ms: int):
+    global _timer_armed
+    _timer_armed = True
+    signal.setitimer(signal.ITIMER_PROF, cpu_time_ms / 1000, TIMEOUT_REPEAT_INTERVAL)
+
+
+def _disarm_timer():
+    global _timer_armed
+    _timer_armed = False
+    signal.setitimer(signal.ITIMER_PROF, 0)
+
+
+def _reraise_fatal():
+    """脚本的 except 块捕获到超时或内存不足时继续抛出"""
+    e = sys.exc_info()[1]
+    if isinstance(e, (ScriptTimeout, MemoryError)):
+        raise e
+
+
+class _GuardExceptHandlers(ast.NodeTransformer):
+    def visit_ExceptHandler(self, node):
+        self.generic_visit(node)
+        guard = ast.Expr(ast.Call(func=ast.Name(id=_GUARD, ctx=ast.Load()), args=[], keywords=[]))
+        node.body.insert(0, ast.copy_location(guard, node))
+        ast.fix_missing_locations(node)
+        return node
+
+
+def compile_tree(tree: ast.Module):
+    """编译已校验的脚本 AST，在每个 except 块开头插入 MemoryError/ScriptTimeout 的检查"""
+    return compile(_GuardExceptHandlers().visit(tree), SCRIPT_FILENAME, "exec")
+
+
+def _set_cpu_rlimit(cpu_time_ms: int):
+    """把 RLIMIT_CPU 软限制设为已用 CPU 时间 + 本次上限 + 余量，计时器失效时由内核终止进程"""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = usage.ru_utime + usage.ru_stime
+    soft = math.ceil(used + cpu_time_ms / 1000 + CPU_RLIMIT_GRACE)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _error_line(e: BaseException) -> str:
+    """异常发生在脚本的第几行"""
+    for frame in reversed(traceback.extract_tb(e.__traceback__)):
+        if frame.filename == SCRIPT_FILENAME:
+            return f"第 {frame.lineno} 行: "
+    return ""
+
+
+def run(code, context: dict, cpu_time_ms: int = None) -> dict:
+    """
+    执行编译好的脚本
+
+    脚本可以修改 context 中的对象（vars/request/response），执行结束后原样返回；
+    CPU 时间限制依赖 ITIMER_PROF 信号，只在主线程中生效。
+
+    Returns:
+        协议中的响应消息
+    """
+    logs = []
+
+    def log(*args):
+        if len(logs) < MAX_LOG_LINES:
+            logs.append(" ".join(str(a) for a in args)[:MAX_LOG_LENGTH])
+
+    namespace = {
+        "__builtins__": {**SAFE_BUILTINS, "print": log, _GUARD: _reraise_fatal},
+        **MODULES,
+        "log": log,
+        **context,
+    }
+
+    timer = (
+        bool(cpu_time_ms)
+        and hasattr(signal, "setitimer")
+        and threading.current_thread() is threading.main_thread()
+    )
+    try:
+        if timer:
+            _arm_timer(cpu_time_ms)
+        try:
+            exec(code, namespace)
+        finally:
+            if timer:
+                _disarm_timer()
+    except ScriptTimeout:
+        if timer:
+            _disarm_timer()  # 信号在上面的 finally 中关闭计时器之前到达时
+        return {"ok": False, "error_type": "timeout", "error": f"脚本 CPU 时间超过 {cpu_time_ms}ms", "logs": logs}
+    except MemoryError:
+        return {"ok": False, "error_type": "memory", "error": "脚本内存超过上限", "logs": logs}
+    except AssertionError as e:
+        message = str(e) or "断言失败"
+        return {"ok": False, "error_type": "assertion", "error": _error_line(e) + message, "logs": logs}
+    except Exception as e:
+        return {"ok": False, "error_type": "error", "error": f"{_error_line(e)}{type(e).__name__}: {e}", "logs": logs}
+
+    return {"ok": True, "context": {key: namespace.get(key) for key in context}, "logs": logs}
+
+
+def encode(message: dict) -> str:
+    """协议消息编码为一行 JSON，脚本设置的非 JSON 值转为字符串"""
+    try:
+        return json.dumps(message, ensure_ascii=False, default=str)
+    except (TypeError, ValueError) as e:
+        # 循环引用等
+        return json.dumps({
+            "ok": False,
+            "error_type": "error",
+            "error": f"脚本结果无法序列化: {e}",
+            "logs": message.get("logs", []),
+        }, ensure_ascii=False, default=str)
+
+
+def main():
+    if resource is not None and len(sys.argv) > 1 and int(sys.argv[1]) > 0:
+        limit = int(sys.argv[1]) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if hasattr(signal, "SIGPROF"):
+        signal.signal(signal.SIGPROF, _on_cpu_timeout)
+
+    # stdout 专用于协议，其他输出转到 stderr
+    out = sys.stdout
+    sys.stdout = sys.stderr
+    codes = {}
+
+    for line in sys.stdin:
+        request = json.loads(line)
+        code = codes.get(request["key"])
+        if code is None:
+            try:
+                code = codes[request["key"]] = compile_tree(ast.parse(request["source"], SCRIPT_FILENAME))
+            except (KeyError, SyntaxError) as e:
+                out.write(encode({"ok": False, "error_type": "error", "error": f"脚本编译失败: {e}", "logs": []}) + "\n")
+                out.flush()
+                continue
+        cpu_time_ms = request.get("cpu_time_ms")
+        if resource is not None and cpu_time_ms:
+            _set_cpu_rlimit(cpu_time_ms)
+        out.write(encode(run(code, request["context"], cpu_time_ms)) + "\n")
+        out.flush()
+
+
+if __name__ == "__main__":
+    main()
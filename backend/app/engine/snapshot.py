@@ -0,0 +1,335 @@
+"""
+响应快照比对
+
+基线以规范化的紧凑 JSON（键排序、无空白）保存在断言的 expected_value 中。
+比对时为基线和响应各建一棵 Merkle 树：每个节点的摘要由类型和子节点摘要自底向上计算，
+摘要相同的子树直接跳过，只沿摘要不同的分支向下比较，最终输出结构化差异。
+
+忽略路径用于时间戳、id 等易变字段，支持 $.a.b、$.items[*].id、$..timestamp、['key'] 形式，
+被忽略的节点不参与摘要计算，也不产生差异。
+"""
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from json.encoder import encode_basestring
+
+from app.engine.schema_validator import format_error_path
+
+_ANY = object()
+
+_TOKEN = re.compile(
+    r"""(?P<recurse>\.\.)?(?:
+        \.?(?P<name>[A-Za-z_$][\w$-]*|\*)
+        | \[(?:(?P<index>\d+)|(?P<star>\*)|'(?P<single>[^']*)'|"(?P<double>[^"]*)")\]
+    )""",
+    re.VERBOSE,
+)
+
+
+# 复用编码器：json.dumps 带参数时每次都会新建 JSONEncoder
+_canonical_encoder = json.JSONEncoder(sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def canonical(value) -> str:
+    """规范化的紧凑 JSON，用作基线的存储格式"""
+    return _canonical_encoder.encode(value)
+
+
+def _scalar_text(value) -> str:
+    """标量的规范化 JSON，常见类型直接转换，不经过 JSONEncoder"""
+    t = type(value)
+    if t is str:
+        return encode_basestring(value)
+    if t is int:
+        return int.__repr__(value)
+    if value is None:
+        return "null"
+    if t is bool:
+        return "true" if value else "false"
+    return canonical(value)
+
+
+def parse_ignore_path(path: str) -> tuple:
+    """
+    解析忽略路径为 ((是否递归下降, 键/下标/_ANY), ...)
+
+    Raises:
+        ValueError: 路径格式不支持
+    """
+    path = path.strip()
+    if not path.startswith("$"):
+        raise ValueError(f"忽略路径必须以 $ 开头: {path}")
+    tokens = []
+    pos = 1
+    while pos < len(path):
+        m = _TOKEN.match(path, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f"不支持的忽略路径: {path}")
+        if m.group("name") is not None:
+            # 不带点号的名称只能出现在递归下降之后
+            if not m.group("recurse") and path[pos] != ".":
+                raise ValueError(f"不支持的忽略路径: {path}")
+            key = _ANY if m.group("name") == "*" else m.group("name")
+        elif m.group("index") is not None:
+            key = int(m.group("index"))
+        elif m.group("star") is not None:
+            key = _ANY
+        else:
+            key = m.group("single") if m.group("single") is not None else m.group("double")
+        tokens.append((bool(m.group("recurse")), key))
+        pos = m.end()
+    return tuple(tokens)
+
+
+def parse_ignore_paths(expression: str | None) -> tuple:
+    """断言表达式中的忽略路径，逗号或换行分隔"""
+    if not expression:
+        return ()
+    paths = [p.strip() for p in re.split(r"[,\n]", expression)]
+    return tuple(parse_ignore_path(p) for p in paths if p)
+
+
+class _Ignore:
+    """忽略路径的匹配状态机，状态为 (路径序号, 已匹配的段数)"""
+
+    __slots__ = ("patterns", "_transitions")
+
+    def __init__(self, patterns: tuple):
+        self.patterns = patterns
+        # 同一层的键大多重复出现（数组元素的字段名），状态转移按 (状态, 段) 缓存
+        self._transitions = {}
+
+    def initial(self) -> frozenset:
+        return frozenset((i, 0) for i in range(len(self.patterns)))
+
+    def advance(self, states: frozenset, segment) -> tuple[frozenset, bool]:
+        """
+        Returns:
+            (子节点的状态, 子节点是否被忽略)
+        """
+        key = (states, segment, type(segment))
+        transition = self._transitions.get(key)
+        if transition is None:
+            transition = self._transitions[key] = self._advance(states, segment)
+        return transition
+
+    def _advance(self, states: frozenset, segment) -> tuple[frozenset, bool]:
+        next_states = set()
+        for index, pos in states:
+            pattern = self.patterns[index]
+            recurse, key = pattern[pos]
+            if recurse:
+                next_states.add((index, pos))
+            if key is _ANY or (key == segment and type(key) is type(segment)):
+                if pos + 1 == len(pattern):
+                    return frozenset(), True
+                next_states.add((index, pos + 1))
+        return frozenset(next_states), False
+
+
+# 子树摘要以 \x00 开头，与同一位置上的字符串值区分（摘要碰撞的概率可以忽略）
+_IGNORED = "\x00-"
+
+
+def _container_digest(flat) -> str:
+    """子容器已替换为摘要的对象/数组，整体规范化后求摘要"""
+    return "\x00" + hashlib.blake2b(canonical(flat).encode(), digest_size=16).hexdigest()
+
+
+def _value_digest(value, memo: dict) -> str:
+    """
+    不受忽略路径影响的子树摘要，自底向上计算
+
+    子容器先替换为自己的摘要，再与标量一起规范化一次，每个值只序列化一次；
+    容器的摘要按 id 缓存在 memo 中（树持有根节点的引用，子树对象在树的生命周期内不会被回收），
+    比较时沿差异分支向下取子节点摘要不再重复计算。标量的规范化 JSON 直接作为摘要。
+    """
+    if not isinstance(value, (dict, list)):
+        return _scalar_text(value)
+    digest = memo.get(id(value))
+    if digest is None:
+        if isinstance(value, dict):
+            flat = {
+                key: _value_digest(item, memo) if isinstance(item, (dict, list)) else item
+                for key, item in value.items()
+            }
+        else:
+            flat = [_value_digest(item, memo) if isinstance(item, (dict, list)) else item for item in value]
+        digest = memo[id(value)] = _container_digest(flat)
+    return digest
+
+
+class _Node:
+    """
+    Merkle 树节点（惰性）
+
+    摘要覆盖整棵子树（不含被忽略的节点），自底向上计算，每个值只序列化一次：
+    不受忽略路径影响的子树见 _value_digest，否则由子节点摘要组合。
+    子节点只在比较到摘要不同时才展开。
+    """
+
+    __slots__ = ("value", "ignore", "states", "memo", "_digest", "_children")
+
+    def __init__(self, value, ignore: _Ignore, states: frozenset, memo: dict):
+        self.value = value
+        self.ignore = ignore
+        self.states = states
+        self.memo = memo  # 整棵树共享的容器摘要缓存
+        self._digest = None
+        self._children = None
+
+    @property
+    def digest(self) -> str:
+        if self._digest is None:
+            if self.states and isinstance(self.value, (dict, list)):
+                children = self.children
+                if isinstance(children, dict):
+                    flat = {key: child.digest for key, child in children.items()}
+                else:
+                    # 被忽略的数组元素保留位置，避免后续元素整体错位
+                    flat = [child.digest if child is not None else _IGNORED for child in children]
+                self._digest = _container_digest(flat)
+            else:
+                self._digest = _value_digest(self.value, self.memo)
+        return self._digest
+
+    @property
+    def children(self):
+        """dict 返回 {键: 节点}，list 返回 [节点或 None（被忽略）]，标量返回 None"""
+        if self._children is None:
+            value = self.value
+            if isinstance(value, dict):
+                children = {}
+                for key in sorted(value):
+                    child_states, ignored = self._advance(key)
+                    if not ignored:
+                        children[key] = _Node(value[key], self.ignore, child_states, self.memo)
+                self._children = children
+            elif isinstance(value, list):
+                children = []
+                for i, item in enumerate(value):
+                    child_states, ignored = self._advance(i)
+                    children.append(None if ignored else _Node(item, self.ignore, child_states, self.memo))
+                self._children = children
+        return self._children
+
+    def _advance(self, segment):
+        if not self.states:
+            return self.states, False
+        return self.ignore.advance(self.states, segment)
+
+
+def build_tree(value, ignore: tuple = ()) -> _Node:
+    matcher = _Ignore(ignore)
+    return _Node(value, matcher, matcher.initial(), {})
+
+
+def diff_trees(expected: _Node, actual: _Node, max_diffs: int = 20) -> tuple[int, list[dict]]:
+    """
+    比较两棵树
+
+    Returns:
+        (差异总数, 前 max_diffs 条差异 {"op": changed/added/removed, "path", "expected", "actual"})
+    """
+    diffs = []
+    total = 0
+
+    def report(op: str, path: list, expected_value=None, actual_value=None):
+        nonlocal total
+        total += 1
+        if len(diffs) < max_diffs:
+            entry = {"op": op, "path": format_error_path(path)}
+            if op != "added":
+                entry["expected"] = expected_value
+            if op != "removed":
+                entry["actual"] = actual_value
+            diffs.append(entry)
+
+    def walk(a: _Node, b: _Node, path: list):
+        if a is None or b is None or a.digest == b.digest:
+            return
+        a_children, b_children = a.children, b.children
+        if isinstance(a_children, dict) and isinstance(b_children, dict):
+            for key in sorted(a_children.keys() | b_children.keys()):
+                if key not in b_children:
+                    report("removed", path + [key], expected_value=a_children[key].value)
+                elif key not in a_children:
+                    report("added", path + [key], actual_value=b_children[key].value)
+                else:
+                    walk(a_children[key], b_children[key], path + [key])
+        elif isinstance(a_children, list) and isinstance(b_children, list):
+            common = min(len(a_children), len(b_children))
+            for i in range(common):
+                walk(a_children[i], b_children[i], path + [i])
+            # 被忽略的元素为 None，不产生差异
+            for i in range(common, len(a_children)):
+                if a_children[i] is not None:
+                    report("removed", path + [i], expected_value=a_children[i].value)
+            for i in range(common, len(b_children)):
+                if b_children[i] is not None:
+                    report("added", path + [i], actual_value=b_children[i].value)
+        else:
+            report("changed", path, a.value, b.value)
+
+    walk(expected, actual, [])
+    return total, diffs
+
+
+def format_diff(entry: dict) -> str:
+    """单条差异的紧凑文本"""
+
+    def short(value) -> str:
+        text = json.dumps(value, ensure_ascii=False)
+        return text if len(text) <= 80 else text[:80] + "..."
+
+    if entry["op"] == "added":
+        return f"{entry['path']}: 新增 {short(entry['actual'])}"
+    if entry["op"] == "removed":
+        return f"{entry['path']}: 缺失 {short(entry['expected'])}"
+    return f"{entry['path']}: {short(entry['expected'])} -> {short(entry['actual'])}"
+
+
+class SnapshotCache:
+    """
+    基线 Merkle 树缓存
+
+    按 (基线 sha256, 忽略路径) 缓存解析和建树的结果（LRU），同一个基线只在第一次比对时建树。
+    """
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self._trees = OrderedDict()
+
+    def get(self, baseline_text: str, ignore: tuple) -> _Node:
+        """
+        Raises:
+            ValueError: 基线不是合法的 JSON
+        """
+        key = (hashlib.sha256(baseline_text.encode("utf-8")).hexdigest(), ignore)
+        tree = self._trees.get(key)
+        if tree is not None:
+            self._trees.move_to_end(key)
+            return tree
+
+        try:
+            baseline = json.loads(baseline_text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"基线不是合法的 JSON: {e}")
+        tree = self._trees[key] = build_tree(baseline, ignore)
+        if len(self._trees) > self.max_size:
+            self._trees.popitem(last=False)
+        return tree
+
+
+def compare(baseline_text: str, actual, ignore: tuple = (), max_diffs: int = 20) -> tuple[int, list[dict]]:
+    """比较响应与基线，返回 (差异总数, 前 max_diffs 条差异)"""
+    if not ignore and canonical(actual) == baseline_text:
+        # 大多数执行与基线一致，整体序列化一次即可判定
+        return 0, []
+    expected_tree = snapshots.get(baseline_text, ignore)
+    actual_tree = build_tree(actual, ignore)
+    return diff_trees(expected_tree, actual_tree, max_diffs)
+
+
+snapshots = SnapshotCache()
@@ -0,0 +1,195 @@
+"""
+变量模板编译
+
+模板在第一次渲染时编译为片段列表并缓存：普通文本、变量引用 {{name}}、内置函数 {{$func(参数)}}。
+函数的参数在编译时解析（字符串/数字字面量，或不带引号的变量名），渲染时一次遍历片段即可，
+不再对每个请求重复正则匹配和参数解析。
+
+内置函数（每次出现都重新求值）:
+    $timestamp / $timestamp("ms")      当前时间戳（秒/毫秒）
+    $datetime / $datetime("%Y%m%d")    当前时间，默认格式 %Y-%m-%d %H:%M:%S
+    $uuid                              UUID4
+    $randomInt(min, max)               随机整数（含两端）
+    $randomString(length)              随机字母数字串
+    $md5(text) / $sha256(text)         十六进制摘要
+    $hmac(key, message, "sha256")      HMAC 十六进制摘要，算法默认 sha256
+    $base64(text)                      Base64 编码
+
+未定义的变量、未知函数或参数不合法时保留原文。
+"""
+import base64
+import hashlib
+import hmac
+import random
+import re
+import string
+import time
+import uuid
+from datetime import datetime
+
+_TAG = re.compile(
+    r"""\{\{(?:
+        (?P<name>\w+)
+        | \$(?P<func>\w+)(?:\((?P<args>(?:[^()"']|"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')*)\))?
+    )\}\}""",
+    re.VERBOSE,
+)
+
+_ARG = re.compile(
+    r"""\s*(?:
+        "(?P<double>(?:[^"\\]|\\.)*)"
+        | '(?P<single>(?:[^'\\]|\\.)*)'
+        | (?P<number>-?\d+(?:\.\d+)?)
+        | (?P<name>\w+)
+    )\s*(?:,|$)""",
+    re.VERBOSE,
+)
+
+_ESCAPE = re.compile(r"\\(.)")
+
+_ALPHANUMERIC = string.ascii_letters + string.digits
+
+
+def _timestamp(unit: str = "s") -> int:
+    if unit == "ms":
+        return int(time.time() * 1000)
+    return int(time.time())
+
+
+def _hmac(key, message, algorithm: str = "sha256") -> str:
+    return hmac.new(str(key).encode("utf-8"), str(message).encode("utf-8"), algorithm).hexdigest()
+
+
+# 函数名 -> (实现, 最少参数个数, 最多参数个数)
+FUNCTIONS = {
+    "timestamp": (_timestamp, 0, 1),
+    "datetime": (lambda fmt="%Y-%m-%d %H:%M:%S": datetime.now().strftime(str(fmt)), 0, 1),
+    "uuid": (lambda: str(uuid.uuid4()), 0, 0),
+    "randomInt": (lambda low, high: random.randint(int(low), int(high)), 2, 2),
+    "randomString": (lambda length: "".join(random.choices(_ALPHANUMERIC, k=int(length))), 1, 1),
+    "md5": (lambda text: hashlib.md5(str(text).encode("utf-8")).hexdigest(), 1, 1),
+    "sha256": (lambda text: hashlib.sha256(str(text).encode("utf-8")).hexdigest(), 1, 1),
+    "hmac": (_hmac, 2, 3),
+    "base64": (lambda text: base64.b64encode(str(text).encode("utf-8")).decode("ascii"), 1, 1),
+}
+
+
+def _parse_args(text: str | None) -> list | None:
+    """
+    解析函数参数
+
+    Returns:
+        [(是否变量, 值或变量名)]，格式不合法返回 None
+    """
+    if text is None or not text.strip():
+        return []
+    args = []
+    pos = 0
+    while pos < len(text):
+        m = _ARG.match(text, pos)
+        if not m or m.end() == pos:
+            return None
+        if m.group("number") is not None:
+            number = m.group("number")
+            args.append((False, float(number) if "." in number else int(number)))
+        elif m.group("name") is not None:
+            args.append((True, m.group("name")))
+        else:
+            quoted = m.group("double") if m.group("double") is not None else m.group("single")
+            args.append((False, _ESCAPE.sub(r"\1", quoted)))
+        pos = m.end()
+    return args
+
+
+def _compile_function(name: str, args_text: str | None, original: str):
+    """编译函数调用，返回 render(context) -> str，无法编译时返回 None"""
+    spec = FUNCTIONS.get(name)
+    args = _parse_args(args_text)
+    if spec is None or args is None:
+        return None
+    func, min_args, max_args = spec
+    if not min_args <= len(args) <= max_args:
+        return None
+
+    if not any(is_var for is_var, _ in args):
+        values = [value for _, value in args]
+
+        def render(context: dict) -> str:
+            try:
+                return str(func(*values))
+            except (TypeError, ValueError):
+                return original
+        return render
+
+    def render(context: dict) -> str:
+        values = []
+        for is_var, value in args:
+            if is_var:
+                value = context.get(value)
+                if value is None:
+                    return original
+            values.append(value)
+        try:
+            return str(func(*values))
+        except (TypeError, ValueError):
+            return original
+    return render
+
+
+class Template:
+    """
+    编译后的模板，parts 中字符串原样输出，(变量名, 原文) 按上下文查找，可调用对象为内置函数
+
+    variables 为渲染时会从上下文读取的变量名（包括函数参数中的变量）
+    """
+
+    __slots__ = ("parts", "variables")
+
+    def __init__(self, text: str):
+        parts = []
+        variables = set()
+        pos = 0
+        for m in _TAG.finditer(text):
+            if m.start() > pos:
+                parts.append(text[pos:m.start()])
+            if m.group("name") is not None:
+                parts.append((m.group("name"), m.group(0)))
+                variables.add(m.group("name"))
+            else:
+                render = _compile_function(m.group("func"), m.group("args"), m.group(0))
+                parts.append(render if render is not None else m.group(0))
+                if render is not None:
+                    variables.update(value for is_var, value in _parse_args(m.group("args")) if is_var)
+            pos = m.end()
+        if pos < len(text):
+            parts.append(text[pos:])
+        self.parts = tuple(parts)
+        self.variables = frozenset(variables)
+
+    def render(self, context: dict) -> str:
+        out = []
+        for part in self.parts:
+            if type(part) is str:
+                out.append(part)
+            elif type(part) is tuple:
+                value = context.get(part[0])
+                out.append(part[1] if value is None else str(value))
+            else:
+                out.append(part(context))
+        return "".join(out)
+
+
+# 与 expectation 相同：dict 缓存，超过上限时整体清空
+_CACHE_SIZE = 4096
+_cache: dict[str, Template] = {}
+
+
+def compile_template(text: str) -> Template:
+    """获取编译后的模板（按文本缓存）"""
+    template = _cache.get(text)
+    if template is None:
+        template = Template(text)
+        if len(_cache) >= _CACHE_SIZE:
+            _cache.clear()
+        _cache[text] = template
+    return template
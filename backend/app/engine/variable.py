@@ -1,9 +1,11 @@
 import re
 import json
 
+from app.engine.template import compile_template
+
 
 class VariableEngine:
-    """变量替换引擎，支持 {{variable}} 语法"""
+    """变量替换引擎，支持 {{variable}} 语法和 {{$func(参数)}} 内置函数（见 app.engine.template）"""
 
     PATTERN = re.compile(r'\{\{(\w+)\}\}')
 
@@ -25,18 +27,10 @@ class VariableEngine:
         self.context.update(variables)
 
     def render(self, text: str) -> str:
-        """将 {{var}} 替换为实际值"""
-        if not text:
+        """将 {{var}} 替换为实际值、{{$func()}} 替换为函数结果，未定义的变量保留原样"""
+        if not text or "{{" not in text:
             return text
-
-        def replacer(match):
-            key = match.group(1)
-            value = self.context.get(key)
-            if value is not None:
-                return str(value)
-            return match.group(0)  # 保留原样
-
-        return self.PATTERN.sub(replacer, text)
+        return compile_template(text).render(self.context)
 
     def render_dict(self, data: dict) -> dict:
         """递归替换字典中的变量"""
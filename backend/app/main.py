@@ -4,6 +4,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
 from app.core.exceptions import ApiException
+from app.core.instrumentation import QueryStatsMiddleware, query_metrics
 from app.core.response import error
 from app.api.v1.router import api_router
 
@@ -23,8 +24,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Query-Count", "X-DB-Time-Ms", "X-DB-Slowest-Ms", "Server-Timing"],
 )
 
+# SQL 统计（调试模式下在响应头中返回）
+if settings.sql_instrumentation_enabled:
+    app.add_middleware(QueryStatsMiddleware)
+
 
 @app.exception_handler(ApiException)
 async def api_exception_handler(request: Request, exc: ApiException):
@@ -43,6 +49,15 @@ async def health_check():
     return {"status": "ok", "app": settings.app_name}
 
 
+@app.get("/api/metrics/sql")
+async def sql_metrics(reset: bool = False):
+    """按路由累计的 SQL 统计（当前进程），reset=true 时返回后清空"""
+    routes = query_metrics.snapshot()
+    if reset:
+        query_metrics.reset()
+    return {"enabled": settings.sql_instrumentation_enabled, "routes": routes}
+
+
 @app.get("/")
 async def root():
     return {
@@ -0,0 +1,4 @@
+from app.mock.server import MockRoute, MockServer, route_path
+from app.mock.routes import route_from_case
+
+__all__ = ["MockRoute", "MockServer", "route_path", "route_from_case"]
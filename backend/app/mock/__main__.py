@@ -0,0 +1,54 @@
+"""
+启动 mock 服务
+
+不指定 --project 时作为 mock 服务进程运行（docker compose 中的 mock 服务）：按 API 写入 Redis 的期望状态
+启停各项目的 mock 服务，见 app.mock.manager。指定 --project 时直接启动该项目的 mock 服务，不经过 Redis。
+
+用法（在 backend 目录下）:
+    python -m app.mock
+    python -m app.mock --project 1 [--host 127.0.0.1] [--port 8001]
+"""
+import argparse
+import asyncio
+import logging
+
+from app.config import settings
+from app.core.database import async_session_factory
+from app.mock.manager import serve_managed
+from app.mock.server import MockServer
+from app.services import mock_service
+
+
+async def serve(project_id: int, host: str, port: int):
+    async with async_session_factory() as db:
+        routes = await mock_service.build_routes(db, project_id)
+
+    server = MockServer(routes, host=host, port=port)
+    await server.start()
+    for route in server.routes:
+        print(f"{route.method:7} {route.path:50} {route.status_code}  {route.source:8} #{route.case_id} {route.name}")
+    print(f"\n共 {len(server.routes)} 条路由，mock 服务已启动: {server.url}  (Ctrl+C 停止)")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--project", type=int, help="项目 ID，不指定时作为 mock 服务进程运行")
+    parser.add_argument("--host", default=settings.mock_host, help="监听地址")
+    parser.add_argument("--port", type=int, default=8001, help="监听端口")
+    args = parser.parse_args()
+    try:
+        if args.project is None:
+            logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+            asyncio.run(serve_managed())
+        else:
+            asyncio.run(serve(args.project, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Mock 服务进程
+
+API 进程（可能有多个 worker）不直接监听 mock 端口，只把期望状态写入 Redis；
+由独立的 python -m app.mock 进程（docker compose 中的 mock 服务）按期望状态启停各项目的 MockServer，
+并定期把运行状态（地址、路由、命中次数或启动失败的原因）写回 Redis，API 从 Redis 读取。
+
+Redis 键：
+    apipilot:mock:desired            hash  项目 ID -> {"host", "port", "version"}，API 写入，version 每次启动/重新生成时更新
+    apipilot:mock:state:{项目 ID}     运行状态 JSON，带过期时间，mock 进程定期刷新
+    apipilot:mock:host               mock 进程的心跳，不存在表示 mock 进程未运行
+"""
+import asyncio
+import ipaddress
+import json
+import logging
+import socket
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.mock.server import MockServer
+
+logger = logging.getLogger(__name__)
+
+DESIRED_KEY = "apipilot:mock:desired"
+STATE_KEY = "apipilot:mock:state:{project_id}"
+HOST_KEY = "apipilot:mock:host"
+
+POLL_INTERVAL = 1  # 检查期望状态和刷新运行状态的间隔（秒）
+STATE_TTL = 10  # 运行状态和心跳的过期时间（秒），mock 进程退出后状态自动消失
+ERROR_TTL = 30  # 启动失败状态的保留时间（秒）
+
+
+def port_range() -> range | None:
+    """mock_ports 配置的端口范围，未配置时返回 None"""
+    if not settings.mock_ports:
+        return None
+    low, _, high = settings.mock_ports.partition("-")
+    return range(int(low), int(high or low) + 1)
+
+
+def check_bind(host: str, port: int):
+    """
+    校验通过接口指定的监听地址和端口
+
+    非回环地址需要开启 mock_allow_public_host；配置了 mock_ports 时端口必须在范围内（0 表示在范围内自动选择）
+
+    Raises:
+        ValueError: 不允许的地址或端口
+    """
+    if host and not settings.mock_allow_public_host:
+        try:
+            loopback = host == "localhost" or ipaddress.ip_address(host).is_loopback
+        except ValueError:
+            loopback = False
+        if not loopback:
+            raise ValueError(f"不允许监听非回环地址 {host}（需开启 MOCK_ALLOW_PUBLIC_HOST）")
+    ports = port_range()
+    if ports is not None and port and port not in ports:
+        raise ValueError(f"端口 {port} 不在允许的范围 {settings.mock_ports} 内")
+
+
+def _free_port(host: str, used: set) -> int:
+    """在 mock_ports 范围内选一个空闲端口，未配置范围时返回 0（由系统分配）"""
+    ports = port_range()
+    if ports is None:
+        return 0
+    for port in ports:
+        if port in used:
+            continue
+        with socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET) as sock:
+            try:
+                sock.bind((host, port))
+            except OSError:
+                continue
+        return port
+    raise OSError(f"端口范围 {settings.mock_ports} 内没有空闲端口")
+
+
+def server_state(server: MockServer, version: str) -> dict:
+    return {
+        "version": version,
+        "url": server.url,
+        "host": server.host,
+        "port": server.port,
+        "requests": server.requests,
+        "started_at": server.started_at,
+        "routes": [
+            {
+                "method": route.method,
+                "path": route.path,
+                "status_code": route.status_code,
+                "source": route.source,
+                "case_id": route.case_id,
+                "name": route.name,
+                "requests": route.requests,
+            }
+            for route in server.routes
+        ],
+    }
+
+
+class MockManager:
+    """按 Redis 中的期望状态运行各项目的 mock 服务"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.servers: dict[int, tuple[MockServer, str]] = {}  # 项目 ID -> (服务, version)
+
+    async def run(self):
+        try:
+            while True:
+                try:
+                    await self.redis.set(HOST_KEY, socket.gethostname(), ex=STATE_TTL)
+                    await self.reconcile()
+                    await self.publish()
+                except (RedisError, OSError) as e:
+                    logger.warning(f"mock 服务进程访问 Redis 失败: {e}")
+                await asyncio.sleep(POLL_INTERVAL)
+        finally:
+            for server, _ in self.servers.values():
+                await server.close()
+
+    async def reconcile(self):
+        desired = {
+            int(project_id): json.loads(spec)
+            for project_id, spec in (await self.redis.hgetall(DESIRED_KEY)).items()
+        }
+        for project_id in list(self.servers):
+            if project_id not in desired:
+                server, _ = self.servers.pop(project_id)
+                await server.close()
+                await self.redis.delete(STATE_KEY.format(project_id=project_id))
+                logger.info(f"mock 服务已停止，project_id={project_id}")
+
+        for project_id, spec in desired.items():
+            current = self.servers.get(project_id)
+            if current is not None and current[1] == spec["version"]:
+                continue
+            try:
+                await self._apply(project_id, spec, current)
+            except Exception as e:
+                # 启动失败：撤销期望状态，保留失败原因供 API 返回
+                logger.warning(f"mock 服务启动失败，project_id={project_id}: {e}")
+                await self.redis.hdel(DESIRED_KEY, project_id)
+                await self.redis.set(
+                    STATE_KEY.format(project_id=project_id),
+                    json.dumps({"version": spec["version"], "error": str(e)}, ensure_ascii=False),
+                    ex=ERROR_TTL,
+                )
+
+    async def _apply(self, project_id: int, spec: dict, current):
+        # 延迟导入：mock_service 依赖 app.mock
+        from app.core.database import async_session_factory
+        from app.services import mock_service
+
+        async with async_session_factory() as db:
+            routes = await mock_service.build_routes(db, project_id)
+
+        host = spec.get("host") or settings.mock_host
+        if current is not None:
+            server = current[0]
+            if server.running and server.host == host and spec.get("port") in (None, 0, server.port):
+                # 地址不变时只重新生成路由
+                server.set_routes(routes)
+                self.servers[project_id] = (server, spec["version"])
+                return
+            # 地址变化（或服务已停止）时先关闭旧服务，再按新地址启动；启动失败时不再保留旧服务
+            del self.servers[project_id]
+            await server.close()
+            logger.info(f"mock 服务已关闭，准备按新地址重启，project_id={project_id}, url={server.url}")
+
+        check_bind(spec.get("host"), spec.get("port") or 0)
+        port = spec.get("port") or _free_port(host, {s.port for s, _ in self.servers.values()})
+        server = MockServer(routes, host=host, port=port)
+        await server.start()
+        self.servers[project_id] = (server, spec["version"])
+        logger.info(f"mock 服务已启动，project_id={project_id}, url={server.url}, routes={len(server.routes)}")
+
+    async def publish(self):
+        for project_id, (server, version) in list(self.servers.items()):
+            await self.redis.set(
+                STATE_KEY.format(project_id=project_id),
+                json.dumps(server_state(server, version), ensure_ascii=False),
+                ex=STATE_TTL,
+            )
+
+
+async def serve_managed():
+    redis = aioredis.from_url(settings.redis_url, decode_responses=True)
+    try:
+        await MockManager(redis).run()
+    finally:
+        await redis.aclose()
@@ -0,0 +1,111 @@
+"""
+由用例生成 mock 路由
+
+响应来源按优先级：
+    recorded  用例最近一次执行（优先取通过的执行）的响应，响应体被截断时跳过
+    snapshot  快照断言的基线
+    template  由断言拼出的响应：status_code eq 断言作为状态码，header eq 断言作为响应头，
+              简单路径的 json_path eq 断言按路径写入 JSON 响应体
+"""
+import json
+
+from app.engine.expectation import STRING, parse_literal
+from app.engine.jsonpath import parse_simple_path
+from app.mock.server import MockRoute
+
+
+def _set_path(document, segments: list, value):
+    """按路径段写入值，中间缺失的对象/数组自动创建；与已有值类型冲突时返回原文档"""
+    if not segments:
+        return value
+    root = document
+    if root is None:
+        root = [] if isinstance(segments[0], int) else {}
+    node = root
+    for i, segment in enumerate(segments):
+        last = i == len(segments) - 1
+        child_default = None if last else ([] if isinstance(segments[i + 1], int) else {})
+        if isinstance(segment, int):
+            if not isinstance(node, list) or segment < 0:
+                return document
+            while len(node) <= segment:
+                node.append(None)
+            if last:
+                node[segment] = value
+            elif node[segment] is None:
+                node[segment] = child_default
+            node = node[segment]
+        else:
+            if not isinstance(node, dict):
+                return document
+            if last:
+                node[segment] = value
+            elif node.get(segment) is None:
+                node[segment] = child_default
+            node = node[segment]
+    return root
+
+
+def template_response(assertions: list) -> tuple[int, list, str] | None:
+    """
+    由断言拼出响应
+
+    Returns:
+        (状态码, 响应头, 响应体)；没有任何可用的断言时返回 None
+    """
+    status_code = None
+    headers = []
+    document = None
+    for assertion in assertions:
+        if assertion.operator != "eq":
+            continue
+        expected = assertion.expected_value or ""
+        if assertion.type == "status_code":
+            try:
+                status_code = int(expected)
+            except ValueError:
+                pass
+        elif assertion.type == "header" and assertion.expression:
+            headers.append((assertion.expression, expected))
+        elif assertion.type == "json_path":
+            segments = parse_simple_path(assertion.expression or "")
+            if segments is None:
+                continue
+            kind, value = parse_literal(expected)
+            document = _set_path(document, segments, expected if kind == STRING else value)
+
+    if status_code is None and not headers and document is None:
+        return None
+    body = json.dumps(document if document is not None else {}, ensure_ascii=False)
+    return status_code or 200, headers, body
+
+
+def route_from_case(case, detail=None) -> MockRoute:
+    """
+    生成用例的 mock 路由
+
+    Args:
+        case: TestCase（需要已加载 assertions）
+        detail: 用例最近一次执行的 ExecutionDetail，没有时为 None
+    """
+    common = {"method": case.method, "path": case.path, "case_id": case.id, "name": case.name}
+
+    if detail is not None and not (detail.response_body_meta or {}).get("truncated"):
+        return MockRoute(
+            status_code=detail.response_status_code,
+            headers=list((detail.response_headers or {}).items()),
+            body=detail.response_body or "",
+            source="recorded",
+            **common,
+        )
+
+    assertions = sorted(case.assertions, key=lambda a: a.sort_order)
+    for assertion in assertions:
+        if assertion.type == "snapshot" and assertion.expected_value:
+            return MockRoute(body=assertion.expected_value, source="snapshot", **common)
+
+    template = template_response(assertions)
+    if template is not None:
+        status_code, headers, body = template
+        return MockRoute(status_code=status_code, headers=headers, body=body, source="template", **common)
+    return MockRoute(body="{}", source="template", **common)
@@ -0,0 +1,351 @@
+"""
+Mock HTTP 服务
+
+基于 asyncio.Protocol 的精简 HTTP/1.1 服务（支持 keep-alive 和管线化，请求体只支持 Content-Length），
+不经过 ASGI 框架，单进程每秒可处理数千到上万个请求。
+
+路由由用例的方法和路径生成，路径中的 {{变量}} 段匹配任意值；静态路由按 (方法, 路径) 直接查表，
+含变量的路由按段数分桶后逐条匹配，静态段越多越优先。
+响应头和响应体预先编码为字节串，响应体中含 {{...}} 时每次按路径变量和 query 参数渲染（支持内置函数）。
+所有响应都带 Access-Control-Allow-Origin: *，OPTIONS 请求直接返回 204，前端可以跨域调用。
+"""
+import asyncio
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from app.engine.variable import VariableEngine
+
+_MAX_HEADER_BYTES = 64 * 1024
+_MAX_BODY_BYTES = 16 * 1024 * 1024
+
+# 逐跳头和由 mock 服务自己生成的头
+_SKIP_HEADERS = frozenset((
+    "content-length", "content-encoding", "transfer-encoding", "connection", "keep-alive",
+    "date", "server", "access-control-allow-origin",
+))
+
+_VARIABLE = re.compile(r"\{\{(\w+)\}\}")
+
+_CORS_HEADERS = (
+    b"Access-Control-Allow-Origin: *\r\n"
+    b"Access-Control-Allow-Methods: GET, POST, PUT, PATCH, DELETE, HEAD, OPTIONS\r\n"
+    b"Access-Control-Allow-Headers: *\r\n"
+    b"Access-Control-Max-Age: 86400\r\n"
+)
+
+
+def route_path(path: str) -> str:
+    """
+    用例路径转为路由路径
+
+    去掉协议和主机、开头的 {{base_url}} 一类变量、query 和末尾的 /。
+    """
+    path = (path or "").strip()
+    if path.startswith(("http://", "https://")):
+        path = urlsplit(path).path
+    elif not path.startswith("/") and "/" in path:
+        path = path[path.index("/"):]
+    path = path.split("?", 1)[0].split("#", 1)[0]
+    if not path.startswith("/"):
+        path = "/" + path
+    return path.rstrip("/") or "/"
+
+
+def _compile_segment(segment: str):
+    """
+    Returns:
+        静态段返回 None；整段为变量返回变量名；部分为变量返回正则
+    """
+    if "{{" not in segment:
+        return None
+    m = _VARIABLE.fullmatch(segment)
+    if m:
+        return m.group(1)
+    pattern = ""
+    pos = 0
+    for m in _VARIABLE.finditer(segment):
+        pattern += re.escape(segment[pos:m.start()]) + f"(?P<{m.group(1)}>[^/]+?)"
+        pos = m.end()
+    return re.compile(pattern + re.escape(segment[pos:]) + "$")
+
+
+@dataclass
+class MockRoute:
+    """一条 mock 路由"""
+    method: str
+    path: str  # 用例路径（route_path 处理后）
+    status_code: int = 200
+    headers: list = field(default_factory=list)  # [(头, 值)]
+    body: str = ""
+    source: str = "template"  # recorded: 最近一次执行的响应；snapshot: 快照基线；template: 由断言生成
+    case_id: int = None
+    name: str = ""
+
+    def __post_init__(self):
+        self.method = self.method.upper()
+        self.path = route_path(self.path)
+        parts = self.path.strip("/").split("/") if self.path != "/" else []
+        self.segments = [(part, _compile_segment(part)) for part in parts]
+        self.is_static = all(matcher is None for _, matcher in self.segments)
+        # 静态段多的优先，其次整段变量优先于部分变量
+        self.specificity = (
+            sum(matcher is None for _, matcher in self.segments),
+            sum(isinstance(matcher, str) for _, matcher in self.segments),
+        )
+        self.is_template = "{{" in self.body
+        self.requests = 0
+
+        headers = b""
+        has_type = False
+        for key, value in self.headers:
+            if key.lower() in _SKIP_HEADERS:
+                continue
+            has_type = has_type or key.lower() == "content-type"
+            headers += f"{key}: {value}\r\n".encode("latin-1", errors="replace")
+        if not has_type:
+            headers += b"Content-Type: application/json; charset=utf-8\r\n"
+        if self.case_id is not None:
+            headers += f"X-Mock-Case: {self.case_id}\r\n".encode("ascii")
+        self._head = _status_line(self.status_code) + headers + _CORS_HEADERS
+        self._responses = {}
+
+    def match(self, parts: list) -> dict | None:
+        """按路径段匹配，返回路径变量"""
+        captured = {}
+        for part, (segment, matcher) in zip(parts, self.segments):
+            if matcher is None:
+                if part != segment:
+                    return None
+            elif isinstance(matcher, str):
+                captured[matcher] = part
+            else:
+                m = matcher.match(part)
+                if m is None:
+                    return None
+                captured.update(m.groupdict())
+        return captured
+
+    def response(self, keep_alive: bool, head_only: bool, variables: dict = None) -> bytes:
+        if not self.is_template:
+            key = (keep_alive, head_only)
+            encoded = self._responses.get(key)
+            if encoded is None:
+                encoded = self._responses[key] = self._encode(self.body, keep_alive, head_only)
+            return encoded
+        body = VariableEngine(extracted_vars=variables).render(self.body)
+        return self._encode(body, keep_alive, head_only)
+
+    def _encode(self, body: str, keep_alive: bool, head_only: bool) -> bytes:
+        payload = body.encode("utf-8")
+        return (
+            self._head
+            + (b"" if keep_alive else b"Connection: close\r\n")
+            + b"Content-Length: %d\r\n\r\n" % len(payload)
+            + (b"" if head_only else payload)
+        )
+
+
+def _status_line(status_code: int) -> bytes:
+    try:
+        reason = HTTPStatus(status_code).phrase
+    except ValueError:
+        reason = "Unknown"
+    return f"HTTP/1.1 {status_code} {reason}\r\n".encode("ascii")
+
+
+def _plain_response(status_code: int, message: str, keep_alive: bool = False) -> bytes:
+    payload = json.dumps({"code": status_code, "message": message}, ensure_ascii=False).encode("utf-8")
+    return (
+        _status_line(status_code)
+        + b"Content-Type: application/json; charset=utf-8\r\n"
+        + _CORS_HEADERS
+        + (b"" if keep_alive else b"Connection: close\r\n")
+        + b"Content-Length: %d\r\n\r\n" % len(payload)
+        + payload
+    )
+
+
+class _MockProtocol(asyncio.Protocol):
+    """单个连接：解析请求头，按 Content-Length 读取请求体后立即响应"""
+
+    def __init__(self, server: "MockServer"):
+        self.server = server
+        self.transport = None
+        self.buffer = bytearray()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server.connections.add(self)
+
+    def data_received(self, data: bytes):
+        self.buffer += data
+        while self.transport is not None and not self.transport.is_closing():
+            end = self.buffer.find(b"\r\n\r\n")
+            if end < 0:
+                if len(self.buffer) > _MAX_HEADER_BYTES:
+                    self._fail(431, "请求头过大")
+                return
+
+            lines = bytes(self.buffer[:end]).decode("latin-1").split("\r\n")
+            try:
+                method, target, version = lines[0].split(" ", 2)
+            except ValueError:
+                self._fail(400, "请求行格式错误")
+                return
+            length = 0
+            connection = ""
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                name = name.strip().lower()
+                if name == "content-length":
+                    try:
+                        length = int(value)
+                    except ValueError:
+                        self._fail(400, "Content-Length 格式错误")
+                        return
+                elif name == "transfer-encoding" and value.strip().lower() != "identity":
+                    self._fail(501, "不支持分块传输的请求体")
+                    return
+                elif name == "connection":
+                    connection = value.strip().lower()
+            if length > _MAX_BODY_BYTES:
+                self._fail(413, "请求体过大")
+                return
+            total = end + 4 + length
+            if len(self.buffer) < total:
+                return
+            del self.buffer[:total]  # 请求体不参与匹配，直接丢弃
+
+            if version == "HTTP/1.1":
+                keep_alive = connection != "close"
+            else:
+                keep_alive = connection == "keep-alive"
+            self.transport.write(self.server.respond(method, target, keep_alive))
+            if not keep_alive:
+                self.transport.close()
+                return
+
+    def _fail(self, status_code: int, message: str):
+        self.transport.write(_plain_response(status_code, message))
+        self.transport.close()
+
+    def connection_lost(self, exc):
+        self.transport = None
+        self.server.connections.discard(self)
+
+
+class MockServer:
+    """
+    Mock HTTP 服务
+
+    Args:
+        routes: 路由列表，同一方法和路径重复时保留第一条
+    """
+
+    def __init__(self, routes: list[MockRoute], host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.started_at = None
+        self.connections = set()
+        self._server = None
+        self.set_routes(routes)
+
+    def set_routes(self, routes: list[MockRoute]):
+        """替换路由（运行中也可调用）"""
+        static = {}
+        dynamic = {}
+        kept = []
+        for route in routes:
+            if route.is_static:
+                if (route.method, route.path) in static:
+                    continue
+                static[(route.method, route.path)] = route
+            else:
+                bucket = dynamic.setdefault((route.method, len(route.segments)), [])
+                if any(r.path == route.path for r in bucket):
+                    continue
+                bucket.append(route)
+            kept.append(route)
+        for bucket in dynamic.values():
+            bucket.sort(key=lambda r: r.specificity, reverse=True)
+        self.routes = kept
+        self._static = static
+        self._dynamic = dynamic
+
+    def find(self, method: str, path: str) -> tuple[MockRoute, dict] | tuple[None, None]:
+        """
+        Returns:
+            (路由, 路径变量)，没有匹配时返回 (None, None)
+        """
+        path = path.rstrip("/") or "/"
+        route = self._static.get((method, path))
+        if route is not None:
+            return route, {}
+        parts = [unquote(p) for p in path.strip("/").split("/")] if path != "/" else []
+        for route in self._dynamic.get((method, len(parts)), ()):
+            captured = route.match(parts)
+            if captured is not None:
+                return route, captured
+        return None, None
+
+    def respond(self, method: str, target: str, keep_alive: bool) -> bytes:
+        self.requests += 1
+        method = method.upper()
+        if method == "OPTIONS":
+            return (
+                b"HTTP/1.1 204 No Content\r\n" + _CORS_HEADERS
+                + (b"" if keep_alive else b"Connection: close\r\n")
+                + b"Content-Length: 0\r\n\r\n"
+            )
+
+        path, _, query = target.partition("?")
+        if path.startswith(("http://", "https://")):
+            path = urlsplit(path).path or "/"
+        head_only = method == "HEAD"
+        route, captured = self.find("GET" if head_only else method, path)
+        if route is None:
+            return _plain_response(404, f"没有匹配的 mock 用例: {method} {path}", keep_alive)
+
+        route.requests += 1
+        variables = None
+        if route.is_template:
+            variables = dict(parse_qsl(query, keep_blank_values=True))
+            variables.update(captured)
+        return route.response(keep_alive, head_only, variables)
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(
+            lambda: _MockProtocol(self), self.host, self.port, reuse_address=True
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.started_at = time.time()
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            # keep-alive 连接不会自己断开，wait_closed 会一直等待
+            for connection in list(self.connections):
+                if connection.transport is not None:
+                    connection.transport.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None and self._server.is_serving()
+
+    @property
+    def url(self) -> str:
+        host = "127.0.0.1" if self.host in ("0.0.0.0", "") else self.host
+        return f"http://{host}:{self.port}"
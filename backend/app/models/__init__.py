@@ -2,7 +2,7 @@ from app.models.base import Base, BaseModel, TimestampMixin
 from app.models.project import Project
 from app.models.module import Module
 from app.models.environment import Environment, EnvVariable
-from app.models.test_case import TestCase, Assertion, Extractor
+from app.models.test_case import TestCase, Assertion, Extractor, CaseDataset
 from app.models.test_suite import TestSuite, SuiteCase
 from app.models.schedule import Schedule
 from app.models.execution import TestExecution, ExecutionDetail
@@ -18,6 +18,7 @@ __all__ = [
     "TestCase",
     "Assertion",
     "Extractor",
+    "CaseDataset",
     "TestSuite",
     "SuiteCase",
     "Schedule",
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import String, Text, Integer, Boolean, ForeignKey, DateTime, func
+from sqlalchemy import String, Text, Integer, Boolean, Float, ForeignKey, DateTime, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import BaseModel
@@ -16,6 +16,11 @@ class Environment(BaseModel):
     base_url: Mapped[str] = mapped_column(String(500), nullable=False)
     description: Mapped[str] = mapped_column(Text, nullable=True)
     is_default: Mapped[bool] = mapped_column(Boolean, default=False)
+    # 限流配置：为空表示不限制
+    rate_limit_rps: Mapped[float] = mapped_column(Float, nullable=True)
+    rate_limit_burst: Mapped[int] = mapped_column(Integer, nullable=True)
+    max_concurrency: Mapped[int] = mapped_column(Integer, nullable=True)
+    limit_scope: Mapped[str] = mapped_column(String(20), default="host")  # host/environment
 
     # Relationships
     project = relationship("Project", back_populates="environments")
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import String, Text, Integer, ForeignKey, DateTime, func
+from sqlalchemy import String, Text, Integer, ForeignKey, DateTime, Index, func
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -19,7 +19,11 @@ class TestExecution(BaseModel):
     environment_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("environments.id"), nullable=False
     )
+    parent_execution_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("test_executions.id", ondelete="SET NULL"), nullable=True
+    )
     trigger_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    mode: Mapped[str] = mapped_column(String(20), default="functional")  # functional/load
     status: Mapped[str] = mapped_column(String(20), nullable=False)
     total_count: Mapped[int] = mapped_column(Integer, default=0)
     passed_count: Mapped[int] = mapped_column(Integer, default=0)
@@ -28,6 +32,7 @@ class TestExecution(BaseModel):
     duration_ms: Mapped[int] = mapped_column(Integer, nullable=True)
     started_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
     finished_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    summary: Mapped[dict] = mapped_column(JSONB, nullable=True)  # 压测等模式的聚合结果
 
     # Relationships
     test_suite = relationship("TestSuite", back_populates="test_executions")
@@ -37,6 +42,9 @@ class TestExecution(BaseModel):
 
 class ExecutionDetail(BaseModel):
     __tablename__ = "execution_details"
+    __table_args__ = (
+        Index("ix_execution_details_test_case_id", "test_case_id", "id"),
+    )
 
     execution_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("test_executions.id", ondelete="CASCADE"), nullable=False
@@ -52,10 +60,14 @@ class ExecutionDetail(BaseModel):
     response_status_code: Mapped[int] = mapped_column(Integer, nullable=True)
     response_headers: Mapped[dict] = mapped_column(JSONB, nullable=True)
     response_body: Mapped[str] = mapped_column(Text, nullable=True)
+    response_body_meta: Mapped[dict] = mapped_column(JSONB, nullable=True)  # 响应体被截断时的长度、sha256
     duration_ms: Mapped[int] = mapped_column(Integer, nullable=True)
+    timings: Mapped[dict] = mapped_column(JSONB, nullable=True)  # 分阶段耗时（ms）
     assertion_results: Mapped[dict] = mapped_column(JSONB, nullable=True)
     extractor_results: Mapped[dict] = mapped_column(JSONB, nullable=True)
     error_message: Mapped[str] = mapped_column(Text, nullable=True)
+    attempts: Mapped[list] = mapped_column(JSONB, nullable=True)
+    dataset_results: Mapped[dict] = mapped_column(JSONB, nullable=True)  # 数据驱动执行的按行汇总
     executed_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
 
     # Relationships
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import String, Text, Integer, Boolean, ForeignKey, DateTime, func
+from sqlalchemy import String, Text, Integer, Boolean, ForeignKey, DateTime, LargeBinary, func
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -33,6 +33,9 @@ class TestCase(BaseModel):
     assertions = relationship("Assertion", back_populates="test_case", cascade="all, delete-orphan")
     extractors = relationship("Extractor", back_populates="test_case", cascade="all, delete-orphan")
     suite_cases = relationship("SuiteCase", back_populates="test_case", cascade="all, delete-orphan")
+    dataset = relationship(
+        "CaseDataset", back_populates="test_case", uselist=False, cascade="all, delete-orphan"
+    )
     execution_details = relationship("ExecutionDetail", back_populates="test_case")
 
 
@@ -68,3 +71,22 @@ class Extractor(BaseModel):
 
     # Relationships
     test_case = relationship("TestCase", back_populates="extractors")
+
+
+class CaseDataset(BaseModel):
+    """数据驱动的数据集：zlib 压缩的 NDJSON，每行一组变量"""
+    __tablename__ = "case_datasets"
+
+    test_case_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("test_cases.id", ondelete="CASCADE"), nullable=False, unique=True
+    )
+    filename: Mapped[str] = mapped_column(String(200), nullable=False)
+    format: Mapped[str] = mapped_column(String(10), nullable=False)  # csv/json
+    columns: Mapped[list] = mapped_column(JSONB, default=list)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    raw_size: Mapped[int] = mapped_column(Integer, nullable=False)  # 未压缩的字节数
+    concurrency: Mapped[int] = mapped_column(Integer, default=5)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+    # Relationships
+    test_case = relationship("TestCase", back_populates="dataset")
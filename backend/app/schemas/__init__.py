@@ -30,6 +30,7 @@ from app.schemas.test_case import (
     AssertionCreate,
     AssertionUpdate,
     AssertionResponse,
+    SnapshotBaselineUpdate,
     ExtractorCreate,
     ExtractorUpdate,
     ExtractorResponse,
@@ -38,6 +39,8 @@ from app.schemas.test_case import (
     TestCaseResponse,
     TestCaseListResponse,
     TestCaseDetailResponse,
+    CaseDatasetUpdate,
+    CaseDatasetResponse,
 )
 from app.schemas.test_suite import (
     SuiteCaseCreate,
@@ -59,12 +62,19 @@ from app.schemas.execution import (
     ExecutionDetailResponse,
     ExecuteCaseRequest,
     ExecuteSuiteRequest,
+    RerunFailedRequest,
+    LoadTestRequest,
     DebugExecuteRequest,
     TestExecutionResponse,
     TestExecutionListResponse,
     TestExecutionDetailResponse,
     DebugResponse,
 )
+from app.schemas.mock import (
+    MockServerStart,
+    MockRouteResponse,
+    MockServerResponse,
+)
 
 __all__ = [
     # Common
@@ -95,6 +105,7 @@ __all__ = [
     "AssertionCreate",
     "AssertionUpdate",
     "AssertionResponse",
+    "SnapshotBaselineUpdate",
     "ExtractorCreate",
     "ExtractorUpdate",
     "ExtractorResponse",
@@ -103,6 +114,8 @@ __all__ = [
     "TestCaseResponse",
     "TestCaseListResponse",
     "TestCaseDetailResponse",
+    "CaseDatasetUpdate",
+    "CaseDatasetResponse",
     # TestSuite
     "SuiteCaseCreate",
     "SuiteCaseResponse",
@@ -121,9 +134,15 @@ __all__ = [
     "ExecutionDetailResponse",
     "ExecuteCaseRequest",
     "ExecuteSuiteRequest",
+    "RerunFailedRequest",
+    "LoadTestRequest",
     "DebugExecuteRequest",
     "TestExecutionResponse",
     "TestExecutionListResponse",
     "TestExecutionDetailResponse",
     "DebugResponse",
+    # Mock
+    "MockServerStart",
+    "MockRouteResponse",
+    "MockServerResponse",
 ]
@@ -32,6 +32,10 @@ class EnvironmentCreate(BaseModel):
     base_url: str = Field(..., min_length=1, max_length=500)
     description: str | None = None
     is_default: bool = False
+    rate_limit_rps: float | None = Field(None, gt=0)
+    rate_limit_burst: int | None = Field(None, ge=1)
+    max_concurrency: int | None = Field(None, ge=1)
+    limit_scope: str = Field("host", pattern="^(host|environment)$")
 
 
 class EnvironmentUpdate(BaseModel):
@@ -39,6 +43,10 @@ class EnvironmentUpdate(BaseModel):
     base_url: str | None = Field(None, min_length=1, max_length=500)
     description: str | None = None
     is_default: bool | None = None
+    rate_limit_rps: float | None = Field(None, gt=0)
+    rate_limit_burst: int | None = Field(None, ge=1)
+    max_concurrency: int | None = Field(None, ge=1)
+    limit_scope: str | None = Field(None, pattern="^(host|environment)$")
 
 
 class EnvironmentResponse(BaseModel):
@@ -48,6 +56,10 @@ class EnvironmentResponse(BaseModel):
     base_url: str
     description: str | None
     is_default: bool
+    rate_limit_rps: float | None = None
+    rate_limit_burst: int | None = None
+    max_concurrency: int | None = None
+    limit_scope: str | None = "host"
     created_at: datetime
     updated_at: datetime
 
@@ -1,5 +1,5 @@
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 
 
 # Execution Detail Schemas
@@ -20,6 +20,10 @@ class ExecutionDetailResponse(BaseModel):
     assertion_results: list | None
     extractor_results: dict | None
     error_message: str | None
+    attempts: list | None = None
+    timings: dict | None = None
+    response_body_meta: dict | None = None
+    dataset_results: dict | None = None
     executed_at: datetime | None
 
     model_config = {"from_attributes": True}
@@ -34,6 +38,40 @@ class ExecuteCaseRequest(BaseModel):
 class ExecuteSuiteRequest(BaseModel):
     suite_id: int
     environment_id: int
+    shard_count: int | None = Field(None, ge=1, le=64)  # 分片数，大于 1 时分发到多个 worker
+    recording_mode: str = Field("full", pattern="^(full|aggregate)$")  # aggregate 只保存聚合统计和抽样详情
+
+
+class LoadTestRequest(BaseModel):
+    suite_id: int | None = None
+    test_case_id: int | None = None
+    environment_id: int
+    virtual_users: int = Field(10, ge=1, le=1000)
+    duration_seconds: float | None = Field(60, gt=0, le=86400)  # 持续时间，与 iterations 任一达到即停止
+    # 每个虚拟用户的迭代次数（每次迭代执行全部用例）；开环模式下计划发起 iterations × virtual_users 次
+    iterations: int | None = Field(None, ge=1)
+    ramp_up_seconds: float = Field(0, ge=0)
+    ramp_profile: str = "linear"  # linear/step/instant
+    ramp_steps: int = Field(5, ge=1)
+    target_rps: float | None = Field(None, gt=0)
+    think_time_ms: int = Field(0, ge=0)
+    arrival_rate: float | None = Field(None, gt=0)  # 开环模式：每秒发起的迭代数
+    max_in_flight: int = Field(100, ge=1, le=10000)
+    late_threshold_ms: float = Field(10, ge=0)
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if (self.suite_id is None) == (self.test_case_id is None):
+            raise ValueError("suite_id 和 test_case_id 必须且只能指定一个")
+        if self.duration_seconds is None and self.iterations is None:
+            raise ValueError("duration_seconds 和 iterations 至少指定一个")
+        if self.ramp_profile not in ("linear", "step", "instant"):
+            raise ValueError(f"不支持的加压方式: {self.ramp_profile}")
+        return self
+
+
+class RerunFailedRequest(BaseModel):
+    reuse_variables: bool = True  # 使用原执行提取的变量作为初始上下文
 
 
 class DebugAssertionConfig(BaseModel):
@@ -68,7 +106,9 @@ class TestExecutionResponse(BaseModel):
     suite_id: int | None
     test_case_id: int | None
     environment_id: int
+    parent_execution_id: int | None = None  # 失败重跑时指向原执行记录
     trigger_type: str  # manual/schedule/api
+    mode: str = "functional"  # functional/load
     status: str  # pending/running/passed/failed/error
     total_count: int
     passed_count: int
@@ -77,6 +117,7 @@ class TestExecutionResponse(BaseModel):
     duration_ms: int | None
     started_at: datetime | None
     finished_at: datetime | None
+    summary: dict | None = None
     created_at: datetime
 
     model_config = {"from_attributes": True}
@@ -90,7 +131,9 @@ class TestExecutionListResponse(BaseModel):
     test_case_name: str | None = None
     environment_id: int
     environment_name: str | None = None
+    parent_execution_id: int | None = None
     trigger_type: str
+    mode: str = "functional"
     status: str
     total_count: int
     passed_count: int
@@ -123,3 +166,6 @@ class DebugResponse(BaseModel):
     assertion_results: list = []
     extractor_results: dict = {}
     error_message: str = ""
+    attempts: list = []
+    timings: dict = {}
+    response_body_meta: dict | None = None
@@ -0,0 +1,27 @@
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+
+class MockServerStart(BaseModel):
+    host: str | None = Field(None, description="监听地址，为空时使用 MOCK_HOST；非回环地址需开启 MOCK_ALLOW_PUBLIC_HOST")
+    port: int = Field(0, ge=0, le=65535, description="监听端口，0 表示自动分配（配置了 MOCK_PORTS 时在范围内选择）")
+
+
+class MockRouteResponse(BaseModel):
+    method: str
+    path: str
+    status_code: int
+    source: str  # recorded/snapshot/template
+    case_id: int | None
+    name: str
+    requests: int
+
+
+class MockServerResponse(BaseModel):
+    project_id: int
+    url: str
+    host: str
+    port: int
+    requests: int
+    started_at: datetime | None
+    routes: list[MockRouteResponse]
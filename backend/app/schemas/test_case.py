@@ -5,9 +5,9 @@ from pydantic import BaseModel, Field
 # Assertion Schemas
 class AssertionCreate(BaseModel):
     name: str | None = Field(None, max_length=100)
-    type: str = Field(..., max_length=30)  # status_code/json_path/header/response_time/contains
+    type: str = Field(..., max_length=30)  # status_code/json_path/header/response_time/contains/json_schema/snapshot
     expression: str = Field(..., max_length=500)
-    operator: str = Field(..., max_length=20)  # eq/ne/gt/lt/gte/lte/contains/not_contains/regex
+    operator: str = Field(..., max_length=20)  # eq/ne/gt/lt/gte/lte/contains/not_contains/regex/all/any/none/count_eq/sorted_by/unique
     expected_value: str | None = None
     sort_order: int = 0
 
@@ -21,6 +21,10 @@ class AssertionUpdate(BaseModel):
     sort_order: int | None = None
 
 
+class SnapshotBaselineUpdate(BaseModel):
+    execution_detail_id: int | None = None  # 为空时取该用例最近一次执行结果
+
+
 class AssertionResponse(BaseModel):
     id: int
     test_case_id: int
@@ -139,6 +143,28 @@ class TestCaseListResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+# Dataset Schemas
+class CaseDatasetUpdate(BaseModel):
+    concurrency: int = Field(..., ge=1, le=100)
+
+
+class CaseDatasetResponse(BaseModel):
+    id: int
+    test_case_id: int
+    filename: str
+    format: str
+    columns: list
+    row_count: int
+    raw_size: int
+    compressed_size: int = 0
+    concurrency: int
+    preview: list[dict] = []
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
 class TestCaseDetailResponse(TestCaseResponse):
     assertions: list[AssertionResponse] = []
     extractors: list[ExtractorResponse] = []
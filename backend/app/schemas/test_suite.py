@@ -27,7 +27,7 @@ class SuiteCaseOrderUpdate(BaseModel):
 class TestSuiteCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
     description: str | None = None
-    execution_mode: str = "sequential"  # sequential/parallel
+    execution_mode: str = "sequential"  # sequential/parallel/sharded
 
 
 class TestSuiteUpdate(BaseModel):
@@ -1,3 +1,3 @@
-from app.services import project_service, module_service, environment_service, case_service, suite_service, schedule_service
+from app.services import project_service, module_service, environment_service, case_service, suite_service, schedule_service, mock_service
 
-__all__ = ["project_service", "module_service", "environment_service", "case_service", "suite_service", "schedule_service"]
+__all__ = ["project_service", "module_service", "environment_service", "case_service", "suite_service", "schedule_service", "mock_service"]
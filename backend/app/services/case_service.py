@@ -1,14 +1,21 @@
+import json
+
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.models import TestCase, Assertion, Extractor, Module
+from app.config import settings
+from app.models import TestCase, Assertion, Extractor, Module, ExecutionDetail, CaseDataset
 from app.schemas import (
     TestCaseCreate, TestCaseUpdate,
     AssertionCreate, AssertionUpdate,
-    ExtractorCreate, ExtractorUpdate
+    ExtractorCreate, ExtractorUpdate,
+    CaseDatasetUpdate,
 )
-from app.core.exceptions import NotFoundError
+from app.core.exceptions import NotFoundError, ValidationError
+from app.engine.snapshot import canonical
+from app.engine.dataset import pack_dataset
+from app.engine.script import ScriptError, compile_script
 
 
 # ============ Test Case ============
@@ -61,6 +68,17 @@ async def get_case_by_id(db: AsyncSession, case_id: int, with_details: bool = Fa
     return case
 
 
+def _validate_scripts(data):
+    """保存时校验前置/后置脚本，错误在编辑时就能发现"""
+    for field, label in (("pre_script", "前置脚本"), ("post_script", "后置脚本")):
+        source = getattr(data, field, None)
+        if source and source.strip():
+            try:
+                compile_script(source)
+            except ScriptError as e:
+                raise ValidationError(f"{label}{e}")
+
+
 async def create_case(db: AsyncSession, module_id: int, data: TestCaseCreate):
     # 验证模块存在
     module_stmt = select(Module).where(Module.id == module_id)
@@ -68,6 +86,8 @@ async def create_case(db: AsyncSession, module_id: int, data: TestCaseCreate):
     if not result.scalar_one_or_none():
         raise NotFoundError(message="模块不存在", detail=f"module_id={module_id}")
 
+    _validate_scripts(data)
+
     case = TestCase(module_id=module_id, **data.model_dump())
     db.add(case)
     await db.flush()
@@ -78,6 +98,7 @@ async def create_case(db: AsyncSession, module_id: int, data: TestCaseCreate):
 
 async def update_case(db: AsyncSession, case_id: int, data: TestCaseUpdate):
     case = await get_case_by_id(db, case_id)
+    _validate_scripts(data)
 
     update_data = data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
@@ -146,6 +167,20 @@ async def copy_case(db: AsyncSession, case_id: int):
         )
         db.add(new_extractor)
 
+    # 复制数据集
+    dataset = await get_dataset(db, case_id)
+    if dataset:
+        db.add(CaseDataset(
+            test_case_id=new_case.id,
+            filename=dataset.filename,
+            format=dataset.format,
+            columns=dataset.columns,
+            row_count=dataset.row_count,
+            raw_size=dataset.raw_size,
+            concurrency=dataset.concurrency,
+            data=dataset.data,
+        ))
+
     await db.flush()
     await db.refresh(new_case)
 
@@ -196,6 +231,39 @@ async def delete_assertion(db: AsyncSession, assertion_id: int):
     await db.flush()
 
 
+async def update_snapshot_baseline(db: AsyncSession, assertion_id: int, execution_detail_id: int | None = None):
+    """用执行结果的响应体更新快照断言的基线"""
+    assertion = await get_assertion_by_id(db, assertion_id)
+    if assertion.type != "snapshot":
+        raise ValidationError("只有快照断言可以更新基线")
+
+    stmt = select(ExecutionDetail).where(ExecutionDetail.test_case_id == assertion.test_case_id)
+    if execution_detail_id is not None:
+        stmt = stmt.where(ExecutionDetail.id == execution_detail_id)
+    else:
+        stmt = stmt.order_by(ExecutionDetail.id.desc()).limit(1)
+    result = await db.execute(stmt)
+    detail = result.scalar_one_or_none()
+
+    if not detail:
+        raise NotFoundError(
+            message="执行结果不存在",
+            detail=f"test_case_id={assertion.test_case_id}, execution_detail_id={execution_detail_id}",
+        )
+    if (detail.response_body_meta or {}).get("truncated"):
+        raise ValidationError("响应体已被截断，不能作为基线")
+    try:
+        body = json.loads(detail.response_body or "")
+    except json.JSONDecodeError:
+        raise ValidationError("响应体不是合法的 JSON，不能作为基线")
+
+    assertion.expected_value = canonical(body)
+    await db.flush()
+    await db.refresh(assertion)
+
+    return assertion
+
+
 # ============ Extractor ============
 
 async def get_extractor_by_id(db: AsyncSession, extractor_id: int):
@@ -238,3 +306,74 @@ async def delete_extractor(db: AsyncSession, extractor_id: int):
     extractor = await get_extractor_by_id(db, extractor_id)
     await db.delete(extractor)
     await db.flush()
+
+
+# ============ Dataset ============
+
+async def get_dataset(db: AsyncSession, case_id: int) -> CaseDataset | None:
+    stmt = select(CaseDataset).where(CaseDataset.test_case_id == case_id)
+    result = await db.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def upload_dataset(
+    db: AsyncSession,
+    case_id: int,
+    filename: str,
+    content: bytes,
+    concurrency: int | None = None,
+) -> CaseDataset:
+    """上传数据集（CSV/JSON），已有数据集时替换"""
+    await get_case_by_id(db, case_id)
+
+    if len(content) > settings.dataset_max_upload_bytes:
+        raise ValidationError(f"文件超过 {settings.dataset_max_upload_bytes // 1024 // 1024}MB")
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    data_format = {"csv": "csv", "json": "json", "jsonl": "json", "ndjson": "json"}.get(extension)
+    if not data_format:
+        raise ValidationError("只支持 .csv、.json、.jsonl 文件")
+    try:
+        packed = pack_dataset(content, data_format, settings.dataset_max_rows)
+    except ValueError as e:
+        raise ValidationError(str(e))
+
+    dataset = await get_dataset(db, case_id)
+    if dataset is None:
+        dataset = CaseDataset(
+            test_case_id=case_id,
+            concurrency=concurrency or settings.dataset_default_concurrency,
+        )
+        db.add(dataset)
+    elif concurrency:
+        dataset.concurrency = concurrency
+    dataset.filename = filename[:200]
+    dataset.format = data_format
+    dataset.columns = packed.columns
+    dataset.row_count = packed.row_count
+    dataset.raw_size = packed.raw_size
+    dataset.data = packed.data
+
+    await db.flush()
+    await db.refresh(dataset)
+
+    return dataset
+
+
+async def update_dataset(db: AsyncSession, case_id: int, data: CaseDatasetUpdate) -> CaseDataset:
+    dataset = await get_dataset(db, case_id)
+    if not dataset:
+        raise NotFoundError(message="数据集不存在", detail=f"case_id={case_id}")
+
+    dataset.concurrency = data.concurrency
+    await db.flush()
+    await db.refresh(dataset)
+
+    return dataset
+
+
+async def delete_dataset(db: AsyncSession, case_id: int):
+    dataset = await get_dataset(db, case_id)
+    if not dataset:
+        raise NotFoundError(message="数据集不存在", detail=f"case_id={case_id}")
+    await db.delete(dataset)
+    await db.flush()
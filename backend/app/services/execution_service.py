@@ -7,8 +7,10 @@ from sqlalchemy.orm import selectinload
 from app.models.test_case import TestCase, Assertion, Extractor
 from app.models.environment import Environment, EnvVariable
 from app.models.execution import TestExecution, ExecutionDetail
-from app.engine import TestExecutor, ExecutionResult
-from app.core.exceptions import NotFoundError
+from app.engine import TestExecutor, ExecutionResult, HttpClient
+from app.engine.limiter import LimitConfig
+from app.engine.dataset import dataset_config
+from app.core.exceptions import NotFoundError, ValidationError
 
 
 class ExecutionService:
@@ -17,6 +19,13 @@ class ExecutionService:
     def __init__(self):
         self.executor = TestExecutor()
 
+    def _executor_for(self, environment: Environment) -> TestExecutor:
+        """获取执行器，环境配置了限流时使用带限流的 HTTP 客户端"""
+        limits = LimitConfig.from_environment(environment)
+        if not limits.enabled:
+            return self.executor
+        return TestExecutor(http_client=HttpClient(limits=limits))
+
     async def execute_case(
         self,
         db: AsyncSession,
@@ -68,8 +77,8 @@ class ExecutionService:
         db.add(execution)
         await db.flush()
 
-        # 6. 执行用例
-        exec_result = await self.executor.execute(
+        # 6. 执行用例（配置了数据集时逐行执行）
+        exec_result = await self._executor_for(environment).run_case(
             base_url=environment.base_url,
             test_case=case_config,
             env_vars=env_vars,
@@ -94,6 +103,10 @@ class ExecutionService:
             assertion_results=exec_result.assertion_results,
             extractor_results=exec_result.extractor_results,
             error_message=exec_result.error_message,
+            attempts=exec_result.attempts,
+            timings=exec_result.timings,
+            response_body_meta=exec_result.response_body_meta,
+            dataset_results=exec_result.dataset_results,
             executed_at=finished_at,
         )
         db.add(detail)
@@ -168,20 +181,157 @@ class ExecutionService:
         }
 
         # 执行用例
-        return await self.executor.execute(
+        return await self._executor_for(environment).execute(
             base_url=environment.base_url,
             test_case=case_config,
             env_vars=env_vars,
         )
 
+    async def create_rerun_execution(
+        self,
+        db: AsyncSession,
+        execution_id: int,
+        reuse_variables: bool = True,
+    ) -> tuple[TestExecution, list[int], dict]:
+        """
+        基于已完成的测试集执行，创建只包含失败/错误用例的重跑执行记录
+
+        Args:
+            db: 数据库会话
+            execution_id: 原执行记录 ID
+            reuse_variables: 是否把原执行提取的变量作为重跑的初始上下文
+
+        Returns:
+            (新执行记录, 需要重跑的用例 ID 列表, 初始变量) 元组
+        """
+        stmt = (
+            select(TestExecution)
+            .where(TestExecution.id == execution_id)
+            .options(selectinload(TestExecution.details))
+        )
+        result = await db.execute(stmt)
+        parent = result.scalar_one_or_none()
+        if not parent:
+            raise NotFoundError(f"执行记录不存在: {execution_id}")
+        if not parent.suite_id:
+            raise ValidationError("只支持重跑测试集执行")
+        if parent.mode == "load":
+            raise ValidationError("压测执行没有逐个用例的结果，无法重跑失败用例")
+        if parent.status in ("pending", "running"):
+            raise ValidationError("执行尚未结束，无法重跑")
+
+        details = sorted(parent.details, key=lambda x: x.id)
+        case_ids = []
+        for d in details:
+            if d.status in ("failed", "error") and d.test_case_id is not None and d.test_case_id not in case_ids:
+                case_ids.append(d.test_case_id)
+        # 聚合记录模式下失败详情有保存上限，按聚合统计补全超出上限未保存详情的失败用例
+        for key, case in ((parent.summary or {}).get("cases") or {}).items():
+            if (case.get("failed") or case.get("errors")) and key.isdigit() and int(key) not in case_ids:
+                case_ids.append(int(key))
+        if not case_ids:
+            raise ValidationError("没有失败的用例需要重跑")
+
+        # 沿重跑链合并提取变量，越新的执行优先级越高
+        seed_vars = {}
+        if reuse_variables:
+            for _, chain_details in await self._get_execution_chain(db, parent):
+                for d in sorted(chain_details, key=lambda x: x.id):
+                    if d.extractor_results:
+                        seed_vars.update(d.extractor_results)
+
+        execution = TestExecution(
+            suite_id=parent.suite_id,
+            environment_id=parent.environment_id,
+            parent_execution_id=parent.id,
+            trigger_type="manual",
+            status="pending",
+            total_count=len(case_ids),
+            passed_count=0,
+            failed_count=0,
+            skipped_count=0,
+        )
+        db.add(execution)
+        await db.commit()
+        await db.refresh(execution)
+
+        return execution, case_ids, seed_vars
+
+    async def get_merged_details(self, db: AsyncSession, execution_id: int) -> dict:
+        """
+        获取重跑链的合并结果
+
+        从最初的执行开始，逐个叠加后续重跑的结果，每个用例取最近一次执行的明细
+
+        Args:
+            db: 数据库会话
+            execution_id: 重跑链中任意一次执行的 ID（合并到该执行为止）
+
+        Returns:
+            合并后的统计与明细
+        """
+        execution = await db.get(TestExecution, execution_id)
+        if not execution:
+            raise NotFoundError(f"执行记录不存在: {execution_id}")
+
+        chain = await self._get_execution_chain(db, execution)
+
+        merged = {}
+        for _, details in chain:
+            for d in sorted(details, key=lambda x: x.id):
+                # 用例已删除时 test_case_id 为空，按明细各自保留
+                key = d.test_case_id if d.test_case_id is not None else ("detail", d.id)
+                merged[key] = d
+
+        details = sorted(merged.values(), key=lambda x: x.id)
+        return {
+            "execution_id": execution_id,
+            "execution_ids": [e.id for e, _ in chain],
+            "total_count": len(details),
+            "passed_count": sum(1 for d in details if d.status == "passed"),
+            "failed_count": sum(1 for d in details if d.status == "failed"),
+            "error_count": sum(1 for d in details if d.status == "error"),
+            "details": details,
+        }
+
+    async def _get_execution_chain(
+        self,
+        db: AsyncSession,
+        execution: TestExecution,
+    ) -> list[tuple[TestExecution, list[ExecutionDetail]]]:
+        """沿 parent_execution_id 向上追溯，返回从最初执行到当前执行的链（含明细）"""
+        chain_ids = [execution.id]
+        parent_id = execution.parent_execution_id
+        while parent_id and parent_id not in chain_ids:
+            chain_ids.append(parent_id)
+            parent = await db.get(TestExecution, parent_id)
+            parent_id = parent.parent_execution_id if parent else None
+
+        stmt = (
+            select(TestExecution)
+            .where(TestExecution.id.in_(chain_ids))
+            .options(
+                selectinload(TestExecution.details).selectinload(ExecutionDetail.test_case)
+            )
+        )
+        result = await db.execute(stmt)
+        executions = {e.id: e for e in result.scalars().all()}
+
+        return [
+            (executions[eid], executions[eid].details)
+            for eid in reversed(chain_ids)
+            if eid in executions
+        ]
+
     async def _get_test_case(self, db: AsyncSession, case_id: int) -> TestCase | None:
-        """获取用例（包含断言和提取器）"""
+        """获取用例（包含断言、提取器和数据集）"""
         stmt = (
             select(TestCase)
             .where(TestCase.id == case_id)
             .options(
                 selectinload(TestCase.assertions),
                 selectinload(TestCase.extractors),
+                selectinload(TestCase.dataset),
             )
         )
         result = await db.execute(stmt)
@@ -206,7 +356,11 @@ class ExecutionService:
             "params": test_case.params or {},
             "body_type": test_case.body_type,
             "body_content": test_case.body_content,
+            "pre_script": test_case.pre_script,
+            "post_script": test_case.post_script,
             "timeout": test_case.timeout,
+            "retry_count": test_case.retry_count,
+            "dataset": dataset_config(test_case.dataset),
             "assertions": [
                 {
                     "name": a.name,
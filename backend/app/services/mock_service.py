@@ -0,0 +1,142 @@
+import asyncio
+import json
+import time
+import uuid
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from sqlalchemy import select, func, case as sql_case
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.config import settings
+from app.models import TestCase, Module, Project, ExecutionDetail
+from app.core.exceptions import NotFoundError, ValidationError
+from app.mock import route_from_case
+from app.mock.manager import DESIRED_KEY, HOST_KEY, STATE_KEY, POLL_INTERVAL, check_bind
+
+# mock 服务运行在独立的 python -m app.mock 进程中，API 只通过 Redis 读写期望状态和运行状态
+_WAIT_TIMEOUT = 10 * POLL_INTERVAL  # 等待 mock 进程响应的时间（秒）
+
+_redis_client = None
+
+
+def _redis():
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = aioredis.from_url(settings.redis_url, decode_responses=True)
+    return _redis_client
+
+
+async def build_routes(db: AsyncSession, project_id: int) -> list:
+    """由项目的启用用例生成 mock 路由"""
+    # 验证项目存在
+    project_stmt = select(Project).where(Project.id == project_id)
+    project_result = await db.execute(project_stmt)
+    if not project_result.scalar_one_or_none():
+        raise NotFoundError(message="项目不存在", detail=f"project_id={project_id}")
+
+    stmt = (
+        select(TestCase)
+        .join(Module, TestCase.module_id == Module.id)
+        .where(Module.project_id == project_id, TestCase.is_active.is_(True))
+        .options(selectinload(TestCase.assertions))
+        .order_by(TestCase.id)
+    )
+    result = await db.execute(stmt)
+    cases = result.scalars().all()
+    if not cases:
+        return []
+
+    # 每个用例取一条有响应的执行结果：通过的优先，其次最新的
+    ranked = (
+        select(
+            ExecutionDetail.id,
+            func.row_number().over(
+                partition_by=ExecutionDetail.test_case_id,
+                order_by=(
+                    sql_case((ExecutionDetail.status == "passed", 0), else_=1),
+                    ExecutionDetail.id.desc(),
+                ),
+            ).label("rn"),
+        )
+        .where(
+            ExecutionDetail.test_case_id.in_([c.id for c in cases]),
+            ExecutionDetail.response_status_code > 0,
+        )
+        .subquery()
+    )
+    stmt = select(ExecutionDetail).join(ranked, ExecutionDetail.id == ranked.c.id).where(ranked.c.rn == 1)
+    result = await db.execute(stmt)
+    details = {d.test_case_id: d for d in result.scalars().all()}
+
+    return [route_from_case(c, details.get(c.id)) for c in cases]
+
+
+async def _get_state(project_id: int) -> dict | None:
+    try:
+        state = await _redis().get(STATE_KEY.format(project_id=project_id))
+    except (RedisError, OSError) as e:
+        raise ValidationError("mock 服务状态读取失败", detail=str(e))
+    return json.loads(state) if state else None
+
+
+async def _wait_state(project_id: int, done) -> dict | None:
+    """轮询运行状态直到 done(state) 成立，超时返回 None"""
+    deadline = time.monotonic() + _WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        state = await _get_state(project_id)
+        if done(state):
+            return state
+        await asyncio.sleep(0.1)
+    return None
+
+
+async def start_mock(db: AsyncSession, project_id: int, host: str = None, port: int = 0) -> dict:
+    """
+    启动项目的 mock 服务，已在运行时重新生成路由（监听地址或端口变化时按新地址重启）
+
+    Returns:
+        mock 进程写回的运行状态
+    """
+    project_result = await db.execute(select(Project.id).where(Project.id == project_id))
+    if project_result.scalar_one_or_none() is None:
+        raise NotFoundError(message="项目不存在", detail=f"project_id={project_id}")
+    try:
+        check_bind(host, port)
+    except ValueError as e:
+        raise ValidationError(f"mock 服务启动失败: {e}")
+
+    redis = _redis()
+    version = uuid.uuid4().hex
+    try:
+        if not await redis.exists(HOST_KEY):
+            raise ValidationError("mock 服务进程未运行", detail="请启动 python -m app.mock（docker compose 中的 mock 服务）")
+        await redis.hset(DESIRED_KEY, project_id, json.dumps({"host": host, "port": port, "version": version}))
+    except (RedisError, OSError) as e:
+        raise ValidationError("mock 服务启动失败", detail=str(e))
+
+    state = await _wait_state(project_id, lambda s: s is not None and s.get("version") == version)
+    if state is None:
+        raise ValidationError("mock 服务启动超时", detail="mock 服务进程没有响应")
+    if state.get("error"):
+        raise ValidationError(f"mock 服务启动失败: {state['error']}")
+    return state
+
+
+async def get_mock(project_id: int) -> dict | None:
+    """运行中的 mock 服务状态，未启动时返回 None"""
+    state = await _get_state(project_id)
+    if state is None or state.get("error"):
+        return None
+    return state
+
+
+async def stop_mock(project_id: int):
+    try:
+        removed = await _redis().hdel(DESIRED_KEY, project_id)
+    except (RedisError, OSError) as e:
+        raise ValidationError("mock 服务停止失败", detail=str(e))
+    if not removed and await get_mock(project_id) is None:
+        raise NotFoundError(message="mock 服务未启动", detail=f"project_id={project_id}")
+    await _wait_state(project_id, lambda s: s is None or s.get("error"))
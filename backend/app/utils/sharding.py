@@ -0,0 +1,148 @@
+"""
+测试集分片
+
+把测试集用例按历史耗时切分成 N 个分片，分发到多个 Celery worker 并行执行。
+存在变量依赖（后续用例引用前面用例提取的变量）的用例会被归为同一条链，
+链内保持原有顺序，整体作为一个单元分配到同一个分片。
+"""
+import heapq
+import json
+
+from app.engine.template import compile_template
+
+
+def _strings(value):
+    """dict/list 中的所有字符串值（与 VariableEngine.render_dict 一样不含键）"""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+
+
+def _referenced_variables(case_config: dict) -> set[str]:
+    """
+    获取用例中引用的变量名：{{name}} 以及内置函数参数中的变量，与执行时的模板解析一致
+
+    范围包括请求各部分、断言的期望值（执行时同样渲染，快照基线除外）和提取器的默认值
+    """
+    body = case_config.get("body_content") or ""
+    if case_config.get("body_type") == "json":
+        # JSON 请求体按解析后的字符串值渲染，原文中的引号是转义过的
+        try:
+            body = json.loads(body)
+        except json.JSONDecodeError:
+            pass
+    parts = [case_config.get("path") or ""]
+    for value in (body, case_config.get("headers"), case_config.get("params")):
+        parts.extend(_strings(value))
+    parts += [
+        a.get("expected_value") or ""
+        for a in case_config.get("assertions") or []
+        if a.get("type") != "snapshot"
+    ]
+    parts += [e.get("default_value") or "" for e in case_config.get("extractors") or []]
+    names = set()
+    for part in parts:
+        if "{{" in part:
+            names |= compile_template(part).variables
+    return names
+
+
+def _has_script(case_config: dict) -> bool:
+    return any((case_config.get(key) or "").strip() for key in ("pre_script", "post_script"))
+
+
+def group_dependent_cases(cases: list[tuple[int, dict]]) -> list[list[int]]:
+    """
+    按变量依赖把用例归组
+
+    前置/后置脚本可以读写任意变量：带脚本的用例与之前的所有用例归为一组，
+    之后引用了非提取器产生的变量的用例也归入该组
+
+    Args:
+        cases: 按执行顺序排列的 [(case_id, case_config), ...]
+
+    Returns:
+        用例 ID 分组列表，每组内保持原顺序；无依赖的用例单独成组
+    """
+    parent = {case_id: case_id for case_id, _ in cases}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    producers = {}  # 变量名 -> 最近一次提取该变量的用例
+    script_case = None  # 最近一个带脚本的用例，它之前的用例都已与它同组
+    merged = 0  # 已并入 script_case 所在组的用例数
+    previous = []
+    for case_id, config in cases:
+        if _has_script(config):
+            for earlier in previous[merged:] + ([script_case] if script_case is not None else []):
+                parent[find(earlier)] = find(case_id)
+            script_case = case_id
+            merged = len(previous)
+        for name in _referenced_variables(config):
+            producer = producers.get(name, script_case)
+            if producer is not None:
+                parent[find(case_id)] = find(producer)
+        for extractor in config.get("extractors") or []:
+            if extractor.get("variable_name"):
+                producers[extractor["variable_name"]] = case_id
+        previous.append(case_id)
+
+    groups = {}
+    for case_id, _ in cases:
+        groups.setdefault(find(case_id), []).append(case_id)
+    return list(groups.values())
+
+
+def plan_shards(
+    groups: list[list[int]],
+    durations: dict[int, float],
+    shard_count: int,
+    default_duration: float = None,
+) -> list[list[int]]:
+    """
+    最长处理时间优先（LPT）装箱
+
+    按组的预估耗时从大到小依次放入当前总耗时最小的分片。
+
+    Args:
+        groups: group_dependent_cases 的结果
+        durations: 用例历史平均耗时 {case_id: ms}
+        shard_count: 分片数
+        default_duration: 无历史数据的用例的预估耗时，默认取已知耗时的中位数
+
+    Returns:
+        分片列表（去掉空分片），每个分片是按原顺序排列的用例 ID
+    """
+    if default_duration is None:
+        known = sorted(durations.values())
+        default_duration = known[len(known) // 2] if known else 1.0
+
+    order = {}
+    for group in groups:
+        for case_id in group:
+            order[case_id] = len(order)
+
+    weighted = [
+        (sum(durations.get(case_id, default_duration) for case_id in group), group)
+        for group in groups
+    ]
+    weighted.sort(key=lambda x: x[0], reverse=True)
+
+    shard_count = max(1, min(shard_count, len(groups)))
+    heap = [(0.0, i) for i in range(shard_count)]
+    shards = [[] for _ in range(shard_count)]
+    for weight, group in weighted:
+        load, index = heapq.heappop(heap)
+        shards[index].extend(group)
+        heapq.heappush(heap, (load + weight, index))
+
+    return [sorted(shard, key=order.get) for shard in shards if shard]
@@ -0,0 +1,257 @@
+"""
+API 接口压测
+
+对关键查询接口（执行记录列表、执行明细、统计、模块树、测试集详情等）按固定请求数
+发起并发请求，统计吞吐、延迟分位数和每个请求执行的 SQL 条数及数据库耗时。
+
+默认在进程内通过 httpx.ASGITransport 调用 app（不经过网络和 uvicorn），SQL 由
+app.core.instrumentation 挂在 engine 上的事件计数；--url 指向运行中的服务时只统计吞吐和延迟。
+
+路径参数（项目、测试集、模块、执行记录 ID）从 benchmarks.seed_data 生成的压测数据中
+均匀抽样，没有压测数据时从全部数据中抽样。数据准备：
+    python -m benchmarks.seed_data --reset
+
+结果可以保存为基线（--save-baseline），之后默认与基线比较：吞吐下降、p95 上升超过
+--tolerance 或 SQL 条数增加时列出并以退出码 1 结束。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_api [--requests 200] [--concurrency 10] [--filter stats]
+    python -m benchmarks.bench_api --url http://127.0.0.1:8000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+from sqlalchemy import func, select
+
+from app.core.database import async_session_factory, engine
+from app.core.instrumentation import instrument_engine, track_queries
+from app.main import app
+from app.models import Module, Project, TestExecution, TestSuite
+from benchmarks.seed_data import PREFIX
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "bench_api.json")
+
+# (名称, 路径模板)
+ENDPOINTS = [
+    ("list_executions", "/api/v1/executions?page=1&page_size=20"),
+    ("list_executions_project", "/api/v1/executions?project_id={project_id}&page=1&page_size=20"),
+    ("execution_detail", "/api/v1/executions/{execution_id}"),
+    ("execution_details", "/api/v1/executions/{execution_id}/details"),
+    ("stats_dashboard", "/api/v1/stats/dashboard"),
+    ("stats_trend", "/api/v1/stats/projects/{project_id}/trend?days=30"),
+    ("stats_top_failures", "/api/v1/stats/cases/top-failures?days=30"),
+    ("suite_history", "/api/v1/stats/suites/{suite_id}/history"),
+    ("module_tree", "/api/v1/projects/{project_id}/modules"),
+    ("module_cases", "/api/v1/modules/{module_id}/cases?page=1&page_size=20"),
+    ("suite_list", "/api/v1/projects/{project_id}/suites"),
+    ("suite_detail", "/api/v1/suites/{suite_id}"),
+]
+
+# 指标 -> 数值越大越好
+METRICS = {"rps": True, "p95_ms": False}
+
+
+# ============ 路径参数 ============
+
+def _spread(ids: list, count: int) -> list:
+    """均匀取 count 个"""
+    if len(ids) <= count:
+        return ids
+    step = len(ids) / count
+    return [ids[int(i * step)] for i in range(count)]
+
+
+async def sample_ids(count: int) -> dict:
+    """{参数名: [ID, ...]}"""
+    async with async_session_factory() as db:
+        project_ids = list(await db.scalars(
+            select(Project.id).where(Project.name.like(f"{PREFIX}%")).order_by(Project.id)
+        ))
+        if not project_ids:
+            project_ids = list(await db.scalars(select(Project.id).order_by(Project.id)))
+        suite_ids = list(await db.scalars(
+            select(TestSuite.id).where(TestSuite.project_id.in_(project_ids)).order_by(TestSuite.id)
+        ))
+        module_ids = list(await db.scalars(
+            select(Module.id).where(Module.project_id.in_(project_ids)).order_by(Module.id)
+        ))
+
+        # 执行记录可能有上千万条，按 ID 范围均匀取点后用主键查找
+        execution_ids = []
+        low, high = (await db.execute(
+            select(func.min(TestExecution.id), func.max(TestExecution.id))
+            .where(TestExecution.suite_id.in_(suite_ids))
+        )).one()
+        if low is not None:
+            for i in range(count):
+                point = low + (high - low) * i // count
+                execution_id = await db.scalar(
+                    select(TestExecution.id)
+                    .where(TestExecution.id >= point, TestExecution.suite_id.in_(suite_ids))
+                    .order_by(TestExecution.id)
+                    .limit(1)
+                )
+                if execution_id is not None:
+                    execution_ids.append(execution_id)
+
+    return {
+        "project_id": _spread(project_ids, count),
+        "suite_id": _spread(suite_ids, count),
+        "module_id": _spread(module_ids, count),
+        "execution_id": sorted(set(execution_ids)),
+    }
+
+
+def build_paths(template: str, ids: dict, count: int) -> list[str] | None:
+    """按抽样的 ID 轮流填充路径参数，缺少数据时返回 None"""
+    names = [name for name in ids if "{" + name + "}" in template]
+    if not names:
+        return [template] * count
+    if any(not ids[name] for name in names):
+        return None
+    return [
+        template.format(**{name: ids[name][i % len(ids[name])] for name in names})
+        for i in range(count)
+    ]
+
+
+# ============ 压测 ============
+
+def _percentile(values: list, percent: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent))] if values else 0
+
+
+async def run_endpoint(client: httpx.AsyncClient, paths: list[str], concurrency: int) -> dict:
+    latencies = []
+    queries = []
+    db_times = []
+    errors = []
+    pending = iter(paths)
+
+    async def worker():
+        for path in pending:
+            started = time.perf_counter()
+            with track_queries() as stats:
+                try:
+                    response = await client.get(path)
+                    ok = response.status_code == 200 and response.json().get("code") == 0
+                    if not ok:
+                        errors.append(f"{path}: {response.status_code} {response.text[:200]}")
+                except Exception as e:
+                    errors.append(f"{path}: {type(e).__name__} {e}")
+            latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(stats.count)
+            db_times.append(stats.duration * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.5), 1),
+        "p95_ms": round(_percentile(latencies, 0.95), 1),
+        "p99_ms": round(_percentile(latencies, 0.99), 1),
+        "queries": round(sum(queries) / len(queries), 1),
+        "max_queries": max(queries),
+        "db_ms": round(sum(db_times) / len(db_times), 2),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, count_queries: bool) -> list[str]:
+    """返回超出容差的回归项；SQL 条数只要增加就算回归"""
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if not base.get(metric):
+                continue
+            change = metrics[metric] / base[metric] - 1
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{name} {metric}: {base[metric]} -> {metrics[metric]} ({change:+.0%})")
+        if count_queries and metrics["queries"] > base.get("queries", metrics["queries"]):
+            regressions.append(f"{name} queries: {base['queries']} -> {metrics['queries']}")
+    return regressions
+
+
+async def main_async(args) -> dict:
+    instrument_engine(engine)  # SQL_INSTRUMENTATION_ENABLED=false 时 engine 上没有统计事件
+    ids = await sample_ids(args.samples)
+    print("抽样 ID: " + "，".join(f"{name} {len(values)} 个" for name, values in ids.items()))
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60, limits=httpx.Limits(max_connections=args.concurrency))
+    else:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    results = {}
+    count_queries = not args.url
+    print(f"\n{'接口':<26}{'吞吐':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'SQL/请求':>10}{'最多':>6}{'DB 耗时':>10}{'错误':>6}")
+    try:
+        for name, template in ENDPOINTS:
+            if args.filter not in name:
+                continue
+            paths = build_paths(template, ids, args.requests)
+            if paths is None:
+                print(f"{name:<26}没有可用的数据，跳过")
+                continue
+            await run_endpoint(client, paths[:args.concurrency], args.concurrency)  # 预热
+            metrics = results[name] = await run_endpoint(client, paths, args.concurrency)
+            queries = f"{metrics['queries']:>10}{metrics['max_queries']:>6}{metrics['db_ms']:>8.1f}ms" if count_queries else f"{'-':>10}{'-':>6}{'-':>10}"
+            print(
+                f"{name:<26}{metrics['rps']:>10.1f}{metrics['p50_ms']:>7.1f}ms{metrics['p95_ms']:>7.1f}ms"
+                f"{metrics['p99_ms']:>7.1f}ms{queries}{metrics['errors']:>6}"
+            )
+            if metrics["first_error"]:
+                print(f"    {metrics['first_error']}")
+    finally:
+        await client.aclose()
+        await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="每个接口的请求数")
+    parser.add_argument("--concurrency", type=int, default=10, help="并发客户端数")
+    parser.add_argument("--samples", type=int, default=50, help="每种路径参数抽样的 ID 数")
+    parser.add_argument("--url", default="", help="运行中的服务地址，不指定时在进程内调用 app")
+    parser.add_argument("--filter", default="", help="只压测名称包含该字符串的接口")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的退化比例")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"\n基线已保存: {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, count_queries=not args.url)
+        if regressions:
+            print(f"\n超出容差 {args.tolerance:.0%} 的退化:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\n与基线相比没有超出容差 {args.tolerance:.0%} 的退化")
+
+
+if __name__ == "__main__":
+    main()
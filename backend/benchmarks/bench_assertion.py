@@ -0,0 +1,89 @@
+"""
+断言比较基准测试
+
+对比三种实现在常见断言上的耗时：
+    原有实现   每次调用都对两侧做 str()/float() 转换，正则每次查找
+    编译缓存   每次调用 compile_expectation 取缓存再比较（单个断言的执行路径：assert_all 对每条断言编译一次）
+    已编译     直接调用编译好的比较函数（量词断言逐个元素比较的路径）
+
+加速比按实际执行的路径计算：单个断言为 原有实现 / 编译缓存，量词为 原有实现 / 已编译。
+
+运行前先列出两种实现结果不同的用例（类型化比较带来的预期差异，如 "1" eq 1.0）。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_assertion [--number 200000]
+"""
+import argparse
+import re
+import timeit
+
+from app.engine.expectation import compile_expectation
+
+LEGACY_OPERATORS = {
+    "eq": lambda a, e: str(a) == str(e),
+    "ne": lambda a, e: str(a) != str(e),
+    "gt": lambda a, e: float(a) > float(e),
+    "lt": lambda a, e: float(a) < float(e),
+    "gte": lambda a, e: float(a) >= float(e),
+    "lte": lambda a, e: float(a) <= float(e),
+    "contains": lambda a, e: str(e) in str(a),
+    "not_contains": lambda a, e: str(e) not in str(a),
+    "regex": lambda a, e: bool(re.search(str(e), str(a))),
+    "is_null": lambda a, e: a is None or str(a) == "",
+    "is_not_null": lambda a, e: a is not None and str(a) != "",
+}
+
+# (操作符, 实际值, 期望值)
+CASES = [
+    ("eq", 200, "200"),
+    ("eq", "ok", "ok"),
+    ("eq", 1, "1.0"),
+    ("eq", "1", "1.0"),
+    ("eq", True, "true"),
+    ("eq", None, "null"),
+    ("eq", "123", '"123"'),
+    ("eq", [1, 2], "[1, 2]"),
+    ("ne", 404, "200"),
+    ("gt", 42, "0"),
+    ("lt", 12.5, "1000"),
+    ("gte", "15", "10"),
+    ("contains", "hello world", "world"),
+    ("regex", "order-20240101-0001", r"^order-\d{8}-\d{4}$"),
+    ("is_not_null", "abc", ""),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=200000, help="每个用例的执行次数")
+    args = parser.parse_args()
+
+    print("结果差异（类型化比较）:")
+    for operator, actual, expected in CASES:
+        old = LEGACY_OPERATORS[operator](actual, expected)
+        new = compile_expectation(operator, expected).test(actual)
+        if old != new:
+            print(f"    {operator} {actual!r} {expected!r}: 原有 {old} -> 现在 {new}")
+
+    print(f"\n{'用例':<48}{'原有实现':>10}{'编译缓存':>10}{'已编译':>10}{'单个断言':>10}{'量词':>10}")
+    totals = [0.0, 0.0, 0.0]
+    for operator, actual, expected in CASES:
+        op_func = LEGACY_OPERATORS[operator]
+        test = compile_expectation(operator, expected).test
+        timings = [
+            timeit.timeit(lambda: op_func(actual, expected), number=args.number),
+            timeit.timeit(lambda: compile_expectation(operator, expected).test(actual), number=args.number),
+            timeit.timeit(lambda: test(actual), number=args.number),
+        ]
+        totals = [total + seconds for total, seconds in zip(totals, timings)]
+
+        per_call = lambda seconds: f"{seconds / args.number * 1e9:.0f}ns"
+        label = f"{operator} {actual!r} {expected!r}"
+        speedups = f"{timings[0] / timings[1]:>9.2f}x{timings[0] / timings[2]:>9.2f}x"
+        print(f"{label:<48}{''.join(f'{per_call(s):>10}' for s in timings)}{speedups}")
+    speedups = f"{totals[0] / totals[1]:>9.2f}x{totals[0] / totals[2]:>9.2f}x"
+    print(f"{'合计':<48}{''.join(f'{s:>9.2f}s' for s in totals)}{speedups}")
+
+
+if __name__ == "__main__":
+    main()
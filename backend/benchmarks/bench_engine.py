@@ -0,0 +1,397 @@
+"""
+执行引擎基准测试
+
+在子进程中启动本地 mock 服务（app.mock.MockServer）作为被测接口，测量：
+    micro     VariableEngine 渲染、AssertionEngine / ExtractorEngine 在不同大小响应上的单次耗时
+    executor  TestExecutor 按不同响应大小和并发数发送请求（共享连接池，与压测相同）
+    suite     测试集顺序/并行执行（每个用例新建客户端，与 Celery 任务相同），用例间传递提取的变量
+
+吞吐和 CPU 时间只统计当前进程（mock 服务在子进程中，不占用被测进程的 CPU）；
+内存为场景执行前后进程峰值 RSS 的增量，只作参考，不参与回归判断。
+
+结果可以保存为基线（--save-baseline），之后默认与基线比较：吞吐下降或 CPU 时间上升超过
+--tolerance 时列出并以退出码 1 结束。基线与机器相关，应在同一台机器上生成和比较。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_engine [--requests 2000] [--number 20000] [--repeat 3] [--filter executor]
+    python -m benchmarks.bench_engine --save-baseline
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+import httpx
+
+from app.engine.assertion import AssertionEngine
+from app.engine.executor import TestExecutor
+from app.engine.extractor import ExtractorEngine
+from app.engine.http_client import HttpClient, HttpResponse
+from app.engine.variable import VariableEngine
+from app.mock import MockRoute, MockServer
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "bench_engine.json")
+
+# 指标 -> 数值越大越好
+METRICS = {"rps": True, "us": False, "cpu_ms": False}
+
+
+def _payload(items: int) -> str:
+    return json.dumps({
+        "code": 0,
+        "message": "success",
+        "data": {
+            "total": items,
+            "items": [
+                {"id": i, "name": f"item-{i}", "price": i * 1.5, "tags": ["a", "b"], "active": i % 2 == 0}
+                for i in range(items)
+            ],
+        },
+    })
+
+
+# 响应大小 -> 响应体（约 200B / 20KB / 1MB）
+PAYLOADS = {"small": _payload(1), "medium": _payload(200), "large": _payload(10000)}
+
+
+def _routes() -> list[MockRoute]:
+    routes = [MockRoute(method="GET", path=f"/{size}", body=body) for size, body in PAYLOADS.items()]
+    routes.append(MockRoute(
+        method="POST", path="/login", body=json.dumps({"code": 0, "data": {"token": "t-123", "user_id": 7}}),
+    ))
+    return routes
+
+
+def _serve(queue):
+    """子进程：启动 mock 服务并把端口告诉父进程"""
+    async def serve():
+        server = MockServer(_routes())
+        await server.start()
+        queue.put(server.port)
+        await server.serve_forever()
+    asyncio.run(serve())
+
+
+def start_target() -> tuple[multiprocessing.Process, str]:
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_serve, args=(queue,), daemon=True)
+    process.start()
+    port = queue.get(timeout=30)
+    return process, f"http://127.0.0.1:{port}"
+
+
+# ============ 用例配置 ============
+
+ASSERTIONS = [
+    {"name": "状态码", "type": "status_code", "expression": "", "operator": "eq", "expected_value": "200"},
+    {"name": "code", "type": "json_path", "expression": "$.code", "operator": "eq", "expected_value": "0"},
+    {"name": "首项", "type": "json_path", "expression": "$.data.items[0].id", "operator": "eq", "expected_value": "0"},
+    {"name": "全部 id", "type": "json_path", "expression": "$.data.items[*].id", "operator": "all", "expected_value": "gte 0"},
+    {"name": "类型", "type": "header", "expression": "Content-Type", "operator": "contains", "expected_value": "json"},
+    {"name": "耗时", "type": "response_time", "expression": "", "operator": "lt", "expected_value": "5000"},
+]
+
+EXTRACTORS = [
+    {"source": "body", "expression": "$.data.total", "variable_name": "total", "default_value": None},
+    {"source": "body", "expression": "$.data.items[-1].name", "variable_name": "last_name", "default_value": None},
+    {"source": "header", "expression": "X-Mock-Case", "variable_name": "mock_case", "default_value": ""},
+]
+
+
+def _case(method: str, path: str, **extra) -> dict:
+    case = {
+        "method": method,
+        "path": path,
+        "headers": {},
+        "params": {},
+        "body_type": "none",
+        "body_content": None,
+        "pre_script": None,
+        "post_script": None,
+        "timeout": 30,
+        "retry_count": 0,
+        "dataset": None,
+        "assertions": [],
+        "extractors": [],
+    }
+    case.update(extra)
+    return case
+
+
+LOGIN_CASE = _case(
+    "POST", "/login",
+    headers={"Content-Type": "application/json"},
+    body_type="json",
+    body_content='{"username": "{{username}}", "password": "{{$md5(username)}}", "ts": {{$timestamp}}}',
+    assertions=ASSERTIONS[:2],
+    extractors=[{"source": "body", "expression": "$.data.token", "variable_name": "token", "default_value": None}],
+)
+
+
+def _list_case(size: str) -> dict:
+    return _case(
+        "GET", f"/{size}",
+        headers={"Authorization": "Bearer {{token}}", "X-Request-Id": "{{$uuid}}"},
+        params={"page": "1", "user": "{{username}}"},
+        assertions=ASSERTIONS,
+        extractors=EXTRACTORS,
+    )
+
+
+# ============ 场景 ============
+
+def _response(size: str) -> HttpResponse:
+    return HttpResponse(
+        status_code=200,
+        headers={"content-type": "application/json", "x-mock-case": "1"},
+        body=PAYLOADS[size],
+        cookies={},
+        duration_ms=5,
+    )
+
+
+def micro_scenarios(number: int) -> list[tuple[str, int, object]]:
+    """[(名称, 执行次数, 无参函数)]"""
+    engine = VariableEngine(env_vars={"host": "example.com", "username": "alice"}, extracted_vars={"token": "t-123"})
+    text = "https://{{host}}/api/users/{{username}}?token={{token}}&missing={{missing}}"
+    functions = "{{$timestamp}}-{{$uuid}}-{{$md5(username)}}-{{$randomInt(1, 100)}}"
+    headers = {"Authorization": "Bearer {{token}}", "X-User": "{{username}}", "Accept": "application/json"}
+    assertion_engine = AssertionEngine()
+    extractor_engine = ExtractorEngine()
+
+    scenarios = [
+        ("micro/variable/plain", number, lambda: engine.render(text)),
+        ("micro/variable/functions", number, lambda: engine.render(functions)),
+        ("micro/variable/render_dict", number, lambda: engine.render_dict(headers)),
+    ]
+    # 每次新建响应对象，JSON 解析和 JSONPath 查找的缓存不跨次复用
+    for size, scale in (("small", 1), ("medium", 10), ("large", 500)):
+        scenarios.append((
+            f"micro/assertion/{size}", max(1, number // scale),
+            lambda size=size: assertion_engine.assert_all(_response(size), ASSERTIONS),
+        ))
+        scenarios.append((
+            f"micro/extractor/{size}", max(1, number // scale),
+            lambda size=size: extractor_engine.extract_all(_response(size), EXTRACTORS),
+        ))
+    return scenarios
+
+
+async def run_executor(base_url: str, size: str, concurrency: int, requests: int, shared: bool) -> list:
+    """concurrency 个协程共发送 requests 个请求，返回各请求的耗时（ms）"""
+    client = None
+    if shared:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        client = httpx.AsyncClient(limits=limits)
+    executor = TestExecutor(http_client=HttpClient(client=client))
+    case = _list_case(size)
+    env_vars = {"username": "alice"}
+    durations = []
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            result = await executor.execute(base_url, case, env_vars=env_vars, extracted_vars={"token": "t-123"})
+            if result.status != "passed":
+                raise RuntimeError(f"用例执行失败: {result.error_message or result.assertion_results}")
+            durations.append(result.duration_ms)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        if client is not None:
+            await client.aclose()
+    return durations
+
+
+async def run_suite(base_url: str, cases: int, rounds: int, parallel: bool) -> list:
+    """按 Celery 任务的方式执行测试集：登录后执行 cases - 1 个列表用例"""
+    executor = TestExecutor(http_client=HttpClient())
+    suite = [LOGIN_CASE] + [_list_case("small" if i % 4 else "medium") for i in range(cases - 1)]
+    env_vars = {"username": "alice"}
+    durations = []
+
+    for _ in range(rounds):
+        extracted_vars = {}
+        if parallel:
+            results = await asyncio.gather(*(
+                executor.run_case(base_url, case, env_vars=env_vars, extracted_vars={"token": "t-123"})
+                for case in suite
+            ))
+        else:
+            results = []
+            for case in suite:
+                result = await executor.run_case(base_url, case, env_vars=env_vars, extracted_vars=extracted_vars)
+                extracted_vars.update(result.extractor_results or {})
+                results.append(result)
+        for result in results:
+            if result.status != "passed":
+                raise RuntimeError(f"用例执行失败: {result.error_message or result.assertion_results}")
+            durations.append(result.duration_ms)
+    return durations
+
+
+def request_scenarios(base_url: str, requests: int) -> list[tuple[str, int, object]]:
+    """[(名称, 请求数, 协程工厂)]"""
+    scenarios = []
+    for size, concurrency, scale in (
+        ("small", 1, 1), ("small", 10, 1), ("small", 50, 1),
+        ("medium", 10, 2), ("large", 10, 40),
+    ):
+        count = max(concurrency, requests // scale)
+        scenarios.append((
+            f"executor/{size}/c{concurrency}", count,
+            lambda size=size, concurrency=concurrency, count=count: run_executor(base_url, size, concurrency, count, True),
+        ))
+    count = max(1, requests // 4)
+    scenarios.append((
+        "executor/small/c1-new-client", count,
+        lambda: run_executor(base_url, "small", 1, count, False),
+    ))
+    for cases in (10, 100):
+        rounds = max(1, requests // 4 // cases)
+        for mode in ("sequential", "parallel"):
+            scenarios.append((
+                f"suite/{mode}/{cases}", cases * rounds,
+                lambda cases=cases, rounds=rounds, mode=mode: run_suite(base_url, cases, rounds, mode == "parallel"),
+            ))
+    return scenarios
+
+
+# ============ 测量 ============
+
+def _max_rss_mb() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def _percentile(values: list, percent: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent))] if values else 0
+
+
+def measure_micro(name: str, number: int, func, repeat: int = 3) -> dict:
+    """与 timeit 相同，取 repeat 轮中最快的一轮"""
+    func()  # 预热（编译缓存）
+    rss = _max_rss_mb()
+    elapsed = cpu = float("inf")
+    for _ in range(repeat):
+        cpu_started = time.process_time()
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = min(elapsed, time.perf_counter() - started)
+        cpu = min(cpu, time.process_time() - cpu_started)
+    return {
+        "us": round(elapsed / number * 1e6, 3),
+        "cpu_ms": round(cpu / number * 1000, 6),
+        "rss_mb": round(_max_rss_mb() - rss, 1),
+    }
+
+
+def measure_requests(name: str, count: int, factory) -> dict:
+    asyncio.run(factory())  # 预热（连接、编译缓存）
+    rss = _max_rss_mb()
+    cpu = time.process_time()
+    started = time.perf_counter()
+    durations = asyncio.run(factory())
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu
+    return {
+        "rps": round(len(durations) / elapsed, 1),
+        "cpu_ms": round(cpu / len(durations) * 1000, 4),
+        "p50_ms": _percentile(durations, 0.5),
+        "p95_ms": _percentile(durations, 0.95),
+        "rss_mb": round(_max_rss_mb() - rss, 1),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """返回超出容差的回归项"""
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in metrics or not base.get(metric):
+                continue
+            change = metrics[metric] / base[metric] - 1
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{name} {metric}: {base[metric]} -> {metrics[metric]} ({change:+.0%})")
+    return regressions
+
+
+def _format_change(metrics: dict, base: dict | None) -> str:
+    if not base:
+        return ""
+    for metric in METRICS:
+        if metric in metrics and base.get(metric):
+            return f"{metrics[metric] / base[metric] - 1:+.0%} {metric}"
+    return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="每个请求场景的请求数（大响应场景按比例减少）")
+    parser.add_argument("--number", type=int, default=20000, help="每个 micro 场景的执行次数")
+    parser.add_argument("--repeat", type=int, default=3, help="micro 场景的轮数，取最快的一轮")
+    parser.add_argument("--filter", default="", help="只运行名称包含该字符串的场景")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="允许的退化比例")
+    args = parser.parse_args()
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    process, base_url = start_target()
+    results = {}
+    try:
+        print(f"本地服务: {base_url}\n")
+        print(f"{'场景':<34}{'吞吐/单次':>14}{'CPU/次':>12}{'p50':>8}{'p95':>8}{'内存增量':>10}{'对比基线':>14}")
+        micro = lambda name, n, func: measure_micro(name, n, func, args.repeat)
+        scenarios = [(name, n, func, micro) for name, n, func in micro_scenarios(args.number)]
+        scenarios += [(name, n, func, measure_requests) for name, n, func in request_scenarios(base_url, args.requests)]
+        for name, n, func, measure in scenarios:
+            if args.filter not in name:
+                continue
+            metrics = results[name] = measure(name, n, func)
+            speed = f"{metrics['rps']:.0f} rps" if "rps" in metrics else f"{metrics['us']:.2f}us"
+            print(
+                f"{name:<34}{speed:>14}{metrics['cpu_ms']:>10.3f}ms"
+                f"{metrics.get('p50_ms', ''):>8}{metrics.get('p95_ms', ''):>8}"
+                f"{metrics['rss_mb']:>8.1f}MB{_format_change(metrics, baseline.get(name)):>14}"
+            )
+    finally:
+        process.terminate()
+        process.join()
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"\n基线已保存: {args.baseline}")
+        return
+
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n超出容差 {args.tolerance:.0%} 的退化:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\n与基线相比没有超出容差 {args.tolerance:.0%} 的退化")
+
+
+if __name__ == "__main__":
+    main()
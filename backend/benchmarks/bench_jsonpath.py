@@ -0,0 +1,120 @@
+"""
+JSONPath 取值基准测试
+
+对比三种实现在常见表达式上的耗时：
+    jsonpath_ng      每次 parse + find（原有行为）
+    jsonpath_ng 缓存  parse 结果缓存后 find
+    compile_path     简单路径编译为取值链
+
+运行前先在随机文档上校验 compile_path 与 jsonpath_ng 的结果完全一致。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_jsonpath [--number 20000] [--docs 2000]
+"""
+import argparse
+import json
+import random
+import sys
+import timeit
+
+from jsonpath_ng import parse as jsonpath_parse
+
+from app.engine.jsonpath import MISSING, compile_path
+
+EXPRESSIONS = [
+    "$.data.id",
+    "$.data.user.profile.name",
+    "$.items[0].name",
+    "$.items[2].tags[1]",
+    "$.items[-1].id",
+    "$['data']['user']['id']",
+    "$.items[*].id",
+    "$..id",
+    "$.items[1:3].name",
+]
+
+DOCUMENT = {
+    "code": 0,
+    "data": {
+        "id": 42,
+        "user": {"id": 7, "profile": {"name": "alice", "age": 30}},
+    },
+    "items": [
+        {"id": i, "name": f"item-{i}", "tags": ["a", "b", "c"]}
+        for i in range(20)
+    ],
+}
+
+
+def reference_first(expression: str, data):
+    """原有实现：每次解析表达式，取第一个匹配"""
+    try:
+        matches = jsonpath_parse(expression).find(data)
+    except Exception:
+        return MISSING
+    return matches[0].value if matches else MISSING
+
+
+def _random_value(rng: random.Random, depth: int = 0):
+    r = rng.random()
+    if depth > 4 or r < 0.3:
+        return rng.choice([0, 1, -2.5, "", "abc", None, True, False, [], {}])
+    if r < 0.65:
+        return {rng.choice(["a", "b", "id", "name"]): _random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))}
+    return [_random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+
+
+def _random_expressions(rng: random.Random, count: int) -> list[str]:
+    segments = [".a", ".b", ".id", ".name", "[0]", "[1]", "[-1]", "['a']", '["id"]', "[5]"]
+    expressions = []
+    for _ in range(count):
+        expressions.append("$" + "".join(rng.choice(segments) for _ in range(rng.randint(0, 4))))
+    return expressions + ["$.a[*]", "$..id", "$.a..b", "$.a[0:2]", "$.*.id", "$.a.`parent`", "$.a|$.b"]
+
+
+def check_semantics(docs: int, seed: int = 0) -> int:
+    """在随机文档上比较 compile_path 与 jsonpath_ng，返回不一致的次数"""
+    rng = random.Random(seed)
+    mismatches = 0
+    for _ in range(docs):
+        data = json.loads(json.dumps(_random_value(rng)))
+        for expression in _random_expressions(rng, 10):
+            expected = reference_first(expression, data)
+            compiled = compile_path(expression)
+            actual = compiled.find_first(data) if compiled is not None else MISSING
+            if expected is not actual and expected != actual:
+                mismatches += 1
+                print(f"不一致: {expression} on {json.dumps(data)}: {expected!r} != {actual!r}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="每个表达式的执行次数")
+    parser.add_argument("--docs", type=int, default=2000, help="语义校验使用的随机文档数")
+    args = parser.parse_args()
+
+    mismatches = check_semantics(args.docs)
+    print(f"语义校验: {args.docs} 个随机文档，不一致 {mismatches} 处")
+    if mismatches:
+        sys.exit(1)
+
+    print(f"\n{'表达式':<32}{'jsonpath_ng':>14}{'缓存 parse':>14}{'compile_path':>14}{'加速比':>10}")
+    for expression in EXPRESSIONS:
+        parsed = jsonpath_parse(expression)
+        compiled = compile_path(expression)
+        assert reference_first(expression, DOCUMENT) == compiled.find_first(DOCUMENT)
+
+        baseline = timeit.timeit(lambda: reference_first(expression, DOCUMENT), number=args.number // 10) * 10
+        cached = timeit.timeit(lambda: parsed.find(DOCUMENT), number=args.number)
+        fast = timeit.timeit(lambda: compiled.find_first(DOCUMENT), number=args.number)
+
+        per_call = lambda seconds: f"{seconds / args.number * 1e6:.2f}us"
+        print(
+            f"{expression:<32}{per_call(baseline):>14}{per_call(cached):>14}"
+            f"{per_call(fast):>14}{baseline / fast:>9.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
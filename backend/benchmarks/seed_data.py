@@ -0,0 +1,324 @@
+"""
+数据库压测数据生成
+
+按实际规模生成项目、环境、模块树、用例（含断言和提取器）、测试集、执行记录和执行明细，
+默认 100 个项目、5 万个用例、1000 万条执行明细。全部用 INSERT ... SELECT generate_series
+在数据库内生成，不经过 ORM；取值由行号计算（不使用 random()），同样的参数生成同样的数据。
+
+执行记录的 created_at 分布在最近 --days 天内，统计接口（趋势、失败 Top N）都能查到数据；
+约 5% 的执行明细为失败，执行记录的通过/失败数按明细汇总。
+执行明细按执行记录 ID 分批插入，每批单独提交。
+
+生成的项目名称以 bench-project- 开头，--reset 删除这些项目及其执行记录后重新生成。
+
+用法（在 backend 目录下，先执行 alembic upgrade head）:
+    python -m benchmarks.seed_data [--projects 100] [--cases 50000] [--details 10000000]
+    python -m benchmarks.seed_data --scale 0.01 --reset
+"""
+import argparse
+import asyncio
+import math
+import time
+
+from sqlalchemy import text
+
+from app.core.database import engine
+
+PREFIX = "bench-project-"
+_NAMES = {"prefix": PREFIX, "pattern": PREFIX + "%"}
+
+_BENCH_PROJECTS = "SELECT id FROM projects WHERE name LIKE :pattern"
+_BENCH_MODULES = f"SELECT id, project_id FROM modules WHERE project_id IN ({_BENCH_PROJECTS})"
+
+SEED_PROJECTS = """
+INSERT INTO projects (name, description, created_at, updated_at)
+SELECT :prefix || g::text, '压测数据', now(), now()
+FROM generate_series(1, :projects) g
+"""
+
+SEED_ENVIRONMENTS = f"""
+INSERT INTO environments (project_id, name, base_url, description, is_default, limit_scope, created_at, updated_at)
+SELECT p.id, '压测环境', 'http://127.0.0.1:8001', NULL, true, 'host', now(), now()
+FROM ({_BENCH_PROJECTS}) p
+"""
+
+SEED_ROOT_MODULES = f"""
+INSERT INTO modules (project_id, name, parent_id, sort_order, created_at, updated_at)
+SELECT p.id, '模块-' || g, NULL, g, now(), now()
+FROM ({_BENCH_PROJECTS}) p CROSS JOIN generate_series(1, :roots) g
+"""
+
+SEED_CHILD_MODULES = f"""
+INSERT INTO modules (project_id, name, parent_id, sort_order, created_at, updated_at)
+SELECT m.project_id, m.name || '-' || g, m.id, g, now(), now()
+FROM modules m CROSS JOIN generate_series(1, :children) g
+WHERE m.parent_id IS NULL AND m.project_id IN ({_BENCH_PROJECTS})
+"""
+
+# 每个模块 per_module 个用例，按 (g, 模块) 排序后截断到 :cases，用例均匀分布在各模块
+SEED_CASES = f"""
+INSERT INTO test_cases (
+    module_id, name, method, path, headers, params, body_type, body_content,
+    timeout, retry_count, is_active, sort_order, created_at, updated_at
+)
+SELECT
+    m.id,
+    '用例-' || m.id || '-' || g,
+    (ARRAY['GET', 'POST', 'PUT', 'DELETE'])[1 + g % 4],
+    '/api/v1/resources/' || m.id || '/items/' || g,
+    '{{"Content-Type": "application/json", "Authorization": "Bearer {{{{token}}}}"}}'::jsonb,
+    '{{"page": "1", "page_size": "20"}}'::jsonb,
+    CASE WHEN g % 4 IN (1, 2) THEN 'json' ELSE 'none' END,
+    CASE WHEN g % 4 IN (1, 2) THEN '{{"name": "item-' || g || '", "count": ' || g || '}}' END,
+    30, 0, g % 50 <> 0, g, now(), now()
+FROM ({_BENCH_MODULES}) m CROSS JOIN generate_series(1, :per_module) g
+ORDER BY g, m.id
+LIMIT :cases
+"""
+
+_BENCH_CASES = f"""
+SELECT c.id, m.project_id FROM test_cases c JOIN ({_BENCH_MODULES}) m ON m.id = c.module_id
+"""
+
+SEED_ASSERTIONS = f"""
+INSERT INTO assertions (test_case_id, name, type, expression, operator, expected_value, sort_order, created_at, updated_at)
+SELECT c.id, a.name, a.type, a.expression, a.operator, a.expected_value, a.sort_order, now(), now()
+FROM ({_BENCH_CASES}) c
+CROSS JOIN (VALUES
+    ('状态码', 'status_code', '', 'eq', '200', 0),
+    ('业务码', 'json_path', '$.code', 'eq', '0', 1),
+    ('响应时间', 'response_time', '', 'lt', '1000', 2)
+) AS a(name, type, expression, operator, expected_value, sort_order)
+"""
+
+SEED_EXTRACTORS = f"""
+INSERT INTO extractors (test_case_id, name, source, expression, variable_name, default_value, sort_order, created_at, updated_at)
+SELECT c.id, '资源 ID', 'body', '$.data.id', 'resource_id', NULL, 0, now(), now()
+FROM ({_BENCH_CASES}) c
+"""
+
+SEED_SUITES = f"""
+INSERT INTO test_suites (project_id, name, description, execution_mode, created_at, updated_at)
+SELECT p.id, '测试集-' || g, NULL, CASE WHEN g % 2 = 0 THEN 'parallel' ELSE 'sequential' END, now(), now()
+FROM ({_BENCH_PROJECTS}) p CROSS JOIN generate_series(1, :suites) g
+"""
+
+# 项目的第 k 个测试集包含该项目第 (k-1)*size+1 到 k*size 个用例
+SEED_SUITE_CASES = f"""
+INSERT INTO suite_cases (suite_id, test_case_id, sort_order, created_at, updated_at)
+SELECT s.id, c.id, c.rn - (s.k - 1) * :size, now(), now()
+FROM (
+    SELECT id, project_id, row_number() OVER (PARTITION BY project_id ORDER BY id) AS k
+    FROM test_suites WHERE project_id IN ({_BENCH_PROJECTS})
+) s
+JOIN (
+    SELECT id, project_id, row_number() OVER (PARTITION BY project_id ORDER BY id) AS rn
+    FROM ({_BENCH_CASES}) bc
+) c ON c.project_id = s.project_id AND c.rn > (s.k - 1) * :size AND c.rn <= s.k * :size
+"""
+
+COUNT_SUITE_CASES = f"""
+SELECT count(*) FROM suite_cases
+WHERE suite_id IN (SELECT id FROM test_suites WHERE project_id IN ({_BENCH_PROJECTS}))
+"""
+
+# 执行时间按行号散列到最近 :days 天内
+SEED_EXECUTIONS = f"""
+INSERT INTO test_executions (
+    suite_id, environment_id, trigger_type, mode, status,
+    total_count, passed_count, failed_count, skipped_count, duration_ms,
+    started_at, finished_at, created_at, updated_at
+)
+SELECT
+    s.id, e.id, (ARRAY['manual', 'schedule', 'api'])[1 + g % 3], 'functional', 'passed',
+    sc.n, sc.n, 0, 0, 0,
+    t.ts, t.ts + interval '1 minute', t.ts, t.ts
+FROM test_suites s
+JOIN environments e ON e.project_id = s.project_id
+JOIN (SELECT suite_id, count(*) AS n FROM suite_cases GROUP BY suite_id) sc ON sc.suite_id = s.id
+CROSS JOIN generate_series(1, :per_suite) g
+CROSS JOIN LATERAL (
+    SELECT now() - ((g::bigint * 7919 + s.id::bigint * 104729) % (:days * 86400)) * interval '1 second' AS ts
+) t
+WHERE s.project_id IN ({_BENCH_PROJECTS})
+ORDER BY t.ts
+"""
+
+EXECUTION_RANGE = f"""
+SELECT min(id), max(id) FROM test_executions
+WHERE environment_id IN (SELECT id FROM environments WHERE project_id IN ({_BENCH_PROJECTS}))
+"""
+
+SEED_DETAILS = """
+INSERT INTO execution_details (
+    execution_id, test_case_id, status, request_url, request_method, request_headers, request_body,
+    response_status_code, response_headers, response_body, duration_ms, timings,
+    assertion_results, extractor_results, error_message, executed_at, created_at, updated_at
+)
+SELECT
+    ex.id, c.id, d.status,
+    'http://127.0.0.1:8001' || c.path, c.method, c.headers, c.body_content,
+    d.code,
+    '{"content-type": "application/json; charset=utf-8", "server": "nginx"}'::jsonb,
+    '{"code": ' || CASE WHEN d.failed THEN '500' ELSE '0' END
+        || ', "message": "' || CASE WHEN d.failed THEN 'error' ELSE 'success' END
+        || '", "data": {"id": ' || c.id || ', "name": "item-' || c.id || '", "items": [1, 2, 3]}}',
+    d.duration,
+    jsonb_build_object('dns', 0, 'connect', 1, 'tls', 0, 'send', 0, 'wait', d.duration - 2, 'receive', 1),
+    jsonb_build_array(
+        jsonb_build_object(
+            'name', '状态码', 'passed', NOT d.failed, 'actual_value', d.code::text, 'expected_value', '200',
+            'message', CASE WHEN d.failed THEN '断言失败: 实际值 [500] 等于 期望值 [200]' ELSE '断言通过: 200 等于 200' END
+        ),
+        jsonb_build_object(
+            'name', '响应时间', 'passed', true, 'actual_value', d.duration::text, 'expected_value', '1000',
+            'message', '断言通过: ' || d.duration || ' 小于 1000'
+        )
+    ),
+    jsonb_build_object('resource_id', c.id::text),
+    CASE WHEN d.failed THEN '断言失败' END,
+    ex.created_at + sc.sort_order * interval '100 milliseconds',
+    ex.created_at + sc.sort_order * interval '100 milliseconds',
+    ex.created_at + sc.sort_order * interval '100 milliseconds'
+FROM test_executions ex
+JOIN suite_cases sc ON sc.suite_id = ex.suite_id
+JOIN test_cases c ON c.id = sc.test_case_id
+CROSS JOIN LATERAL (
+    SELECT
+        (ex.id::bigint * 31 + c.id) % 20 = 0 AS failed,
+        CASE WHEN (ex.id::bigint * 31 + c.id) % 20 = 0 THEN 500 ELSE 200 END AS code,
+        CASE WHEN (ex.id::bigint * 31 + c.id) % 20 = 0 THEN 'failed' ELSE 'passed' END AS status,
+        20 + (ex.id::bigint * 7 + c.id) % 300 AS duration
+) d
+WHERE ex.id BETWEEN :low AND :high
+"""
+
+UPDATE_EXECUTIONS = """
+UPDATE test_executions ex
+SET passed_count = a.passed,
+    failed_count = a.failed,
+    status = CASE WHEN a.failed > 0 THEN 'failed' ELSE 'passed' END,
+    duration_ms = a.duration
+FROM (
+    SELECT execution_id,
+           count(*) FILTER (WHERE status = 'passed') AS passed,
+           count(*) FILTER (WHERE status <> 'passed') AS failed,
+           sum(duration_ms) AS duration
+    FROM execution_details
+    WHERE execution_id BETWEEN :low AND :high
+    GROUP BY execution_id
+) a
+WHERE ex.id = a.execution_id
+"""
+
+RESET_EXECUTIONS = f"""
+DELETE FROM test_executions
+WHERE environment_id IN (SELECT id FROM environments WHERE project_id IN ({_BENCH_PROJECTS}))
+"""
+
+RESET_PROJECTS = "DELETE FROM projects WHERE name LIKE :pattern"
+
+ANALYZE_TABLES = [
+    "projects", "environments", "modules", "test_cases", "assertions", "extractors",
+    "test_suites", "suite_cases", "test_executions", "execution_details",
+]
+
+
+async def _execute(conn, label: str, sql: str, **params) -> int:
+    started = time.perf_counter()
+    result = await conn.execute(text(sql), {**_NAMES, **params})
+    print(f"  {label:<12}{result.rowcount:>12,} 行  {time.perf_counter() - started:8.1f}s")
+    return result.rowcount
+
+
+async def reset():
+    print("删除已有的压测数据")
+    async with engine.begin() as conn:
+        # 执行明细的 test_case_id 外键没有级联删除，先删执行记录（级联删除明细）
+        await _execute(conn, "执行记录", RESET_EXECUTIONS)
+        await _execute(conn, "项目", RESET_PROJECTS)
+
+
+async def seed(args):
+    async with engine.connect() as conn:
+        existing = (await conn.execute(text(f"SELECT count(*) FROM ({_BENCH_PROJECTS}) p"), _NAMES)).scalar()
+    if existing:
+        raise SystemExit(f"已存在 {existing} 个压测项目，使用 --reset 删除后重新生成")
+
+    modules_per_project = args.root_modules * (1 + args.child_modules)
+    per_module = max(1, math.ceil(args.cases / (args.projects * modules_per_project)))
+
+    print("生成项目和用例")
+    async with engine.begin() as conn:
+        await conn.execute(text("SET LOCAL synchronous_commit = off"))
+        await _execute(conn, "项目", SEED_PROJECTS, projects=args.projects)
+        await _execute(conn, "环境", SEED_ENVIRONMENTS)
+        await _execute(conn, "根模块", SEED_ROOT_MODULES, roots=args.root_modules)
+        await _execute(conn, "子模块", SEED_CHILD_MODULES, children=args.child_modules)
+        await _execute(conn, "用例", SEED_CASES, per_module=per_module, cases=args.cases)
+        await _execute(conn, "断言", SEED_ASSERTIONS)
+        await _execute(conn, "提取器", SEED_EXTRACTORS)
+        await _execute(conn, "测试集", SEED_SUITES, suites=args.suites)
+        await _execute(conn, "测试集用例", SEED_SUITE_CASES, size=args.suite_size)
+        suite_cases = (await conn.execute(text(COUNT_SUITE_CASES), _NAMES)).scalar()
+        if not suite_cases:
+            raise SystemExit("测试集中没有用例，检查 --cases / --suites / --suite-size")
+        per_suite = max(1, round(args.details / suite_cases))
+        await _execute(conn, "执行记录", SEED_EXECUTIONS, per_suite=per_suite, days=args.days)
+        low, high = (await conn.execute(text(EXECUTION_RANGE), _NAMES)).one()
+
+    # 每批约 --batch-size 条明细
+    step = max(1, args.batch_size * (high - low + 1) // (suite_cases * per_suite))
+    total = 0
+    started = time.perf_counter()
+    print(f"生成执行明细（执行记录 {low}-{high}，每批 {step} 个执行记录）")
+    for batch_low in range(low, high + 1, step):
+        batch_high = min(high, batch_low + step - 1)
+        async with engine.begin() as conn:
+            await conn.execute(text("SET LOCAL synchronous_commit = off"))
+            result = await conn.execute(text(SEED_DETAILS), {"low": batch_low, "high": batch_high})
+            await conn.execute(text(UPDATE_EXECUTIONS), {"low": batch_low, "high": batch_high})
+        total += result.rowcount
+        elapsed = time.perf_counter() - started
+        print(f"  {total:>12,} 行  {elapsed:8.1f}s  {total / elapsed:10,.0f} 行/s")
+
+    print("更新统计信息")
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in ANALYZE_TABLES:
+            await conn.execute(text(f"ANALYZE {table}"))
+
+
+async def main_async(args):
+    try:
+        if args.reset:
+            await reset()
+        await seed(args)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=100, help="项目数")
+    parser.add_argument("--cases", type=int, default=50000, help="用例总数")
+    parser.add_argument("--details", type=int, default=10_000_000, help="执行明细总数（近似）")
+    parser.add_argument("--scale", type=float, default=1.0, help="按比例缩放项目数、用例数和执行明细数")
+    parser.add_argument("--root-modules", type=int, default=10, help="每个项目的根模块数")
+    parser.add_argument("--child-modules", type=int, default=2, help="每个根模块的子模块数")
+    parser.add_argument("--suites", type=int, default=5, help="每个项目的测试集数")
+    parser.add_argument("--suite-size", type=int, default=50, help="每个测试集的用例数")
+    parser.add_argument("--days", type=int, default=90, help="执行记录分布的天数")
+    parser.add_argument("--batch-size", type=int, default=500_000, help="每批插入的执行明细数")
+    parser.add_argument("--reset", action="store_true", help="先删除已有的压测数据")
+    args = parser.parse_args()
+
+    args.projects = max(1, round(args.projects * args.scale))
+    args.cases = max(args.projects, round(args.cases * args.scale))
+    args.details = max(1, round(args.details * args.scale))
+    print(f"项目 {args.projects}，用例 {args.cases:,}，执行明细约 {args.details:,}")
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
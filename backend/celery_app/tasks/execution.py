@@ -1,16 +1,23 @@
 import asyncio
 from datetime import datetime
 
-from celery import shared_task
+from celery import shared_task, chord, group
 from celery.utils.log import get_task_logger
-from sqlalchemy import select, create_engine
+from sqlalchemy import select, func, create_engine
 from sqlalchemy.orm import selectinload, Session, sessionmaker
 
 from app.config import settings
 from app.models.test_suite import TestSuite, SuiteCase
+from app.models.test_case import TestCase
 from app.models.environment import Environment, EnvVariable
 from app.models.execution import TestExecution, ExecutionDetail
-from app.engine import TestExecutor
+from app.engine import TestExecutor, HttpClient
+from app.engine.limiter import LimitConfig, limiter_registry
+from app.engine.retry import RetryBudget, default_retry_budget, split_retry_limit
+from app.engine.load import LoadProfile, LoadRunner
+from app.engine.aggregator import ResultAggregator, failure_reason
+from app.engine.dataset import dataset_config
+from app.utils.sharding import group_dependent_cases, plan_shards
 
 logger = get_task_logger(__name__)
 
@@ -27,21 +34,42 @@ def run_async(coro):
     try:
         return loop.run_until_complete(coro)
     finally:
+        # 限流器的 Redis 客户端绑定在这个循环上，循环关闭前释放连接
+        loop.run_until_complete(limiter_registry.close())
         loop.close()
 
 
 @shared_task(bind=True, name="celery_app.tasks.execution.execute_suite_task")
-def execute_suite_task(self, execution_id: int):
+def execute_suite_task(
+    self,
+    execution_id: int,
+    case_ids: list = None,
+    seed_vars: dict = None,
+    shard_count: int = None,
+    recording_mode: str = "full",
+):
     """
     异步执行测试集任务
     
     Args:
         execution_id: 执行记录 ID
+        case_ids: 只执行这些用例（失败重跑时使用），None 表示执行全部
+        seed_vars: 初始提取变量（失败重跑时复用原执行提取的变量）
+        shard_count: 分片数，大于 1 时按历史耗时拆分到多个 worker 执行；
+            None 时 sharded 模式的测试集使用默认分片数
+        recording_mode: full 保存全部执行详情；aggregate 只保存聚合统计、
+            失败详情和抽样的成功详情
     """
     logger.info(f"开始执行测试集，execution_id={execution_id}")
     
     try:
-        result = _execute_suite_sync(execution_id)
+        result = _execute_suite_sync(
+            execution_id,
+            case_ids=case_ids,
+            seed_vars=seed_vars,
+            shard_count=shard_count,
+            recording_mode=recording_mode,
+        )
         logger.info(f"测试集执行完成，execution_id={execution_id}, result={result}")
         return result
     except Exception as e:
@@ -51,7 +79,13 @@ def execute_suite_task(self, execution_id: int):
         raise
 
 
-def _execute_suite_sync(execution_id: int) -> dict:
+def _execute_suite_sync(
+    execution_id: int,
+    case_ids: list = None,
+    seed_vars: dict = None,
+    shard_count: int = None,
+    recording_mode: str = "full",
+) -> dict:
     """同步执行测试集（Celery worker 中调用）"""
     with SyncSession() as db:
         # 1. 获取执行记录
@@ -60,129 +94,447 @@ def _execute_suite_sync(execution_id: int) -> dict:
             raise ValueError(f"执行记录不存在: {execution_id}")
         
         # 2. 获取测试集（包含用例）
-        stmt = (
-            select(TestSuite)
-            .where(TestSuite.id == execution.suite_id)
-            .options(
-                selectinload(TestSuite.suite_cases).selectinload(SuiteCase.test_case)
-            )
-        )
-        suite = db.execute(stmt).scalar_one_or_none()
-        
-        if not suite:
-            raise ValueError(f"测试集不存在: {execution.suite_id}")
+        suite = _get_suite_sync(db, execution.suite_id)
         
         # 3. 获取环境（包含变量）
-        stmt = (
-            select(Environment)
-            .where(Environment.id == execution.environment_id)
-            .options(selectinload(Environment.variables))
-        )
-        environment = db.execute(stmt).scalar_one_or_none()
-        
-        if not environment:
-            raise ValueError(f"环境不存在: {execution.environment_id}")
+        environment = _get_environment_sync(db, execution.environment_id)
         
         # 4. 构建环境变量
         env_vars = {var.key: var.value for var in environment.variables}
-        extracted_vars = {}  # 用于用例间变量传递
+        extracted_vars = dict(seed_vars or {})  # 用于用例间变量传递
+        
+        # 5. 按顺序排列用例（失败重跑时只保留指定用例）
+        sorted_cases = sorted(suite.suite_cases, key=lambda x: x.sort_order)
+        if case_ids is not None:
+            selected = set(case_ids)
+            sorted_cases = [sc for sc in sorted_cases if sc.test_case_id in selected]
         
-        # 5. 更新执行状态为 running
+        # 6. 更新执行状态为 running
         execution.status = "running"
         execution.started_at = datetime.now()
-        execution.total_count = len(suite.suite_cases)
+        execution.total_count = len(sorted_cases)
         db.commit()
         
-        # 6. 按顺序排列用例
-        sorted_cases = sorted(suite.suite_cases, key=lambda x: x.sort_order)
-        
-        # 7. 执行用例（使用异步执行器）
-        executor = TestExecutor()
-        passed_count = 0
-        failed_count = 0
+        # 分片模式：拆分后分发给多个 worker，由 merge_shards_task 汇总
+        if shard_count is None and suite.execution_mode == "sharded":
+            shard_count = settings.suite_shard_count
+        if shard_count and shard_count > 1 and len(sorted_cases) > 1:
+            return _dispatch_shards(
+                db, execution, sorted_cases, seed_vars, shard_count, recording_mode
+            )
         
-        if suite.execution_mode == "parallel":
-            # 并行执行
-            results = run_async(_execute_parallel(
-                executor, environment.base_url, sorted_cases, env_vars
-            ))
-            for sc, exec_result in results:
-                _save_execution_detail_sync(
-                    db, execution.id, sc.test_case_id, exec_result
-                )
-                if exec_result.status == "passed":
-                    passed_count += 1
-                else:
-                    failed_count += 1
-        else:
-            # 顺序执行
-            for sc in sorted_cases:
-                test_case = sc.test_case
-                case_config = _build_case_config(test_case)
-                
-                exec_result = run_async(executor.execute(
-                    base_url=environment.base_url,
-                    test_case=case_config,
-                    env_vars=env_vars,
-                    extracted_vars=extracted_vars,
-                ))
-                
-                # 保存执行详情
-                _save_execution_detail_sync(
-                    db, execution.id, test_case.id, exec_result
-                )
-                
-                if exec_result.status == "passed":
-                    passed_count += 1
-                else:
-                    failed_count += 1
-                
-                # 更新提取的变量
-                if exec_result.extractor_results:
-                    extracted_vars.update(exec_result.extractor_results)
+        # 7. 执行用例（使用异步执行器，所有用例共享一份重试预算）
+        aggregator = ResultAggregator() if recording_mode == "aggregate" else None
+        passed_count, failed_count = _run_cases_sync(
+            db,
+            execution.id,
+            environment.base_url,
+            sorted_cases,
+            env_vars,
+            extracted_vars,
+            parallel=suite.execution_mode == "parallel",
+            aggregator=aggregator,
+            limits=LimitConfig.from_environment(environment),
+        )
         
         # 8. 更新执行记录
-        execution.finished_at = datetime.now()
+        if aggregator is not None:
+            execution.summary = aggregator.summary()
+        return _finish_execution_sync(db, execution, passed_count, failed_count)
+
+
+def _run_cases_sync(
+    db: Session,
+    execution_id: int,
+    base_url: str,
+    suite_cases: list,
+    env_vars: dict,
+    extracted_vars: dict,
+    parallel: bool = False,
+    aggregator: ResultAggregator = None,
+    limits: LimitConfig = None,
+    retry_limit: int = None,
+) -> tuple[int, int]:
+    """
+    执行一组用例并保存执行详情，返回 (通过数, 失败数)
+    
+    传入 aggregator 时为聚合记录模式：结果计入聚合统计，
+    只保存聚合器要求保留的执行详情；limits 为环境的限流配置；
+    retry_limit 为分片分到的重试份额，None 时按这组用例数计算重试预算
+    """
+    
+    def record(test_case_id, exec_result):
+        keep = True
+        if aggregator is not None:
+            keep = aggregator.record(
+                str(test_case_id),
+                exec_result.duration_ms,
+                exec_result.status,
+                exec_result.response_status_code,
+                failure_reason(exec_result),
+            )
+        if keep:
+            _save_execution_detail_sync(db, execution_id, test_case_id, exec_result)
+
+    executor = TestExecutor(http_client=HttpClient(limits=limits))
+    if retry_limit is None:
+        retry_budget = default_retry_budget(len(suite_cases))
+    else:
+        retry_budget = RetryBudget(max_retries=retry_limit)
+    passed_count = 0
+    failed_count = 0
+    
+    if parallel:
+        # 并行执行
+        results = run_async(_execute_parallel(
+            executor, base_url, suite_cases, env_vars, retry_budget, extracted_vars
+        ))
+        for sc, exec_result in results:
+            record(sc.test_case_id, exec_result)
+            if exec_result.status == "passed":
+                passed_count += 1
+            else:
+                failed_count += 1
+    else:
+        # 顺序执行
+        for sc in suite_cases:
+            test_case = sc.test_case
+            case_config = _build_case_config(test_case)
+            
+            exec_result = run_async(executor.run_case(
+                base_url=base_url,
+                test_case=case_config,
+                env_vars=env_vars,
+                extracted_vars=extracted_vars,
+                retry_budget=retry_budget,
+            ))
+            
+            # 保存执行详情
+            record(test_case.id, exec_result)
+            
+            if exec_result.status == "passed":
+                passed_count += 1
+            else:
+                failed_count += 1
+            
+            # 更新提取的变量
+            if exec_result.extractor_results:
+                extracted_vars.update(exec_result.extractor_results)
+    
+    db.commit()
+    return passed_count, failed_count
+
+
+def _finish_execution_sync(db: Session, execution: TestExecution, passed_count: int, failed_count: int) -> dict:
+    """汇总并结束执行记录"""
+    execution.finished_at = datetime.now()
+    if execution.started_at:
         execution.duration_ms = int(
             (execution.finished_at - execution.started_at).total_seconds() * 1000
         )
-        execution.passed_count = passed_count
-        execution.failed_count = failed_count
-        execution.status = "passed" if failed_count == 0 else "failed"
-        
-        db.commit()
-        
-        return {
-            "execution_id": execution.id,
-            "status": execution.status,
-            "total_count": execution.total_count,
-            "passed_count": passed_count,
-            "failed_count": failed_count,
-            "duration_ms": execution.duration_ms,
-        }
-
-
-async def _execute_parallel(executor, base_url, suite_cases, env_vars):
-    """并行执行用例"""
-    import asyncio
-    
-    tasks = []
-    for sc in suite_cases:
-        test_case = sc.test_case
-        case_config = _build_case_config(test_case)
-        task = executor.execute(
-            base_url=base_url,
-            test_case=case_config,
-            env_vars=env_vars,
+    execution.passed_count = passed_count
+    execution.failed_count = failed_count
+    execution.status = "passed" if failed_count == 0 else "failed"
+    
+    db.commit()
+    
+    return {
+        "execution_id": execution.id,
+        "status": execution.status,
+        "total_count": execution.total_count,
+        "passed_count": passed_count,
+        "failed_count": failed_count,
+        "duration_ms": execution.duration_ms,
+    }
+
+
+def _dispatch_shards(
+    db: Session,
+    execution: TestExecution,
+    sorted_cases: list,
+    seed_vars: dict,
+    shard_count: int,
+    recording_mode: str = "full",
+) -> dict:
+    """按历史耗时切分用例，以 chord 分发到多个 worker"""
+    cases = [
+        (sc.test_case_id, _build_case_config(sc.test_case, with_dataset=False))
+        for sc in sorted_cases
+    ]
+    groups = group_dependent_cases(cases)
+    durations = _get_case_durations_sync(db, [case_id for case_id, _ in cases])
+    shards = plan_shards(groups, durations, shard_count)
+    # 重试预算按整个测试集计算一次，再按用例数分给各分片，避免每个分片各自按最小值兜底
+    retry_limits = split_retry_limit(
+        default_retry_budget(len(cases)).limit, [len(shard) for shard in shards]
+    )
+    
+    logger.info(
+        f"测试集分片执行，execution_id={execution.id}, shards={[len(s) for s in shards]}, "
+        f"retry_limits={retry_limits}"
+    )
+    
+    chord(
+        group(
+            execute_shard_task.s(execution.id, shard, seed_vars, recording_mode, retry_limit)
+            for shard, retry_limit in zip(shards, retry_limits)
         )
-        tasks.append((sc, task))
+    )(merge_shards_task.s(execution.id))
     
-    results = []
-    for sc, task in tasks:
-        exec_result = await task
-        results.append((sc, exec_result))
+    return {
+        "execution_id": execution.id,
+        "status": execution.status,
+        "total_count": execution.total_count,
+        "shard_count": len(shards),
+    }
+
+
+def _get_case_durations_sync(db: Session, case_ids: list) -> dict:
+    """获取用例最近若干次执行的平均耗时 {case_id: ms}"""
+    recent = (
+        select(
+            ExecutionDetail.test_case_id,
+            ExecutionDetail.duration_ms,
+            func.row_number().over(
+                partition_by=ExecutionDetail.test_case_id,
+                order_by=ExecutionDetail.id.desc(),
+            ).label("rn"),
+        )
+        .where(
+            ExecutionDetail.test_case_id.in_(case_ids),
+            ExecutionDetail.duration_ms.isnot(None),
+        )
+        .subquery()
+    )
+    stmt = (
+        select(recent.c.test_case_id, func.avg(recent.c.duration_ms))
+        .where(recent.c.rn <= settings.suite_shard_history_size)
+        .group_by(recent.c.test_case_id)
+    )
+    return {case_id: float(avg) for case_id, avg in db.execute(stmt).all()}
+
+
+@shared_task(name="celery_app.tasks.execution.execute_shard_task")
+def execute_shard_task(
+    execution_id: int,
+    case_ids: list,
+    seed_vars: dict = None,
+    recording_mode: str = "full",
+    retry_limit: int = None,
+) -> dict:
+    """
+    执行测试集的一个分片
     
-    return results
+    Args:
+        execution_id: 父执行记录 ID
+        case_ids: 本分片的用例 ID（按执行顺序）
+        seed_vars: 初始提取变量
+        recording_mode: 记录模式，aggregate 时返回聚合器状态供汇总
+        retry_limit: 本分片分到的重试份额（由 _dispatch_shards 按测试集预算拆分）
+    """
+    logger.info(f"开始执行分片，execution_id={execution_id}, cases={len(case_ids)}")
+    
+    try:
+        with SyncSession() as db:
+            execution = db.get(TestExecution, execution_id)
+            if not execution:
+                raise ValueError(f"执行记录不存在: {execution_id}")
+            
+            suite = _get_suite_sync(db, execution.suite_id)
+            environment = _get_environment_sync(db, execution.environment_id)
+            env_vars = {var.key: var.value for var in environment.variables}
+            
+            by_case_id = {sc.test_case_id: sc for sc in suite.suite_cases}
+            shard_cases = [by_case_id[case_id] for case_id in case_ids if case_id in by_case_id]
+            
+            aggregator = ResultAggregator() if recording_mode == "aggregate" else None
+            passed_count, failed_count = _run_cases_sync(
+                db,
+                execution_id,
+                environment.base_url,
+                shard_cases,
+                env_vars,
+                dict(seed_vars or {}),
+                aggregator=aggregator,
+                limits=LimitConfig.from_environment(environment),
+                retry_limit=retry_limit,
+            )
+            result = {"passed_count": passed_count, "failed_count": failed_count}
+            if aggregator is not None:
+                result["aggregate"] = aggregator.to_dict()
+            return result
+    except Exception as e:
+        # 分片异常不能中断 chord，整片计为失败
+        logger.error(f"分片执行失败，execution_id={execution_id}, error={str(e)}")
+        return {"passed_count": 0, "failed_count": len(case_ids), "error": str(e)}
+
+
+@shared_task(name="celery_app.tasks.execution.merge_shards_task")
+def merge_shards_task(shard_results: list, execution_id: int) -> dict:
+    """汇总各分片结果到父执行记录"""
+    passed_count = sum(r.get("passed_count", 0) for r in shard_results)
+    failed_count = sum(r.get("failed_count", 0) for r in shard_results)
+    
+    aggregator = None
+    for r in shard_results:
+        if "aggregate" in r:
+            shard_aggregator = ResultAggregator.from_dict(r["aggregate"])
+            if aggregator is None:
+                aggregator = shard_aggregator
+            else:
+                aggregator.merge(shard_aggregator)
+    
+    with SyncSession() as db:
+        execution = db.get(TestExecution, execution_id)
+        if not execution:
+            raise ValueError(f"执行记录不存在: {execution_id}")
+        if aggregator is not None:
+            execution.summary = aggregator.summary()
+        result = _finish_execution_sync(db, execution, passed_count, failed_count)
+    
+    logger.info(f"分片执行汇总完成，execution_id={execution_id}, result={result}")
+    return result
+
+
+@shared_task(bind=True, name="celery_app.tasks.execution.execute_load_task")
+def execute_load_task(self, execution_id: int, profile: dict):
+    """
+    压测任务：用测试集或单个用例驱动多个并发虚拟用户
+    
+    只保存聚合统计（TestExecution.summary），不逐条保存执行详情
+    
+    Args:
+        execution_id: 执行记录 ID
+        profile: LoadProfile 字段
+    """
+    logger.info(f"开始压测，execution_id={execution_id}, profile={profile}")
+    
+    try:
+        with SyncSession() as db:
+            execution = db.get(TestExecution, execution_id)
+            if not execution:
+                raise ValueError(f"执行记录不存在: {execution_id}")
+            
+            if execution.suite_id:
+                suite = _get_suite_sync(db, execution.suite_id, with_dataset=False)
+                test_cases = [
+                    sc.test_case for sc in sorted(suite.suite_cases, key=lambda x: x.sort_order)
+                ]
+            else:
+                stmt = (
+                    select(TestCase)
+                    .where(TestCase.id == execution.test_case_id)
+                    .options(selectinload(TestCase.assertions), selectinload(TestCase.extractors))
+                )
+                test_case = db.execute(stmt).scalar_one_or_none()
+                if not test_case:
+                    raise ValueError(f"用例不存在: {execution.test_case_id}")
+                test_cases = [test_case]
+            
+            environment = _get_environment_sync(db, execution.environment_id)
+            env_vars = {var.key: var.value for var in environment.variables}
+            
+            execution.status = "running"
+            execution.started_at = datetime.now()
+            db.commit()
+            
+            runner = LoadRunner(
+                base_url=environment.base_url,
+                cases=[(tc.id, _build_case_config(tc, with_dataset=False)) for tc in test_cases],
+                profile=LoadProfile(**profile),
+                env_vars=env_vars,
+                limits=LimitConfig.from_environment(environment),
+            )
+            summary = run_async(runner.run())
+            
+            # 只保存失败请求和抽样的成功请求的详情
+            for test_case_id, exec_result in runner.details:
+                _save_execution_detail_sync(db, execution.id, test_case_id, exec_result)
+            
+            case_names = {str(tc.id): tc.name for tc in test_cases}
+            for key, case_summary in summary["cases"].items():
+                case_summary["name"] = case_names.get(key)
+            execution.summary = summary
+            execution.total_count = summary["total_requests"]
+            execution.skipped_count = 0
+            result = _finish_execution_sync(
+                db,
+                execution,
+                summary["passed"],
+                summary["failed"] + summary["errors"],
+            )
+            logger.info(f"压测完成，execution_id={execution_id}, result={result}")
+            return result
+    except Exception as e:
+        logger.error(f"压测失败，execution_id={execution_id}, error={str(e)}")
+        _update_execution_error(execution_id, str(e))
+        raise
+
+
+def _get_suite_sync(db: Session, suite_id: int, with_dataset: bool = True) -> TestSuite:
+    """获取测试集（包含用例及其断言、提取器，with_dataset 时包含数据集）"""
+    options = [
+        selectinload(TestSuite.suite_cases)
+        .selectinload(SuiteCase.test_case)
+        .selectinload(TestCase.assertions),
+        selectinload(TestSuite.suite_cases)
+        .selectinload(SuiteCase.test_case)
+        .selectinload(TestCase.extractors),
+    ]
+    if with_dataset:
+        options.append(
+            selectinload(TestSuite.suite_cases)
+            .selectinload(SuiteCase.test_case)
+            .selectinload(TestCase.dataset)
+        )
+    stmt = (
+        select(TestSuite)
+        .where(TestSuite.id == suite_id)
+        .options(*options)
+    )
+    suite = db.execute(stmt).scalar_one_or_none()
+    
+    if not suite:
+        raise ValueError(f"测试集不存在: {suite_id}")
+    return suite
+
+
+def _get_environment_sync(db: Session, environment_id: int) -> Environment:
+    """获取环境（包含变量）"""
+    stmt = (
+        select(Environment)
+        .where(Environment.id == environment_id)
+        .options(selectinload(Environment.variables))
+    )
+    environment = db.execute(stmt).scalar_one_or_none()
+    
+    if not environment:
+        raise ValueError(f"环境不存在: {environment_id}")
+    return environment
+
+
+async def _execute_parallel(executor, base_url, suite_cases, env_vars, retry_budget=None, extracted_vars=None):
+    """
+    并行执行用例
+
+    同时执行的用例数不超过 suite_parallelism（环境未配置限流时同样生效），
+    环境的限流配置（速率、并发）在此之外另行限制
+    """
+    semaphore = asyncio.Semaphore(max(1, settings.suite_parallelism))
+
+    async def run(sc):
+        case_config = _build_case_config(sc.test_case)
+        async with semaphore:
+            return await executor.run_case(
+                base_url=base_url,
+                test_case=case_config,
+                env_vars=env_vars,
+                extracted_vars=extracted_vars,
+                retry_budget=retry_budget,
+            )
+    
+    results = await asyncio.gather(*(run(sc) for sc in suite_cases))
+    return list(zip(suite_cases, results))
 
 
 def _save_execution_detail_sync(db: Session, execution_id, test_case_id, exec_result):
@@ -202,6 +554,10 @@ def _save_execution_detail_sync(db: Session, execution_id, test_case_id, exec_re
         assertion_results=exec_result.assertion_results,
         extractor_results=exec_result.extractor_results,
         error_message=exec_result.error_message,
+        attempts=exec_result.attempts,
+        timings=exec_result.timings,
+        response_body_meta=exec_result.response_body_meta,
+        dataset_results=exec_result.dataset_results,
         executed_at=datetime.now(),
     )
     db.add(detail)
@@ -209,8 +565,13 @@ def _save_execution_detail_sync(db: Session, execution_id, test_case_id, exec_re
     return detail
 
 
-def _build_case_config(test_case) -> dict:
-    """构建用例配置"""
+def _build_case_config(test_case, with_dataset: bool = True) -> dict:
+    """
+    构建用例配置
+
+    Args:
+        with_dataset: 是否带上数据集（压测和分片规划不逐行执行，不需要加载数据集）
+    """
     return {
         "method": test_case.method,
         "path": test_case.path,
@@ -218,7 +579,11 @@ def _build_case_config(test_case) -> dict:
         "params": test_case.params or {},
         "body_type": test_case.body_type,
         "body_content": test_case.body_content,
+        "pre_script": test_case.pre_script,
+        "post_script": test_case.post_script,
         "timeout": test_case.timeout,
+        "retry_count": test_case.retry_count,
+        "dataset": dataset_config(test_case.dataset) if with_dataset else None,
         "assertions": [
             {
                 "name": a.name,
@@ -0,0 +1,92 @@
+"""断言引擎：JSONPath 批量预取、量词断言的路径求值次数以及期望值编译"""
+import json
+
+import pytest
+
+from app.engine import http_client
+from app.engine.assertion import AssertionEngine
+from app.engine.http_client import HttpResponse
+from app.engine.jsonpath import CompiledPath
+
+BODY = json.dumps({"data": {"total": 3, "items": [{"id": 1}, {"id": 2}, {"id": 3}]}})
+
+
+def response() -> HttpResponse:
+    return HttpResponse(status_code=200, headers={}, body=BODY, cookies={}, duration_ms=1)
+
+
+def json_path(expression: str, operator: str, expected_value: str = "") -> dict:
+    return {"type": "json_path", "expression": expression, "operator": operator, "expected_value": expected_value}
+
+
+@pytest.fixture
+def batch_paths(monkeypatch):
+    """记录批量查找（只取第一个匹配值）中的表达式"""
+    paths = []
+    find_in_document = http_client.find_in_document
+
+    def record(json_data, expressions):
+        paths.extend(expressions)
+        return find_in_document(json_data, expressions)
+
+    monkeypatch.setattr(http_client, "find_in_document", record)
+    return paths
+
+
+@pytest.fixture
+def find_all_calls(monkeypatch):
+    calls = []
+    find_all = CompiledPath.find_all
+
+    def record(self, json_data):
+        calls.append(self.expression)
+        return find_all(self, json_data)
+
+    monkeypatch.setattr(CompiledPath, "find_all", record)
+    return calls
+
+
+def test_wildcard_quantifier_evaluated_once(batch_paths, find_all_calls):
+    assertions = [
+        json_path("$.data.items[*].id", "all", "gt 0"),
+        json_path("$.data.items[*].id", "unique"),
+        json_path("$.data.items[*].id", "count_eq", "3"),
+        json_path("$.data.total", "eq", "3"),
+    ]
+    results = AssertionEngine().assert_all(response(), assertions)
+    assert [r.passed for r in results] == [True, True, True, True]
+    # 通配符路径不参与批量预取，所有匹配值只求值一次
+    assert batch_paths == ["$.data.total"]
+    assert find_all_calls == ["$.data.items[*].id"]
+
+
+def test_simple_quantifier_path_prefetched(batch_paths):
+    assertions = [
+        json_path("$.data.items", "count_eq", "3"),
+        json_path("$.data.total", "eq", "3"),
+    ]
+    results = AssertionEngine().assert_all(response(), assertions)
+    assert [r.passed for r in results] == [True, True]
+    assert sorted(batch_paths) == ["$.data.items", "$.data.total"]
+
+
+def test_compile():
+    engine = AssertionEngine()
+    expectation = engine.compile(json_path("$.data.total", "gte", "3"))
+    assert expectation.test(3) and not expectation.test(2)
+    # 量词、json_schema、snapshot 不编译；期望值不合法时由 assert_one 返回错误信息
+    assert engine.compile(json_path("$.data.items[*].id", "all", "gt 0")) is None
+    assert engine.compile({"type": "json_schema", "expected_value": "{}"}) is None
+    assert engine.compile(json_path("$.data.total", "gt", "abc")) is None
+
+    result = engine.assert_all(response(), [json_path("$.data.total", "gt", "abc")])[0]
+    assert not result.passed
+    assert result.message == "比较失败: 期望值不是数字: abc"
+
+
+def test_assert_one_uses_given_expectation():
+    engine = AssertionEngine()
+    expectation = engine.compile(json_path("$.data.total", "eq", "4"))
+    # 传入已编译的期望值时不再按 expected_value 编译
+    result = engine.assert_one(response(), "total", "json_path", "$.data.total", "eq", "3", expectation=expectation)
+    assert not result.passed
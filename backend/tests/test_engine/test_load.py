@@ -0,0 +1,91 @@
+"""压测开环调度：计划迭代数、计划时间以及丢弃和迟发的统计"""
+import asyncio
+import time
+
+import pytest
+
+from app.engine.executor import ExecutionResult
+from app.engine.load import LoadProfile, LoadRunner
+
+
+class _Executor:
+    """按固定耗时返回通过结果的执行器"""
+
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+
+    async def execute(self, **kwargs) -> ExecutionResult:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return ExecutionResult(status="passed", response_status_code=200)
+
+
+class _Runner(LoadRunner):
+    """记录每次迭代的计划时间"""
+
+    def __init__(self, profile: LoadProfile):
+        super().__init__("http://test", [(1, {})], profile)
+        self.intended = []
+
+    async def _run_iteration(self, executor, intended_at):
+        self.intended.append(intended_at)
+        await super()._run_iteration(executor, intended_at)
+
+
+def open_loop(profile: LoadProfile, delay: float = 0, started_offset: float = 0) -> tuple[_Runner, dict]:
+    runner = _Runner(profile)
+
+    async def main():
+        started = time.perf_counter() + started_offset
+        return started, await runner._run_open_loop(_Executor(delay), started)
+
+    started, stats = asyncio.run(main())
+    runner.intended = [t - started for t in runner.intended]
+    return runner, stats
+
+
+@pytest.mark.parametrize("profile, scheduled", [
+    # 只设置持续时间：duration × arrival_rate
+    (LoadProfile(duration_seconds=0.1, arrival_rate=100), 10),
+    # 只设置迭代次数：每个虚拟用户的迭代次数 × 虚拟用户数，与闭环模式一致
+    (LoadProfile(duration_seconds=None, iterations=3, virtual_users=2, arrival_rate=100), 6),
+    # 两者都设置时取先达到的一个
+    (LoadProfile(duration_seconds=0.05, iterations=100, virtual_users=1, arrival_rate=100), 5),
+    (LoadProfile(duration_seconds=60, iterations=2, virtual_users=2, arrival_rate=100), 4),
+])
+def test_scheduled_iterations(profile, scheduled):
+    runner, stats = open_loop(profile)
+    assert stats["scheduled"] == scheduled
+    assert stats["issued"] == scheduled
+    assert stats["dropped"] == 0
+    assert runner.aggregator.summary(1)["total_requests"] == scheduled
+
+
+def test_schedule_is_fixed_rate():
+    runner, _ = open_loop(LoadProfile(duration_seconds=0.1, arrival_rate=50))
+    # 计划时间只取决于到达速率，与响应快慢无关
+    assert runner.intended == pytest.approx([i * 0.02 for i in range(5)])
+
+
+def test_dropped_when_in_flight_limit_reached():
+    # 每次迭代耗时远大于到达间隔，超过 max_in_flight 的到达直接丢弃
+    profile = LoadProfile(duration_seconds=0.1, arrival_rate=100, max_in_flight=3)
+    runner, stats = open_loop(profile, delay=1)
+    assert stats["scheduled"] == 10
+    assert stats["issued"] == 3
+    assert stats["dropped"] == 7
+    assert stats["peak_in_flight"] == 3
+    assert len(runner.intended) == 3
+
+
+def test_late_when_behind_schedule():
+    # 起始时间在 1 秒前：所有到达都已晚于计划时间
+    profile = LoadProfile(duration_seconds=0.05, arrival_rate=100, late_threshold_ms=10)
+    _, stats = open_loop(profile, started_offset=-1)
+    assert stats["late"] == 5
+    assert stats["max_schedule_lag_ms"] >= 950
+
+    # 按时发出的到达不计为迟发
+    profile = LoadProfile(duration_seconds=0.05, arrival_rate=100, late_threshold_ms=50)
+    _, stats = open_loop(profile)
+    assert stats["late"] == 0
@@ -0,0 +1,316 @@
+"""Mock 服务：路由优先级、模板响应体渲染、keep-alive 与管线化、由断言拼出响应以及按新地址重启"""
+import asyncio
+import contextlib
+import hashlib
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import database
+from app.mock import manager as manager_module
+from app.mock.manager import DESIRED_KEY, STATE_KEY, MockManager
+from app.mock.routes import template_response
+from app.mock.server import MockRoute, MockServer
+from app.services import mock_service
+
+
+def route(method: str, path: str, body: str = "", **kwargs) -> MockRoute:
+    return MockRoute(method=method, path=path, body=body or json.dumps({"route": path}), **kwargs)
+
+
+def split(response: bytes) -> tuple[str, dict, bytes]:
+    """拆分原始响应为 (状态行, 响应头, 响应体)"""
+    head, _, body = response.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return lines[0], headers, body
+
+
+@pytest.mark.parametrize("path, expected", [
+    # 静态路由优先于含变量的路由
+    ("/users/me", "/users/me"),
+    # 静态段多的优先
+    ("/users/1/orders", "/users/{{id}}/orders"),
+    ("/users/1/items", "/users/{{id}}/{{kind}}"),
+    # 整段变量优先于部分变量
+    ("/files/v1-report", "/files/{{name}}"),
+    # 先比较静态段数，部分变量的路由静态段多时仍然优先
+    ("/docs/v1/index", "/docs/v{{n}}/index"),
+    ("/docs/v1/other", "/docs/{{a}}/{{b}}"),
+    ("/users/me/", "/users/me"),
+    ("/orders", None),
+])
+def test_route_priority(path, expected):
+    server = MockServer([
+        route("GET", "/users/{{id}}/{{kind}}"),
+        route("GET", "/users/{{id}}/orders"),
+        route("GET", "/users/{{id}}"),
+        route("GET", "/users/me"),
+        route("GET", "/files/v{{n}}-{{name}}"),
+        route("GET", "/files/{{name}}"),
+        route("GET", "/docs/{{a}}/{{b}}"),
+        route("GET", "/docs/v{{n}}/index"),
+    ])
+    found, _ = server.find("GET", path)
+    assert (found.path if found else None) == expected
+
+
+def test_route_variables_and_duplicates():
+    first = route("GET", "/users/{{id}}", case_id=1)
+    server = MockServer([
+        first,
+        route("GET", "/users/{{id}}/", case_id=2),
+        route("GET", "/api/v{{version}}/users"),
+        route("POST", "/users/{{id}}", case_id=3),
+    ])
+    # 同一方法和路径重复时保留第一条
+    assert len(server.routes) == 3
+    assert server.find("GET", "/users/a%20b") == (first, {"id": "a b"})
+    assert server.find("GET", "/api/v2/users")[1] == {"version": "2"}
+    assert server.find("DELETE", "/users/1") == (None, None)
+
+
+def test_templated_body():
+    server = MockServer([
+        route("GET", "/users/{{id}}", body='{"id": "{{id}}", "q": "{{q}}", "sign": "{{$md5(name)}}"}'),
+        route("GET", "/static", body='{"id": 1}'),
+    ])
+    status, headers, body = split(server.respond("GET", "/users/42?q=x&name=tom", keep_alive=True))
+    assert status == "HTTP/1.1 200 OK"
+    assert json.loads(body) == {"id": "42", "q": "x", "sign": hashlib.md5(b"tom").hexdigest()}
+    assert int(headers["content-length"]) == len(body)
+    # 非模板响应预先编码后复用
+    static = server.routes[1]
+    assert not static.is_template
+    assert server.respond("GET", "/static", keep_alive=True) is server.respond("GET", "/static", keep_alive=True)
+
+
+def test_respond_head_options_not_found():
+    server = MockServer([route("GET", "/items", status_code=201, headers=[("X-Id", "1"), ("Content-Length", "9")])])
+    status, headers, body = split(server.respond("HEAD", "/items", keep_alive=True))
+    assert status == "HTTP/1.1 201 Created"
+    assert body == b""
+    assert headers["x-id"] == "1"
+    assert headers["content-length"] == str(len(json.dumps({"route": "/items"})))
+    assert "connection" not in headers
+
+    status, headers, _ = split(server.respond("OPTIONS", "/anything", keep_alive=False))
+    assert status == "HTTP/1.1 204 No Content"
+    assert headers["access-control-allow-origin"] == "*"
+    assert headers["connection"] == "close"
+
+    status, _, body = split(server.respond("GET", "http://localhost/missing?a=1", keep_alive=True))
+    assert status == "HTTP/1.1 404 Not Found"
+    assert json.loads(body)["message"] == "没有匹配的 mock 用例: GET /missing"
+    assert server.requests == 3
+    assert server.routes[0].requests == 1
+
+
+async def read_response(reader: asyncio.StreamReader) -> tuple[str, dict, bytes]:
+    status, headers, _ = split(await reader.readuntil(b"\r\n\r\n"))
+    body = await reader.readexactly(int(headers["content-length"]))
+    return status, headers, body
+
+
+def test_keep_alive_and_pipelining():
+    async def main():
+        server = MockServer([route("GET", "/a"), route("POST", "/b/{{id}}", body='{"id": "{{id}}"}')])
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            # 一次写入多个请求（含请求体，最后一个请求被拆成两段发送），按顺序逐个响应
+            writer.write(
+                b"GET /a HTTP/1.1\r\nHost: x\r\n\r\n"
+                b"POST /b/7 HTTP/1.1\r\nContent-Length: 5\r\n\r\nhello"
+                b"GET /a HTTP/1.1\r\nHo"
+            )
+            await writer.drain()
+            first = await read_response(reader)
+            second = await read_response(reader)
+            writer.write(b"st: x\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+            third = await read_response(reader)
+            closed = await reader.read()
+            writer.close()
+
+            # HTTP/1.0 默认不保持连接
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"GET /a HTTP/1.0\r\n\r\n")
+            await writer.drain()
+            http10 = await read_response(reader)
+            http10_closed = await reader.read()
+            writer.close()
+            return first, second, third, closed, http10, http10_closed, server.requests
+        finally:
+            await server.close()
+
+    first, second, third, closed, http10, http10_closed, requests = asyncio.run(main())
+    assert json.loads(first[2]) == {"route": "/a"}
+    assert "connection" not in first[1]
+    assert json.loads(second[2]) == {"id": "7"}
+    assert json.loads(third[2]) == {"route": "/a"}
+    assert third[1]["connection"] == "close"
+    assert closed == b""
+    assert http10[1]["connection"] == "close"
+    assert http10_closed == b""
+    assert requests == 4
+
+
+@pytest.mark.parametrize("request_bytes, status", [
+    (b"BROKEN\r\n\r\n", "HTTP/1.1 400 Bad Request"),
+    (b"POST /a HTTP/1.1\r\nContent-Length: x\r\n\r\n", "HTTP/1.1 400 Bad Request"),
+    (b"POST /a HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n", "HTTP/1.1 501 Not Implemented"),
+    (b"POST /a HTTP/1.1\r\nContent-Length: 999999999\r\n\r\n", "HTTP/1.1 413 Request Entity Too Large"),
+])
+def test_bad_request_closes_connection(request_bytes, status):
+    async def main():
+        server = MockServer([route("GET", "/a")])
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(request_bytes)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return response
+        finally:
+            await server.close()
+
+    assert split(asyncio.run(main()))[0] == status
+
+
+def assertion(type: str, expression: str, expected_value: str, operator: str = "eq"):
+    return SimpleNamespace(type=type, expression=expression, operator=operator, expected_value=expected_value)
+
+
+@pytest.mark.parametrize("assertions, expected", [
+    ([], None),
+    ([assertion("json_path", "$.data.items[*].id", "1"), assertion("status_code", "", "200", "ne")], None),
+    ([assertion("status_code", "", "201")], (201, [], {})),
+    ([assertion("status_code", "", "abc"), assertion("header", "X-Id", "7")], (200, [("X-Id", "7")], {})),
+    ([
+        assertion("json_path", "$.code", "0"),
+        assertion("json_path", "$.data.name", "tom"),
+        assertion("json_path", "$.data.ok", "true"),
+        assertion("json_path", "$.data.items[1].id", "2"),
+        assertion("json_path", "$.data.label", "'007'"),
+    ], (200, [], {"code": 0, "data": {"name": "tom", "ok": True, "items": [None, {"id": 2}], "label": "'007'"}})),
+    # 与已有值类型冲突的路径被忽略
+    ([assertion("json_path", "$.data", "1"), assertion("json_path", "$.data.id", "2")], (200, [], {"data": 1})),
+])
+def test_template_response(assertions, expected):
+    result = template_response(assertions)
+    if expected is None:
+        assert result is None
+    else:
+        status_code, headers, body = result
+        assert (status_code, headers, json.loads(body)) == expected
+
+
+class _Redis:
+    """MockManager 用到的 Redis 命令的内存实现"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.values = {}
+
+    async def hgetall(self, name):
+        return dict(self.hashes.get(name, {}))
+
+    async def hset(self, name, key, value):
+        self.hashes.setdefault(name, {})[str(key)] = value
+
+    async def hdel(self, name, key):
+        return int(self.hashes.get(name, {}).pop(str(key), None) is not None)
+
+    async def set(self, name, value, ex=None):
+        self.values[name] = value
+
+    async def delete(self, name):
+        self.values.pop(name, None)
+
+
+@pytest.fixture
+def mock_manager(monkeypatch):
+    monkeypatch.setattr(database, "async_session_factory", lambda: contextlib.nullcontext())
+    routes = [[route("GET", "/a")]]
+
+    async def build_routes(db, project_id):
+        return routes[0]
+
+    monkeypatch.setattr(mock_service, "build_routes", build_routes)
+    monkeypatch.setattr(manager_module.settings, "mock_ports", "")
+    monkeypatch.setattr(manager_module.settings, "mock_allow_public_host", False)
+    return MockManager(_Redis()), routes
+
+
+def test_manager_restarts_on_address_change(mock_manager):
+    manager, routes = mock_manager
+
+    async def apply(host=None, port=0, version="v1"):
+        await manager.redis.hset(DESIRED_KEY, 1, json.dumps({"host": host, "port": port, "version": version}))
+        await manager.reconcile()
+        await manager.publish()
+        return json.loads(manager.redis.values[STATE_KEY.format(project_id=1)])
+
+    async def main():
+        first = await apply()
+        server = manager.servers[1][0]
+
+        # 地址不变时只替换路由，不重启
+        routes[0] = [route("GET", "/b")]
+        same = await apply(port=first["port"], version="v2")
+        assert manager.servers[1][0] is server
+        assert [r["path"] for r in same["routes"]] == ["/b"]
+
+        # 端口变化时按新端口重启，旧端口不再监听
+        moved = await apply(version="v3", port=await free_port())
+        assert manager.servers[1][0] is not server
+        assert not server.running
+        assert moved["port"] != first["port"]
+        with pytest.raises(OSError):
+            await asyncio.open_connection("127.0.0.1", first["port"])
+
+        # 监听地址变化时同样重启
+        server = manager.servers[1][0]
+        relocated = await apply(host="localhost", port=moved["port"], version="v4")
+        assert manager.servers[1][0] is not server
+        assert (relocated["host"], relocated["port"], relocated["url"]) == (
+            "localhost", moved["port"], f"http://localhost:{moved['port']}",
+        )
+        await manager.servers.pop(1)[0].close()
+
+    asyncio.run(main())
+
+
+def test_manager_restart_failure(mock_manager):
+    manager, _ = mock_manager
+
+    async def main():
+        await manager.redis.hset(DESIRED_KEY, 1, json.dumps({"host": None, "port": 0, "version": "v1"}))
+        await manager.reconcile()
+        server = manager.servers[1][0]
+        # 新地址不允许时旧服务已关闭，只保留失败原因
+        await manager.redis.hset(DESIRED_KEY, 1, json.dumps({"host": "10.0.0.1", "port": 0, "version": "v2"}))
+        await manager.reconcile()
+        return server
+
+    server = asyncio.run(main())
+    assert not server.running
+    assert manager.servers == {}
+    assert manager.redis.hashes[DESIRED_KEY] == {}
+    state = json.loads(manager.redis.values[STATE_KEY.format(project_id=1)])
+    assert state["version"] == "v2"
+    assert "不允许监听非回环地址" in state["error"]
+
+
+async def free_port() -> int:
+    server = await asyncio.get_running_loop().create_server(asyncio.Protocol, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    server.close()
+    await server.wait_closed()
+    return port
@@ -0,0 +1,168 @@
+"""HTTP 录制与回放：请求指纹的规范化、录制回放往返以及回放缺失的错误类型"""
+import asyncio
+import json
+import threading
+
+import httpx
+import pytest
+
+from app.engine import executor as executor_module
+from app.engine.http_client import HttpClient
+from app.engine.recording import RecordingStore, RecordingTransport, ReplayMissError, fingerprint
+from app.engine.retry import RetryPolicy
+
+IGNORE = frozenset(("timestamp", "nonce"))
+
+
+def key(method: str, url: str, ignore: frozenset = IGNORE, **kwargs) -> str:
+    return fingerprint(httpx.Request(method, url, **kwargs), ignore)[0]
+
+
+@pytest.mark.parametrize("a, b", [
+    # query 参数顺序、主机大小写、默认端口
+    (("GET", "http://api.test/items?b=2&a=1"), ("GET", "http://api.test/items?a=1&b=2")),
+    (("GET", "http://API.test:80/items"), ("GET", "http://api.test/items")),
+    (("GET", "https://api.test:443/items"), ("GET", "https://api.test/items")),
+    (("get", "http://api.test/items"), ("GET", "http://api.test/items")),
+    # 忽略的 query 参数
+    (("GET", "http://api.test/items?a=1&timestamp=1"), ("GET", "http://api.test/items?timestamp=2&a=1")),
+    # 请求头不参与指纹
+    (("GET", "http://api.test/items", {"headers": {"X-Request-Id": "1"}}),
+     ("GET", "http://api.test/items", {"headers": {"X-Request-Id": "2"}})),
+    # JSON 键顺序、空白以及忽略的字段（任意层级）
+    (("POST", "http://api.test/orders", {"content": b'{"b": 1, "a": {"y": 2, "x": 1}}',
+                                         "headers": {"Content-Type": "application/json"}}),
+     ("POST", "http://api.test/orders", {"content": b'{"a":{"x":1,"y":2},"b":1}',
+                                         "headers": {"Content-Type": "application/json"}})),
+    (("POST", "http://api.test/orders", {"json": {"a": 1, "nonce": "x", "items": [{"id": 1, "timestamp": 1}]}}),
+     ("POST", "http://api.test/orders", {"json": {"items": [{"timestamp": 2, "id": 1}], "nonce": "y", "a": 1}})),
+    # 表单参数顺序以及忽略的字段
+    (("POST", "http://api.test/login", {"data": {"user": "a", "pwd": "b", "timestamp": "1"}}),
+     ("POST", "http://api.test/login", {"data": {"timestamp": "2", "pwd": "b", "user": "a"}})),
+])
+def test_fingerprint_equal(a, b):
+    assert key(*a[:2], **(a[2] if len(a) > 2 else {})) == key(*b[:2], **(b[2] if len(b) > 2 else {}))
+
+
+@pytest.mark.parametrize("a, b", [
+    (("GET", "http://api.test/items?a=1"), ("GET", "http://api.test/items?a=2")),
+    (("GET", "http://api.test/items"), ("POST", "http://api.test/items")),
+    (("GET", "http://api.test:8080/items"), ("GET", "http://api.test/items")),
+    (("GET", "http://api.test/items"), ("GET", "https://api.test/items")),
+    (("POST", "http://api.test/orders", {"json": {"a": 1}}), ("POST", "http://api.test/orders", {"json": {"a": 2}})),
+    (("POST", "http://api.test/orders", {"json": [1, 2]}), ("POST", "http://api.test/orders", {"json": [2, 1]})),
+])
+def test_fingerprint_different(a, b):
+    assert key(*a[:2], **(a[2] if len(a) > 2 else {})) != key(*b[:2], **(b[2] if len(b) > 2 else {}))
+
+
+def test_fingerprint_multipart_boundary():
+    def multipart(value: str) -> str:
+        request = httpx.Request("POST", "http://api.test/upload", files={"file": ("a.txt", b"hello")}, data={"name": value})
+        request.read()
+        return fingerprint(request)[0]
+
+    # 每次请求随机生成的 boundary 不参与指纹
+    assert multipart("x") == multipart("x")
+    assert multipart("x") != multipart("y")
+
+
+class _Upstream:
+    """记录请求次数的目标服务"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        body = json.dumps({"path": request.url.path, "call": self.calls}).encode()
+        return httpx.Response(
+            201, content=body,
+            headers=[("Content-Type", "application/json"), ("Set-Cookie", "a=1"), ("Set-Cookie", "b=2")],
+        )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RecordingStore(str(tmp_path / "recordings.db"))
+    yield store
+    store.close()
+
+
+def send(transport: httpx.AsyncBaseTransport, *requests: tuple[str, str]) -> list[httpx.Response]:
+    async def main():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return [await client.request(method, url) for method, url in requests]
+    return asyncio.run(main())
+
+
+def test_record_then_replay(store):
+    upstream = _Upstream()
+    recorded, = send(RecordingTransport(store, httpx.MockTransport(upstream), replay_first=False),
+                     ("GET", "http://api.test/items?b=2&a=1"))
+    assert upstream.calls == 1
+    assert store.count() == 1
+
+    # 回放不访问网络，按规范化后的请求命中（新打开的存储，不经过内存缓存）
+    reopened = RecordingStore(store.path)
+    try:
+        replayed, = send(RecordingTransport(reopened), ("GET", "http://api.test/items?a=1&b=2"))
+    finally:
+        reopened.close()
+    assert replayed.status_code == recorded.status_code == 201
+    assert replayed.content == recorded.content
+    assert replayed.json() == {"path": "/items", "call": 1}
+    assert replayed.headers.get_list("set-cookie") == ["a=1", "b=2"]
+
+
+def test_auto_mode(store):
+    upstream = _Upstream()
+    transport = RecordingTransport(store, httpx.MockTransport(upstream), replay_first=True)
+    first, second, other = send(
+        transport, ("GET", "http://api.test/a"), ("GET", "http://api.test/a"), ("GET", "http://api.test/b"),
+    )
+    # 已录制的请求直接回放，未录制的发往目标服务并录制
+    assert upstream.calls == 2
+    assert first.json() == second.json() == {"path": "/a", "call": 1}
+    assert other.json() == {"path": "/b", "call": 2}
+    assert store.count() == 2
+
+    # record 模式总是发往目标服务，同一指纹只保留最近一次录制
+    send(RecordingTransport(store, httpx.MockTransport(upstream), replay_first=False), ("GET", "http://api.test/a"))
+    replayed, = send(RecordingTransport(store), ("GET", "http://api.test/a"))
+    assert replayed.json() == {"path": "/a", "call": 3}
+    assert store.count() == 2
+
+
+def test_store_io_off_event_loop(store, monkeypatch):
+    threads = []
+    for name in ("get", "put"):
+        method = getattr(store, name)
+        monkeypatch.setattr(store, name, lambda *args, method=method: threads.append(threading.current_thread()) or method(*args))
+
+    upstream = _Upstream()
+    send(RecordingTransport(store, httpx.MockTransport(upstream)), *[("GET", "http://api.test/a")] * 3)
+    # 第一次：查询未命中 + 写入；第二次从数据库读取；第三次命中内存缓存，不再访问数据库
+    assert len(threads) == 3
+    assert threading.main_thread() not in threads
+    assert upstream.calls == 1
+
+
+def test_replay_miss(store):
+    with pytest.raises(ReplayMissError):
+        send(RecordingTransport(store), ("GET", "http://api.test/missing"))
+
+    async def main():
+        async with httpx.AsyncClient(transport=RecordingTransport(store)) as client:
+            executor = executor_module.TestExecutor(
+                retry_policy=RetryPolicy(backoff_base=0, jitter=False),
+                http_client=HttpClient(client=client),
+            )
+            return await executor.execute("http://api.test", {"method": "GET", "path": "/missing", "retry_count": 3})
+
+    result = asyncio.run(main())
+    assert result.status == "error"
+    assert result.error_type == "replay_miss"
+    assert "回放记录不存在" in result.error_message
+    # 回放缺失不重试
+    assert len(result.attempts) == 1
@@ -0,0 +1,134 @@
+"""重试：结果分类、指数退避、测试集重试预算以及分片间的预算拆分"""
+import asyncio
+
+import pytest
+
+from app.engine import executor as executor_module, retry
+from app.engine.executor import ExecutionResult
+from app.engine.retry import RetryBudget, RetryPolicy, split_retry_limit
+
+
+@pytest.mark.parametrize("result, expected", [
+    (ExecutionResult(status="error", error_type="timeout"), True),
+    (ExecutionResult(status="error", error_type="connect"), True),
+    (ExecutionResult(status="passed", response_status_code=503), True),
+    (ExecutionResult(status="failed", response_status_code=502), True),
+    (ExecutionResult(status="passed", response_status_code=200), False),
+    (ExecutionResult(status="failed", response_status_code=500), False),
+    (ExecutionResult(status="failed", response_status_code=200), False),
+    # 重试结果相同或只会再次被拒绝
+    (ExecutionResult(status="error", error_type="circuit_open"), False),
+    (ExecutionResult(status="error", error_type="replay_miss"), False),
+    (ExecutionResult(status="error", error_type="script"), False),
+])
+def test_should_retry(result, expected):
+    assert RetryPolicy().should_retry(result) is expected
+
+
+def test_should_retry_on_assertion_failure():
+    policy = RetryPolicy(retry_on_assertion_failure=True, retry_on_status=(429,))
+    assert policy.should_retry(ExecutionResult(status="failed", response_status_code=200))
+    assert policy.should_retry(ExecutionResult(status="passed", response_status_code=429))
+    assert not policy.should_retry(ExecutionResult(status="passed", response_status_code=503))
+
+
+def test_backoff_exponential():
+    policy = RetryPolicy(backoff_base=0.5, backoff_max=3, jitter=False)
+    assert [policy.backoff(attempt) for attempt in range(1, 6)] == [0.5, 1, 2, 3, 3]
+
+
+def test_backoff_full_jitter(monkeypatch):
+    bounds = []
+    monkeypatch.setattr(retry.random, "uniform", lambda low, high: bounds.append((low, high)) or high / 2)
+    policy = RetryPolicy(backoff_base=0.5, backoff_max=3, jitter=True)
+    assert [policy.backoff(attempt) for attempt in range(1, 5)] == [0.25, 0.5, 1, 1.5]
+    # 等待时间在 [0, 指数退避值] 内均匀分布
+    assert bounds == [(0, 0.5), (0, 1), (0, 2), (0, 3)]
+
+
+@pytest.mark.parametrize("budget, limit", [
+    (RetryBudget(total_cases=0), 3),
+    (RetryBudget(total_cases=10), 3),
+    (RetryBudget(total_cases=100), 20),
+    (RetryBudget(total_cases=100, ratio=0.5, min_retries=0), 50),
+    # 分片份额直接作为上限，可以低于 min_retries
+    (RetryBudget(total_cases=100, max_retries=1), 1),
+    (RetryBudget(total_cases=100, max_retries=0), 0),
+])
+def test_budget_limit(budget, limit):
+    assert budget.limit == limit
+    assert sum(budget.acquire() for _ in range(limit + 5)) == limit
+    assert budget.used == limit
+    assert budget.remaining == 0
+    assert not budget.acquire()
+
+
+@pytest.mark.parametrize("limit, sizes, shares", [
+    (10, [5, 5], [5, 5]),
+    (10, [1, 1, 1], [4, 3, 3]),
+    (20, [50, 30, 20], [10, 6, 4]),
+    (3, [10, 10, 10, 10], [1, 1, 1, 0]),
+    (5, [7, 2, 1], [4, 1, 0]),
+    (0, [3, 3], [0, 0]),
+    (4, [0, 0], [0, 0]),
+    (7, [], []),
+])
+def test_split_retry_limit(limit, sizes, shares):
+    assert split_retry_limit(limit, sizes) == shares
+    if sum(sizes):
+        assert sum(shares) == limit
+
+
+# 不直接导入 TestExecutor，避免 pytest 把它当作测试类收集
+class _Executor(executor_module.TestExecutor):
+    """按顺序返回预设结果的执行器"""
+
+    def __init__(self, results: list[ExecutionResult]):
+        super().__init__(retry_policy=RetryPolicy(backoff_base=0, jitter=False))
+        self.results = results
+        self.calls = 0
+
+    async def _execute_once(self, base_url, test_case, env_vars=None, extracted_vars=None):
+        self.calls += 1
+        return self.results.pop(0)
+
+
+def execute(executor: _Executor, retry_count: int, budget: RetryBudget = None) -> ExecutionResult:
+    return asyncio.run(executor.execute("http://test", {"retry_count": retry_count}, retry_budget=budget))
+
+
+def test_execute_retries_until_passed():
+    executor = _Executor([
+        ExecutionResult(status="error", error_type="timeout"),
+        ExecutionResult(status="passed", response_status_code=503),
+        ExecutionResult(status="passed", response_status_code=200),
+    ])
+    result = execute(executor, retry_count=3)
+    assert result.status == "passed"
+    assert executor.calls == 3
+    assert [a["attempt"] for a in result.attempts] == [1, 2, 3]
+
+
+def test_execute_stops_at_retry_count_and_budget():
+    executor = _Executor([ExecutionResult(status="error", error_type="timeout") for _ in range(5)])
+    result = execute(executor, retry_count=2)
+    assert executor.calls == 3
+    assert result.status == "error"
+
+    # 预算在用例之间共享，耗尽后不再重试
+    budget = RetryBudget(max_retries=1)
+    executor = _Executor([ExecutionResult(status="error", error_type="timeout") for _ in range(5)])
+    result = execute(executor, retry_count=3, budget=budget)
+    assert executor.calls == 2
+    assert result.attempts[-1]["note"] == "重试预算已耗尽"
+    executor = _Executor([ExecutionResult(status="error", error_type="timeout")])
+    execute(executor, retry_count=3, budget=budget)
+    assert executor.calls == 1
+
+
+def test_execute_does_not_retry_script_error():
+    executor = _Executor([ExecutionResult(status="error", error_type="script")])
+    budget = RetryBudget(total_cases=10)
+    execute(executor, retry_count=3, budget=budget)
+    assert executor.calls == 1
+    assert budget.used == 0
@@ -0,0 +1,136 @@
+"""脚本沙箱：AST 校验以及 CPU 时间、内存限制"""
+import os
+
+import pytest
+
+from app.engine import script_runtime
+from app.engine.script import CompiledScript, ScriptPool, ScriptError, _Worker, compile_script
+
+posix_only = pytest.mark.skipif(os.name != "posix", reason="沙箱进程池只支持 POSIX")
+
+CPU_TIME_MS = 300
+
+
+@pytest.mark.parametrize("source", [
+    "import os",
+    "from os import path",
+    "__import__('os')",
+    "x = ().__class__",
+    "x = (1).real.__class__.__subclasses__()",
+    "'{0.__class__}'.format(1)",
+    "'{x}'.format_map({})",
+    "global x",
+    "class A: pass",
+    "def f(_x): pass",
+    "def _f(): pass",
+    "f = lambda _x: _x",
+    "try:\n    pass\nexcept Exception as _e:\n    pass",
+    "async def f(): pass",
+    "def f():\n    yield 1",
+    "def f():\n    try:\n        pass\n    finally:\n        return 1",
+    "while True:\n    try:\n        pass\n    finally:\n        break",
+    "for i in range(3):\n    try:\n        pass\n    finally:\n        continue",
+    "x = (lambda: 0).__code__",
+    "def f(): pass\nx = f.gi_frame",
+    "match 1:\n    case ValueError(__class__=c):\n        pass",
+    "match 1:\n    case int(__getattribute__=ga):\n        pass",
+    "match 1:\n    case object(format=f):\n        pass",
+    "match 1:\n    case _x:\n        pass",
+    "match [1]:\n    case [*_rest]:\n        pass",
+    "match {}:\n    case {**_rest}:\n        pass",
+    "1 +",
+])
+def test_validate_rejects(source):
+    with pytest.raises(ScriptError) as exc:
+        compile_script(source)
+    assert exc.value.error_type == "syntax"
+
+
+def test_validate_accepts_plain_script():
+    script = compile_script(
+        "total = 0\n"
+        "for i in range(10):\n"
+        "    try:\n"
+        "        total += int(str(i))\n"
+        "    except ValueError:\n"
+        "        pass\n"
+        "    finally:\n"
+        "        log(i)\n"
+        "vars['total'] = total\n"
+        "match vars:\n"
+        "    case {'total': int(real=n), **rest}:\n"
+        "        vars['real'] = n\n"
+        "    case _:\n"
+        "        pass\n"
+    )
+    response = script_runtime.run(script.code, {"vars": {}})
+    assert response["ok"]
+    assert response["context"]["vars"]["total"] == 45
+    assert response["context"]["vars"]["real"] == 45
+
+
+@pytest.fixture
+def pool():
+    pool = ScriptPool(size=1, memory_mb=256, cpu_time_ms=CPU_TIME_MS, timeout=10)
+    yield pool
+    pool.close()
+
+
+def run(pool, source: str) -> dict:
+    return pool.run(compile_script(source), {"vars": {}})
+
+
+@posix_only
+@pytest.mark.parametrize("source", [
+    "while True:\n    pass",
+    # 捕获超时后继续循环
+    "n = 0\ntry:\n    while True:\n        n += 1\nexcept Exception:\n    pass\nwhile True:\n    n += 1",
+    "n = 0\ntry:\n    while True:\n        n += 1\nexcept:\n    pass\nwhile True:\n    n += 1",
+    "while True:\n    try:\n        while True:\n            pass\n    except:\n        pass",
+    # 在 finally 中继续循环
+    "try:\n    while True:\n        pass\nfinally:\n    while True:\n        pass",
+])
+def test_cpu_time_limit(pool, source):
+    response = run(pool, source)
+    assert not response["ok"]
+    assert response["error_type"] == "timeout"
+
+    # 同一个沙箱进程可以继续执行其他脚本
+    response = run(pool, "vars['x'] = 1")
+    assert response["ok"]
+    assert response["context"]["vars"]["x"] == 1
+
+
+@posix_only
+@pytest.mark.parametrize("source", [
+    "x = bytes(1024 * 1024 * 1024)",
+    # 捕获内存不足后继续执行
+    "try:\n    x = bytes(1024 * 1024 * 1024)\nexcept Exception:\n    pass\nvars['x'] = 1",
+    "try:\n    x = bytes(1024 * 1024 * 1024)\nexcept:\n    pass\nvars['x'] = 1",
+])
+def test_memory_limit(pool, source):
+    response = run(pool, source)
+    assert not response["ok"]
+    assert response["error_type"] == "memory"
+
+
+@posix_only
+def test_cpu_rlimit_backstop():
+    # 绕过 AST 校验直接发给沙箱进程：finally 中的 return 吞掉计时器的异常，由 RLIMIT_CPU 终止进程
+    source = (
+        "def spin():\n"
+        "    try:\n"
+        "        while True:\n"
+        "            pass\n"
+        "    finally:\n"
+        "        return\n"
+        "while True:\n"
+        "    spin()\n"
+    )
+    worker = _Worker(memory_mb=256)
+    try:
+        with pytest.raises(ScriptError) as exc:
+            worker.call(CompiledScript("backstop", source, None), {"vars": {}}, cpu_time_ms=100, timeout=30)
+        assert exc.value.error_type == "timeout"
+    finally:
+        worker.kill()
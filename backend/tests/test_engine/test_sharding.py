@@ -0,0 +1,108 @@
+"""测试集分片：按变量依赖归组以及按历史耗时装箱"""
+import json
+
+import pytest
+
+from app.utils.sharding import group_dependent_cases, plan_shards
+
+
+def case(**config) -> dict:
+    return {"method": "GET", "path": "/", **config}
+
+
+def login(variable: str = "token") -> dict:
+    return case(path="/login", extractors=[{"source": "body", "expression": "$.token", "variable_name": variable}])
+
+
+@pytest.mark.parametrize("config", [
+    case(path="/orders/{{token}}"),
+    case(headers={"Authorization": "Bearer {{token}}"}),
+    case(params={"filter": {"owner": ["{{token}}"]}}),
+    case(body_type="raw", body_content="token={{token}}"),
+    # 内置函数参数中的变量
+    case(headers={"X-Signature": "{{$hmac(secret, token)}}"}),
+    case(headers={"X-Signature": "{{$hmac('secret', token, \"sha1\")}}"}),
+    case(params={"digest": "{{$md5(token)}}"}),
+    case(body_type="json", body_content=json.dumps({"sign": "{{$hmac(\"k\", token)}}"})),
+    # 断言期望值和提取器默认值
+    case(assertions=[{"type": "json_path", "expression": "$.token", "operator": "eq", "expected_value": "{{token}}"}]),
+    case(assertions=[{"type": "header", "expression": "X-Sign", "operator": "eq", "expected_value": "{{$md5(token)}}"}]),
+    case(extractors=[{"source": "body", "expression": "$.id", "variable_name": "id", "default_value": "{{token}}"}]),
+])
+def test_dependent_on_extracted_variable(config):
+    assert group_dependent_cases([(1, login()), (2, case(path="/other")), (3, config)]) == [[1, 3], [2]]
+
+
+@pytest.mark.parametrize("config", [
+    case(path="/orders/{{other}}"),
+    # 字面量参数、未知函数不读取变量
+    case(headers={"X-Signature": "{{$hmac('secret', 'token')}}"}),
+    case(headers={"X-Id": "{{$unknown(token)}}"}),
+    # 变量名作为 JSON 的键不会被渲染
+    case(body_type="json", body_content=json.dumps({"{{token}}": 1})),
+    # 快照基线不渲染
+    case(assertions=[{"type": "snapshot", "expression": "", "expected_value": "{\"t\":\"{{token}}\"}"}]),
+])
+def test_independent(config):
+    assert group_dependent_cases([(1, login()), (2, config)]) == [[1], [2]]
+
+
+def test_latest_producer_wins():
+    cases = [(1, login()), (2, login()), (3, case(path="/{{token}}"))]
+    assert group_dependent_cases(cases) == [[1], [2, 3]]
+
+
+def test_script_depends_on_earlier_cases():
+    cases = [
+        (1, login()),
+        (2, case(path="/a")),
+        (3, case(path="/b", post_script="vars['sign'] = vars.get('token')")),
+        (4, case(path="/c")),
+        # 引用的变量不是提取器产生的，可能由之前的脚本设置
+        (5, case(headers={"X-Sign": "{{sign}}"})),
+        (6, case(path="/d")),
+    ]
+    assert group_dependent_cases(cases) == [[1, 2, 3, 5], [4], [6]]
+
+
+def test_multiple_scripts():
+    cases = [
+        (1, case(path="/a")),
+        (2, case(pre_script="vars['x'] = 1")),
+        (3, case(path="/b")),
+        (4, case(path="/c")),
+        (5, case(pre_script="vars['y'] = 2")),
+        (6, login()),
+        (7, case(path="/{{token}}")),
+        (8, case(path="/{{y}}")),
+    ]
+    assert group_dependent_cases(cases) == [[1, 2, 3, 4, 5, 8], [6, 7]]
+    # 空白脚本不视为脚本
+    assert group_dependent_cases([(1, case()), (2, case(pre_script="  \n"))]) == [[1], [2]]
+
+
+def test_plan_shards_balances_by_duration():
+    groups = [[1], [2], [3], [4], [5]]
+    durations = {1: 100, 2: 60, 3: 50, 4: 40, 5: 30}
+    shards = plan_shards(groups, durations, shard_count=2)
+    # LPT：100 | 60+50 -> 100+40 | 110 -> 140 | 110+30
+    assert shards == [[1, 4], [2, 3, 5]]
+
+
+def test_plan_shards_keeps_groups_together():
+    groups = [[1, 3, 5], [2], [4], [6]]
+    durations = {1: 10, 2: 50, 3: 10, 4: 40, 5: 10, 6: 5}
+    shards = plan_shards(groups, durations, shard_count=3)
+    assert sorted(shards) == [[1, 3, 5, 6], [2], [4]]
+    # 同一组的用例在分片内保持原有顺序
+    chained = next(shard for shard in shards if 1 in shard)
+    assert chained.index(1) < chained.index(3) < chained.index(5)
+
+
+def test_plan_shards_default_duration_and_count():
+    # 没有历史耗时的用例按已知耗时的中位数（20）估算：30 | 20 -> 30 | 20+20 -> 30+10 | 40
+    groups = [[1], [2], [3], [4]]
+    assert plan_shards(groups, {1: 10, 2: 30, 3: 20}, shard_count=2) == [[1, 2], [3, 4]]
+    # 分片数不超过组数，不产生空分片
+    assert plan_shards([[1, 2], [3]], {}, shard_count=8) == [[1, 2], [3]]
+    assert plan_shards([[1], [2]], {}, shard_count=1) == [[1, 2]]
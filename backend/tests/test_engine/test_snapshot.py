@@ -0,0 +1,118 @@
+"""响应快照比对：忽略路径、数组长度变化以及 Merkle 摘要的短路比较"""
+import pytest
+
+from app.engine import snapshot
+from app.engine.snapshot import build_tree, canonical, compare, diff_trees, parse_ignore_paths
+
+ORDER = {
+    "id": 42,
+    "created_at": "2024-01-01T00:00:00",
+    "items": [
+        {"sku": "A", "qty": 1, "request_id": "r1"},
+        {"sku": "B", "qty": 2, "request_id": "r2"},
+    ],
+    "meta": {"request_id": "r0", "trace": {"request_id": "r3"}},
+}
+
+
+def diff(expected, actual, ignore: str = "") -> tuple[int, list[dict]]:
+    return compare(canonical(expected), actual, parse_ignore_paths(ignore))
+
+
+@pytest.mark.parametrize("ignore, actual", [
+    ("$.created_at", {**ORDER, "created_at": "2025-06-01T12:00:00"}),
+    ("$.created_at", {k: v for k, v in ORDER.items() if k != "created_at"}),
+    ("$.items[*].request_id", {**ORDER, "items": [{**item, "request_id": "x"} for item in ORDER["items"]]}),
+    ("$.items[1]", {**ORDER, "items": [ORDER["items"][0], {"sku": "C"}]}),
+    ("$..request_id", {
+        **ORDER,
+        "items": [{**item, "request_id": "x"} for item in ORDER["items"]],
+        "meta": {"request_id": "y", "trace": {"request_id": "z"}},
+    }),
+    ("$['created_at'], $.id", {**ORDER, "id": 43, "created_at": None}),
+])
+def test_ignored_paths(ignore, actual):
+    assert diff(ORDER, actual, ignore) == (0, [])
+
+
+def test_ignored_paths_report_other_changes():
+    actual = {**ORDER, "created_at": "2025-06-01T12:00:00", "id": 43}
+    assert diff(ORDER, actual, "$.created_at") == (
+        1, [{"op": "changed", "path": "$.id", "expected": 42, "actual": 43}],
+    )
+
+
+@pytest.mark.parametrize("expected, actual, ignore, diffs", [
+    ([1, 2, 3], [1, 2, 3, 4, 5], "", [
+        {"op": "added", "path": "$[3]", "actual": 4},
+        {"op": "added", "path": "$[4]", "actual": 5},
+    ]),
+    ([1, 2, 3, 4, 5], [1, 2, 3], "", [
+        {"op": "removed", "path": "$[3]", "expected": 4},
+        {"op": "removed", "path": "$[4]", "expected": 5},
+    ]),
+    # 被忽略的元素超出另一侧长度时不产生差异
+    ([1, 2, 3, 4, 5], [1, 2, 3], "$[4]", [{"op": "removed", "path": "$[3]", "expected": 4}]),
+    ([1, 2, 3], [1, 2, 3, 4, 5], "$[4]", [{"op": "added", "path": "$[3]", "actual": 4}]),
+    ([1, 2, 3, 4, 5], [1, 2, 3], "$[3], $[4]", []),
+    ({"items": [{"id": 1}, {"id": 2}]}, {"items": [{"id": 1}]}, "$.items[1]", []),
+    ({"items": [{"id": 1}]}, {"items": [{"id": 9}, {"id": 2}]}, "$.items[*].id", [
+        {"op": "added", "path": "$.items[1]", "actual": {"id": 2}},
+    ]),
+])
+def test_array_length_change(expected, actual, ignore, diffs):
+    assert diff(expected, actual, ignore) == (len(diffs), diffs)
+
+
+def test_key_order_and_types():
+    assert diff({"a": 1, "b": [1, 2]}, {"b": [1, 2], "a": 1}) == (0, [])
+    # 数字与字符串、1 与 true、1 与 1.0 都视为不同
+    for expected, actual in [(1, "1"), (1, True), (1, 1.0), ([], {}), (None, "null")]:
+        total, _ = diff({"v": expected}, {"v": actual})
+        assert total == 1, (expected, actual)
+
+
+@pytest.mark.parametrize("ignore", ["", "$..request_id"])
+def test_merkle_short_circuit(monkeypatch, ignore):
+    unchanged = {"rows": [{"n": i, "tags": ["a", "b"], "request_id": i} for i in range(50)]}
+    expected = build_tree({"left": unchanged, "right": {"x": 1}}, parse_ignore_paths(ignore))
+    actual = build_tree({"left": {"rows": [dict(row) for row in unchanged["rows"]]}, "right": {"x": 2}},
+                        parse_ignore_paths(ignore))
+    # 先算好摘要，再统计比较时展开了哪些节点
+    assert expected.digest != actual.digest
+
+    expanded = []
+    children = snapshot._Node.children
+
+    def record(node):
+        expanded.append(node.value)
+        return children.fget(node)
+
+    monkeypatch.setattr(snapshot._Node, "children", property(record))
+    assert diff_trees(expected, actual) == (
+        1, [{"op": "changed", "path": "$.right.x", "expected": 1, "actual": 2}],
+    )
+    # 摘要相同的 left 子树不再向下比较
+    assert all(value is not unchanged and value is not unchanged["rows"] for value in expanded)
+    assert not any(isinstance(value, dict) and "n" in value for value in expanded)
+
+
+def test_digest_bottom_up_once(monkeypatch):
+    # 每个容器只规范化一次（子容器以摘要代替），不随嵌套深度重复序列化
+    doc = {"items": [{"id": i, "tags": ["a", "b"]} for i in range(100)]}
+    for key in "abcdefgh":
+        doc = {key: doc}
+    containers = 100 + 100 + 1 + 1 + 8
+    serialized = []
+    original = snapshot.canonical
+    monkeypatch.setattr(snapshot, "canonical", lambda value: serialized.append(value) or original(value))
+
+    tree = build_tree(doc)
+    tree.digest
+    assert len(serialized) == containers
+    # 向下比较时子节点的摘要直接取缓存
+    node = tree
+    for key in "hgfedcba":
+        node = node.children[key]
+    node.children["items"].children[0].digest
+    assert len(serialized) == containers
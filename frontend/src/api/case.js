@@ -29,3 +29,36 @@ export function deleteCase(id) {
 export function copyCase(id) {
   return request.post(`/cases/${id}/copy`)
 }
+
+// 用执行结果更新快照断言的基线（不传执行详情时取最近一次执行）
+export function updateSnapshotBaseline(assertionId, data = {}) {
+  return request.post(`/assertions/${assertionId}/snapshot`, data)
+}
+
+// 获取用例的数据集（含前 20 行预览）
+export function getCaseDataset(caseId) {
+  return request.get(`/cases/${caseId}/dataset`)
+}
+
+// 上传数据集（CSV / JSON / NDJSON）
+export function uploadCaseDataset(caseId, file, concurrency) {
+  const formData = new FormData()
+  formData.append('file', file)
+  if (concurrency) {
+    formData.append('concurrency', concurrency)
+  }
+  return request.post(`/cases/${caseId}/dataset`, formData, {
+    headers: { 'Content-Type': 'multipart/form-data' },
+    timeout: 120000,
+  })
+}
+
+// 更新数据集的行并发数
+export function updateCaseDataset(caseId, data) {
+  return request.put(`/cases/${caseId}/dataset`, data)
+}
+
+// 删除数据集
+export function deleteCaseDataset(caseId) {
+  return request.delete(`/cases/${caseId}/dataset`)
+}
@@ -29,3 +29,18 @@ export function getExecution(id) {
 export function getExecutionDetails(id) {
   return request.get(`/execute/executions/${id}/details`)
 }
+
+// 重跑失败用例
+export function rerunFailed(id, data) {
+  return request.post(`/execute/executions/${id}/rerun-failed`, data)
+}
+
+// 获取重跑链合并结果
+export function getMergedDetails(id) {
+  return request.get(`/execute/executions/${id}/merged`)
+}
+
+// 压测执行
+export function executeLoad(data) {
+  return request.post('/execute/load', data)
+}
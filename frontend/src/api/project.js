@@ -97,3 +97,20 @@ export function deleteEnvVariable(envId, varId) {
 export function getProjectSuites(projectId) {
   return request.get(`/projects/${projectId}/suites`)
 }
+
+// ==================== Mock 服务 ====================
+
+// 获取 mock 服务状态（未启动时 data 为 null）
+export function getProjectMock(projectId) {
+  return request.get(`/projects/${projectId}/mock`)
+}
+
+// 启动 mock 服务（已启动时重新生成路由）
+export function startProjectMock(projectId, data) {
+  return request.post(`/projects/${projectId}/mock`, data)
+}
+
+// 停止 mock 服务
+export function stopProjectMock(projectId) {
+  return request.delete(`/projects/${projectId}/mock`)
+}